@@ -1,3 +1,8 @@
-from doc_manager.agent import root_agent
+def __getattr__(name):
+    if name == "root_agent":
+        from doc_manager.agent import root_agent
+        return root_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["root_agent"] 
\ No newline at end of file
+
+__all__ = ["root_agent"]
@@ -0,0 +1,3 @@
+from .fake_github import FakeGitHub
+
+__all__ = ["FakeGitHub"]
@@ -0,0 +1,519 @@
+"""A local, in-memory stand-in for the parts of the GitHub REST API the tools use.
+
+Covers issues, contents, branches, refs, the Git Data API (blobs, trees, commits),
+pulls (JSON, diff and per-file patches), reviews and compares. Responses carry
+X-RateLimit-* headers and ETags, and every request is counted per endpoint so
+benchmarks can report API call totals.
+"""
+import base64
+import difflib
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+def _blob_sha(content: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+def _timestamp(offset_seconds: int = 0) -> str:
+    moment = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=offset_seconds)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeRepository:
+    """Git-like state: blobs, flat trees (path -> blob SHA), commits, branches, issues and pulls."""
+
+    def __init__(self, full_name: str):
+        self.full_name = full_name
+        self.lock = threading.RLock()
+        self.blobs: dict[str, bytes] = {}
+        self.trees: dict[str, dict] = {}
+        self.commits: dict[str, dict] = {}
+        self.branches: dict[str, str] = {}
+        self.issues: dict[int, dict] = {}
+        self.pulls: dict[int, dict] = {}
+        self.reviews: dict[int, list] = {}
+        self.next_number = 1
+        self.clock = 0
+
+    # --- Git objects ---
+
+    def put_blob(self, content: bytes) -> str:
+        sha = _blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def put_tree(self, files: dict) -> str:
+        sha = hashlib.sha1(json.dumps(sorted(files.items())).encode()).hexdigest()
+        self.trees[sha] = dict(files)
+        return sha
+
+    def put_commit(self, tree_sha: str, parents: list, message: str) -> str:
+        sha = hashlib.sha1(f"{tree_sha}{parents}{message}{len(self.commits)}".encode()).hexdigest()
+        self.commits[sha] = {"tree": tree_sha, "parents": parents, "message": message}
+        return sha
+
+    def commit_files(self, branch: str, changes: dict, message: str) -> str:
+        """Commits {path: text or None (delete)} on top of a branch (creating it if needed)."""
+        with self.lock:
+            parent = self.branches.get(branch)
+            files = dict(self.trees[self.commits[parent]["tree"]]) if parent else {}
+            for path, text in changes.items():
+                if text is None:
+                    files.pop(path, None)
+                else:
+                    files[path] = self.put_blob(text.encode())
+            commit = self.put_commit(self.put_tree(files), [parent] if parent else [], message)
+            self.branches[branch] = commit
+            return commit
+
+    def resolve(self, ref: str) -> str | None:
+        if ref in self.branches:
+            return self.branches[ref]
+        if ref.startswith("heads/") and ref[6:] in self.branches:
+            return self.branches[ref[6:]]
+        if ref in self.commits:
+            return ref
+        return None
+
+    def files_at(self, ref: str) -> dict | None:
+        commit = self.resolve(ref)
+        if commit is None:
+            return self.trees.get(ref)
+        return self.trees[self.commits[commit]["tree"]]
+
+    # --- Issues and pulls ---
+
+    def add_issue(self, title: str, body: str, labels=(), pull_request: bool = False) -> dict:
+        with self.lock:
+            number = self.next_number
+            self.next_number += 1
+            self.clock += 60
+            issue = {"number": number, "title": title, "body": body, "state": "open",
+                     "labels": list(labels), "assignees": [], "updated_at": _timestamp(self.clock),
+                     "pull_request": pull_request}
+            self.issues[number] = issue
+            return issue
+
+    def add_pull(self, title: str, body: str, head: str, base: str) -> dict:
+        issue = self.add_issue(title, body, pull_request=True)
+        pull = {"number": issue["number"], "title": title, "body": body, "state": "open", "head": head, "base": base}
+        self.pulls[issue["number"]] = pull
+        return pull
+
+    def file_patches(self, base: str, head: str) -> list[dict]:
+        base_files = self.files_at(base) or {}
+        head_files = self.files_at(head) or {}
+        patches = []
+        for path in sorted(set(base_files) | set(head_files)):
+            old_sha, new_sha = base_files.get(path), head_files.get(path)
+            if old_sha == new_sha:
+                continue
+            old = self.blobs[old_sha].decode().splitlines(keepends=True) if old_sha else []
+            new = self.blobs[new_sha].decode().splitlines(keepends=True) if new_sha else []
+            lines = list(difflib.unified_diff(old, new, n=3))[2:]
+            patch = "".join(line if line.endswith("\n") else line + "\n" for line in lines)
+            patches.append({
+                "filename": path,
+                "status": "added" if not old_sha else "removed" if not new_sha else "modified",
+                "additions": sum(1 for line in lines if line.startswith("+")),
+                "deletions": sum(1 for line in lines if line.startswith("-")),
+                "patch": patch,
+            })
+        return patches
+
+    def unified_diff(self, base: str, head: str) -> str:
+        sections = []
+        for entry in self.file_patches(base, head):
+            path = entry["filename"]
+            old_name = "/dev/null" if entry["status"] == "added" else f"a/{path}"
+            new_name = "/dev/null" if entry["status"] == "removed" else f"b/{path}"
+            mode = {"added": "new file mode 100644\n", "removed": "deleted file mode 100644\n"}.get(entry["status"], "")
+            sections.append(f"diff --git a/{path} b/{path}\n{mode}--- {old_name}\n+++ {new_name}\n{entry['patch']}")
+        return "".join(sections)
+
+
+class FakeGitHub:
+    """Runs a FakeRepository behind a threaded HTTP server on 127.0.0.1."""
+
+    def __init__(self, full_name: str = "bench/docs", latency_seconds: float = 0.0):
+        self.repo = FakeRepository(full_name)
+        self.latency_seconds = latency_seconds
+        self.calls: dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeGitHub":
+        fake = self
+
+        class Handler(_Handler):
+            server_state = fake
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="fake-github", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def count(self, endpoint: str) -> None:
+        with self._calls_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def reset_counts(self) -> dict:
+        with self._calls_lock:
+            calls, self.calls = self.calls, {}
+        return calls
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_state: FakeGitHub = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- Plumbing ---
+
+    def _send(self, status: int, payload=None, text: str | None = None, headers: dict | None = None) -> None:
+        body = text.encode() if text is not None else (json.dumps(payload).encode() if payload is not None else b"")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8" if text is not None else "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", "4999")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _dispatch(self, method: str) -> None:
+        state = self.server_state
+        if state.latency_seconds:
+            time.sleep(state.latency_seconds)
+        parsed = urlparse(self.path)
+        path = unquote(parsed.path)
+        if path.startswith("/api/v3"):
+            path = path[len("/api/v3"):]
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        prefix = f"/repos/{state.repo.full_name}"
+        if not path.startswith(prefix):
+            self._send(404, {"message": "Not Found"})
+            return
+        route = path[len(prefix):] or "/"
+        for pattern, handler_method, name in _ROUTES:
+            if handler_method != method:
+                continue
+            match = re.fullmatch(pattern, route)
+            if match:
+                state.count(f"{method} {name}")
+                with state.repo.lock:
+                    getattr(self, name)(query, *match.groups())
+                return
+        state.count(f"{method} unmatched")
+        self._send(404, {"message": f"No fake route for {method} {route}"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def _api(self, suffix: str) -> str:
+        return f"{self.server_state.url}/repos/{self.server_state.repo.full_name}{suffix}"
+
+    def _html(self, suffix: str) -> str:
+        return f"https://github.example/{self.server_state.repo.full_name}{suffix}"
+
+    # --- Serializers ---
+
+    def _issue_json(self, issue: dict) -> dict:
+        data = {
+            "number": issue["number"], "title": issue["title"], "body": issue["body"], "state": issue["state"],
+            "html_url": self._html(f"/issues/{issue['number']}"), "url": self._api(f"/issues/{issue['number']}"),
+            "labels": [{"name": name} for name in issue["labels"]], "assignees": [], "updated_at": issue["updated_at"],
+        }
+        if issue["pull_request"]:
+            data["pull_request"] = {"url": self._api(f"/pulls/{issue['number']}")}
+        return data
+
+    def _commit_json(self, sha: str) -> dict:
+        commit = self.server_state.repo.commits[sha]
+        return {
+            "sha": sha, "url": self._api(f"/git/commits/{sha}"), "html_url": self._html(f"/commit/{sha}"),
+            "message": commit["message"],
+            "tree": {"sha": commit["tree"], "url": self._api(f"/git/trees/{commit['tree']}")},
+            "parents": [{"sha": parent, "url": self._api(f"/git/commits/{parent}")} for parent in commit["parents"]],
+        }
+
+    def _ref_json(self, branch: str) -> dict:
+        sha = self.server_state.repo.branches[branch]
+        return {"ref": f"refs/heads/{branch}", "url": self._api(f"/git/refs/heads/{branch}"),
+                "object": {"sha": sha, "type": "commit", "url": self._api(f"/git/commits/{sha}")}}
+
+    def _pull_json(self, pull: dict) -> dict:
+        repo = self.server_state.repo
+        return {
+            "number": pull["number"], "title": pull["title"], "body": pull["body"], "state": pull["state"],
+            "html_url": self._html(f"/pull/{pull['number']}"), "url": self._api(f"/pulls/{pull['number']}"),
+            "diff_url": self._html(f"/pull/{pull['number']}.diff"),
+            "head": {"ref": pull["head"], "sha": repo.resolve(pull["head"])},
+            "base": {"ref": pull["base"], "sha": repo.resolve(pull["base"])},
+        }
+
+    def _paginate(self, items: list, query: dict, route: str) -> None:
+        per_page = int(query.get("per_page", 30))
+        page = int(query.get("page", 1))
+        chunk = items[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(items):
+            next_query = dict(query, page=str(page + 1))
+            headers["Link"] = f'<{self._api(route)}?{"&".join(f"{k}={v}" for k, v in next_query.items())}>; rel="next"'
+        self._send(200, chunk, headers=headers)
+
+    # --- Issues ---
+
+    def list_issues(self, query):
+        repo = self.server_state.repo
+        issues = [issue for issue in repo.issues.values() if query.get("state", "open") in ("all", issue["state"])]
+        if query.get("labels"):
+            wanted = set(query["labels"].split(","))
+            issues = [issue for issue in issues if wanted <= set(issue["labels"])]
+        if query.get("since"):
+            issues = [issue for issue in issues if issue["updated_at"] >= query["since"]]
+        issues.sort(key=lambda issue: issue["updated_at"], reverse=query.get("direction", "desc") == "desc")
+        self._paginate([self._issue_json(issue) for issue in issues], query, "/issues")
+
+    def get_issue(self, query, number):
+        issue = self.server_state.repo.issues.get(int(number))
+        self._send(200, self._issue_json(issue)) if issue else self._send(404, {"message": "Not Found"})
+
+    def create_issue(self, query):
+        data = self._body()
+        issue = self.server_state.repo.add_issue(data["title"], data.get("body", ""), data.get("labels", []))
+        self._send(201, self._issue_json(issue))
+
+    # --- Contents ---
+
+    def get_contents(self, query, path):
+        repo = self.server_state.repo
+        ref = query.get("ref") or "main"
+        files = repo.files_at(ref)
+        if files is None:
+            self._send(404, {"message": f"No commit found for the ref {ref}"})
+            return
+        if path in files:
+            sha = files[path]
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, headers={"ETag": etag})
+                return
+            self._send(200, {"type": "file", "path": path, "name": path.rsplit("/", 1)[-1], "sha": sha,
+                             "encoding": "base64", "content": base64.b64encode(repo.blobs[sha]).decode(),
+                             "size": len(repo.blobs[sha]), "url": self._api(f"/contents/{path}")},
+                       headers={"ETag": etag})
+            return
+        children = sorted({p[len(path) + 1:].split("/", 1)[0] for p in files if p.startswith(path + "/")})
+        if children:
+            self._send(200, [{"type": "file", "name": child, "path": f"{path}/{child}"} for child in children])
+        else:
+            self._send(404, {"message": "Not Found"})
+
+    def put_contents(self, query, path):
+        repo = self.server_state.repo
+        data = self._body()
+        branch = data.get("branch") or "main"
+        files = repo.files_at(branch) or {}
+        if data.get("sha") and files.get(path) != data["sha"]:
+            self._send(409, {"message": f"{path} does not match {data['sha']}"})
+            return
+        commit = repo.commit_files(branch, {path: base64.b64decode(data["content"]).decode()}, data["message"])
+        sha = repo.files_at(branch)[path]
+        self._send(201 if not data.get("sha") else 200, {
+            "content": {"type": "file", "path": path, "sha": sha, "url": self._api(f"/contents/{path}")},
+            "commit": self._commit_json(commit),
+        })
+
+    # --- Branches, refs and the Git Data API ---
+
+    def get_branch(self, query, branch):
+        sha = self.server_state.repo.branches.get(branch)
+        if sha is None:
+            self._send(404, {"message": "Branch not found"})
+            return
+        self._send(200, {"name": branch, "commit": {"sha": sha, "url": self._api(f"/commits/{sha}")}})
+
+    def get_commit(self, query, ref):
+        sha = self.server_state.repo.resolve(ref)
+        if sha is None:
+            self._send(404, {"message": "No commit found"})
+            return
+        if self.headers.get("Accept") == "application/vnd.github.sha":
+            self._send(200, text=sha)
+            return
+        data = self._commit_json(sha)
+        data["commit"] = {"message": data["message"], "tree": data["tree"]}
+        self._send(200, data)
+
+    def create_ref(self, query):
+        repo = self.server_state.repo
+        data = self._body()
+        branch = data["ref"].removeprefix("refs/heads/")
+        if branch in repo.branches:
+            self._send(422, {"message": "Reference already exists"})
+            return
+        repo.branches[branch] = data["sha"]
+        self._send(201, self._ref_json(branch))
+
+    def get_ref(self, query, branch):
+        if branch not in self.server_state.repo.branches:
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, self._ref_json(branch))
+
+    def update_ref(self, query, branch):
+        repo = self.server_state.repo
+        repo.branches[branch] = self._body()["sha"]
+        self._send(200, self._ref_json(branch))
+
+    def get_git_commit(self, query, sha):
+        if sha not in self.server_state.repo.commits:
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, self._commit_json(sha))
+
+    def create_git_commit(self, query):
+        repo = self.server_state.repo
+        data = self._body()
+        sha = repo.put_commit(data["tree"], data.get("parents", []), data["message"])
+        self._send(201, self._commit_json(sha))
+
+    def create_blob(self, query):
+        data = self._body()
+        content = base64.b64decode(data["content"]) if data.get("encoding") == "base64" else data["content"].encode()
+        sha = self.server_state.repo.put_blob(content)
+        self._send(201, {"sha": sha, "url": self._api(f"/git/blobs/{sha}")})
+
+    def get_blob(self, query, sha):
+        content = self.server_state.repo.blobs.get(sha)
+        if content is None:
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, {"sha": sha, "size": len(content), "encoding": "base64",
+                         "content": base64.b64encode(content).decode(), "url": self._api(f"/git/blobs/{sha}")})
+
+    def create_tree(self, query):
+        repo = self.server_state.repo
+        data = self._body()
+        files = dict(repo.trees.get(data.get("base_tree"), {}))
+        for element in data["tree"]:
+            if "content" in element:
+                files[element["path"]] = repo.put_blob(element["content"].encode())
+            elif element.get("sha") is None:
+                files.pop(element["path"], None)
+            else:
+                files[element["path"]] = element["sha"]
+        sha = repo.put_tree(files)
+        self._send(201, {"sha": sha, "url": self._api(f"/git/trees/{sha}"), "tree": self._tree_entries(files)})
+
+    def get_tree(self, query, ref):
+        files = self.server_state.repo.files_at(ref)
+        if files is None:
+            self._send(404, {"message": "Not Found"})
+            return
+        self._send(200, {"sha": ref, "url": self._api(f"/git/trees/{ref}"), "tree": self._tree_entries(files), "truncated": False})
+
+    def _tree_entries(self, files: dict) -> list:
+        blobs = self.server_state.repo.blobs
+        return [{"path": path, "mode": "100644", "type": "blob", "sha": sha, "size": len(blobs[sha]),
+                 "url": self._api(f"/git/blobs/{sha}")} for path, sha in sorted(files.items())]
+
+    # --- Pulls, reviews and compares ---
+
+    def get_pull(self, query, number):
+        pull = self.server_state.repo.pulls.get(int(number))
+        if pull is None:
+            self._send(404, {"message": "Not Found"})
+        elif "diff" in (self.headers.get("Accept") or ""):
+            self._send(200, text=self.server_state.repo.unified_diff(pull["base"], pull["head"]))
+        else:
+            self._send(200, self._pull_json(pull))
+
+    def create_pull(self, query):
+        repo = self.server_state.repo
+        data = self._body()
+        if data["head"] not in repo.branches:
+            self._send(422, {"message": "head branch not found"})
+            return
+        self._send(201, self._pull_json(repo.add_pull(data["title"], data.get("body", ""), data["head"], data["base"])))
+
+    def list_pull_files(self, query, number):
+        pull = self.server_state.repo.pulls[int(number)]
+        self._paginate(self.server_state.repo.file_patches(pull["base"], pull["head"]), query, f"/pulls/{number}/files")
+
+    def list_reviews(self, query, number):
+        self._paginate(self.server_state.repo.reviews.get(int(number), []), query, f"/pulls/{number}/reviews")
+
+    def create_review(self, query, number):
+        data = self._body()
+        review = {"id": len(self.server_state.repo.reviews.get(int(number), [])) + 1, "state": data.get("event", "COMMENTED"),
+                  "body": data.get("body", ""), "user": {"login": "adt-bench"}}
+        self.server_state.repo.reviews.setdefault(int(number), []).append(review)
+        self._send(200, review)
+
+    def compare(self, query, base, head):
+        repo = self.server_state.repo
+        if "diff" in (self.headers.get("Accept") or ""):
+            self._send(200, text=repo.unified_diff(base, head))
+        else:
+            self._send(200, {"files": repo.file_patches(base, head)})
+
+
+_ROUTES = [
+    (r"/issues", "GET", "list_issues"),
+    (r"/issues", "POST", "create_issue"),
+    (r"/issues/(\d+)", "GET", "get_issue"),
+    (r"/contents/(.+)", "GET", "get_contents"),
+    (r"/contents/(.+)", "PUT", "put_contents"),
+    (r"/branches/(.+)", "GET", "get_branch"),
+    (r"/commits/(.+)", "GET", "get_commit"),
+    (r"/git/refs", "POST", "create_ref"),
+    (r"/git/refs?/heads/(.+)", "GET", "get_ref"),
+    (r"/git/refs/heads/(.+)", "PATCH", "update_ref"),
+    (r"/git/commits/([0-9a-f]+)", "GET", "get_git_commit"),
+    (r"/git/commits", "POST", "create_git_commit"),
+    (r"/git/blobs", "POST", "create_blob"),
+    (r"/git/blobs/([0-9a-f]+)", "GET", "get_blob"),
+    (r"/git/trees", "POST", "create_tree"),
+    (r"/git/trees/(.+)", "GET", "get_tree"),
+    (r"/pulls", "POST", "create_pull"),
+    (r"/pulls/(\d+)", "GET", "get_pull"),
+    (r"/pulls/(\d+)/files", "GET", "list_pull_files"),
+    (r"/pulls/(\d+)/reviews", "GET", "list_reviews"),
+    (r"/pulls/(\d+)/reviews", "POST", "create_review"),
+    (r"/compare/(.+?)\.\.\.(.+)", "GET", "compare"),
+]
@@ -0,0 +1,320 @@
+"""Offline end-to-end benchmarks for the agents and GitHub tools.
+
+Starts a local fake GitHub server, points the tools at it through GITHUB_API_URL,
+swaps every agent's model for a scripted StubLlm, and runs:
+
+- tool_reads: the read tools on their own (file reads and revalidation, bulk reads, tree, issue listing).
+- context_fetch: an issue, several files and a PR diff fetched with `fetch_many`, against the same reads one after another.
+- single_file_qa: DocManagerAgent -> QAAgent auditing one file and filing an issue.
+- issue_batch: the concurrent batch runner over many issues (generation, PR, evaluation, approval).
+- large_pr_evaluation: EvaluationAgent paging through a pull request with many changed files.
+
+Each scenario reports throughput, p50/p95 latency, GitHub API calls and LLM tokens.
+Nothing touches the network or a real model, so it can run in CI.
+
+Run from the adt-prototype directory:
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --scenario issue_batch --issues 100 --output report.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+from .fake_github import FakeGitHub
+
+SCENARIOS = ("tool_reads", "context_fetch", "single_file_qa", "issue_batch", "large_pr_evaluation")
+
+REPOSITORY = "bench/docs"
+BATCH_LABEL = "bench-batch"
+PAGE_LINES = 60
+
+
+def _page(index: int) -> str:
+    """A doc page with a few deliberate lint findings (misspelling, dead link) on every fifth page."""
+    lines = [f"# Page {index}", "", f"Introduction to topic {index}.", ""]
+    for section in range(1, 5):
+        lines += [f"## Section {section}", ""]
+        lines += [f"Line {line} of section {section} on page {index}." for line in range(1, PAGE_LINES // 4 - 2)]
+        lines.append("")
+    if index % 5 == 0:
+        lines += ["Fix teh wording here.", "", "See [the guide](missing-guide.md) for details.", ""]
+    return "\n".join(lines)
+
+
+def seed_repository(fake: FakeGitHub, pages: int, issues: int, pr_files: int) -> dict:
+    """Fills the fake repository and returns the numbers of the fixtures the scenarios use."""
+    repo = fake.repo
+    files = {f"docs/page-{index:03d}.md": _page(index) for index in range(pages)}
+    files["README.md"] = "# Bench docs\n\nSee [page 0](docs/page-000.md).\n"
+    repo.commit_files("main", files, "Initial docs")
+
+    for index in range(issues):
+        path = f"docs/page-{index % pages:03d}.md"
+        repo.add_issue(f"Fix wording on page {index}", f"The page {path} has a typo: 'teh' should be 'the'.", labels=[BATCH_LABEL])
+
+    # A large documentation PR: five spread-out edits in each of `pr_files` pages.
+    repo.branches["bench/large-pr"] = repo.branches["main"]
+    changes = {}
+    for index in range(pr_files):
+        lines = files[f"docs/page-{index % pages:03d}.md"].split("\n")
+        for offset in range(0, len(lines), len(lines) // 5):
+            lines[offset] = lines[offset] + " (revised)"
+        changes[f"docs/page-{index % pages:03d}.md"] = "\n".join(lines)
+    repo.commit_files("bench/large-pr", changes, "Revise many pages")
+    pr_issue = repo.add_issue("Revise the docs", "Revise wording across the documentation pages.")
+    pull = repo.add_pull("Docs: revise many pages", f"Addresses issue #{pr_issue['number']}.", "bench/large-pr", "main")
+    return {"large_pr_number": pull["number"], "large_pr_issue": pr_issue["number"]}
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1]
+
+
+def _sum_counter(snapshot: dict, name: str, **labels) -> float:
+    return sum(value for (metric, items), value in snapshot.items()
+               if metric == name and all(dict(items).get(key) == wanted for key, wanted in labels.items()))
+
+
+class _Measurement:
+    """Collects per-operation latencies plus API-call and token deltas for one scenario."""
+
+    def __init__(self, fake: FakeGitHub, metrics):
+        self.fake = fake
+        self.metrics = metrics
+        self.latencies: list = []
+        self.extra: dict = {}
+
+    def __enter__(self):
+        self.fake.reset_counts()
+        self.before = self.metrics.snapshot()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        self.calls = self.fake.reset_counts()
+        self.after = self.metrics.snapshot()
+        return False
+
+    def report(self) -> dict:
+        def delta(name, **labels):
+            return _sum_counter(self.after, name, **labels) - _sum_counter(self.before, name, **labels)
+
+        operations = len(self.latencies)
+        return {
+            "operations": operations,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_per_second": round(operations / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_p50_ms": round(percentile(self.latencies, 0.50) * 1000, 1),
+            "latency_p95_ms": round(percentile(self.latencies, 0.95) * 1000, 1),
+            "github_api_calls": sum(self.calls.values()),
+            "github_api_calls_by_endpoint": dict(sorted(self.calls.items())),
+            "llm_calls": int(delta("adt_llm_calls_total")),
+            "llm_input_tokens": int(delta("adt_llm_tokens_total", direction="input")),
+            "llm_output_tokens": int(delta("adt_llm_tokens_total", direction="output")),
+            **self.extra,
+        }
+
+
+async def _run_prompt(runner, prompt: str) -> str:
+    from google.genai import types
+
+    user_id = f"bench-{uuid.uuid4().hex[:8]}"
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+    final_text = ""
+    async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        if event.is_final_response() and event.content and event.content.parts:
+            final_text = "".join(part.text or "" for part in event.content.parts)
+    return final_text
+
+
+# --- Scenarios ---
+
+def scenario_tool_reads(fake, fixtures, args, metrics) -> dict:
+    from github_tools.github_tool import get_file_content, get_files_content, get_open_issues, list_repository_tree
+
+    paths = [f"docs/page-{index:03d}.md" for index in range(min(args.pages, 20))]
+    operations = [lambda path=path: get_file_content(path) for path in paths]
+    operations += [lambda path=path: get_file_content(path) for path in paths]  # Revalidated against the cache.
+    operations += [lambda: get_files_content(paths), lambda: list_repository_tree("docs"),
+                   lambda: get_open_issues(labels=BATCH_LABEL)]
+    with _Measurement(fake, metrics) as measurement:
+        for operation in operations:
+            started = time.perf_counter()
+            result = operation()
+            measurement.latencies.append(time.perf_counter() - started)
+            if result["status"] != "success":
+                measurement.extra.setdefault("errors", []).append(result.get("error_message"))
+    return measurement.report()
+
+
+def scenario_context_fetch(fake, fixtures, args, metrics) -> dict:
+    from github_tools.async_tools import fetch_many
+    from github_tools.github_tool import get_file_content, get_issue, get_pull_request_diff
+
+    issue, pr_number = fixtures["large_pr_issue"], fixtures["large_pr_number"]
+    paths = [f"docs/page-{index:03d}.md" for index in range(min(args.pages, 5))]
+    sequential = []
+    for _ in range(args.context_runs):
+        started = time.perf_counter()
+        get_issue(issue)
+        for path in paths:
+            get_file_content(path)
+        get_pull_request_diff(pr_number)
+        sequential.append(time.perf_counter() - started)
+
+    async def fetch_all(measurement):
+        for _ in range(args.context_runs):
+            started = time.perf_counter()
+            result = await fetch_many(issue_numbers=[issue], paths=paths, pr_numbers=[pr_number])
+            measurement.latencies.append(time.perf_counter() - started)
+            if result["errors"]:
+                measurement.extra.setdefault("errors", []).append(result["errors"])
+
+    with _Measurement(fake, metrics) as measurement:
+        asyncio.run(fetch_all(measurement))
+    measurement.extra["sequential_latency_p50_ms"] = round(percentile(sequential, 0.50) * 1000, 1)
+    return measurement.report()
+
+
+def scenario_single_file_qa(fake, fixtures, args, metrics) -> dict:
+    from google.adk.runners import InMemoryRunner
+    from doc_manager.agent import root_agent
+
+    runner = InMemoryRunner(agent=root_agent, app_name="adt_bench")
+    outcomes = {}
+    with _Measurement(fake, metrics) as measurement:
+        for run in range(args.qa_runs):
+            started = time.perf_counter()
+            text = asyncio.run(_run_prompt(runner, f"QA file docs/page-{(run * 5) % args.pages:03d}.md"))
+            measurement.latencies.append(time.perf_counter() - started)
+            outcome = ("issue_created" if "Successfully created issue" in text else "already_tracked" if "already tracked" in text
+                       else "clean" if "No issues found" in text else "other")
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    measurement.extra["outcomes"] = outcomes
+    return measurement.report()
+
+
+def scenario_issue_batch(fake, fixtures, args, metrics) -> dict:
+    from doc_manager.batch_runner import BatchRunner
+    from github_tools.github_tool import iter_issues
+
+    issues = iter_issues(labels=[BATCH_LABEL], fields=("number", "title", "body"), direction="asc")
+    with _Measurement(fake, metrics) as measurement:
+        report = asyncio.run(BatchRunner(max_concurrency=args.concurrency).run(issues))
+    # Per-issue latency comes from the runner; throughput is issues over the whole batch.
+    measurement.latencies = [result.get("elapsed_seconds", 0.0) for result in report["results"]]
+    measurement.extra["by_status"] = report["by_status"]
+    measurement.extra["concurrency"] = args.concurrency
+    return measurement.report()
+
+
+def scenario_large_pr_evaluation(fake, fixtures, args, metrics) -> dict:
+    from google.adk.runners import InMemoryRunner
+    from doc_manager.evaluation_agent.agent import evaluation_agent
+
+    runner = InMemoryRunner(agent=evaluation_agent, app_name="adt_bench")
+    prompt = f"Evaluate PR #{fixtures['large_pr_number']} for issue #{fixtures['large_pr_issue']}."
+    approved = 0
+    with _Measurement(fake, metrics) as measurement:
+        for _ in range(args.pr_runs):
+            started = time.perf_counter()
+            text = asyncio.run(_run_prompt(runner, prompt))
+            measurement.latencies.append(time.perf_counter() - started)
+            approved += "has been evaluated and approved" in text
+    measurement.extra["approved"] = approved
+    measurement.extra["changed_files"] = args.pr_files
+    return measurement.report()
+
+
+def _install_stub_models(model_latency_seconds: float) -> None:
+    from .stub_llm import StubLlm
+    from doc_manager.agent import doc_manager_agent
+    from doc_manager.qa_agent.agent import qa_agent
+    from doc_manager.generation_agent.agent import generation_agent
+    from doc_manager.evaluation_agent.agent import evaluation_agent
+
+    for agent, role in ((doc_manager_agent, "manager"), (qa_agent, "qa"),
+                        (generation_agent, "generation"), (evaluation_agent, "evaluation")):
+        agent.model = StubLlm(model=f"stub-{role}", role=role, latency_seconds=model_latency_seconds)
+
+
+def run(args) -> dict:
+    fake = FakeGitHub(REPOSITORY, latency_seconds=args.github_latency_ms / 1000).start()
+    fixtures = seed_repository(fake, args.pages, args.issues, args.pr_files)
+    # The tools read these at import time, so set them before importing anything from the app.
+    os.environ.update({
+        "GITHUB_API_URL": fake.url,
+        "GITHUB_TOKEN": "bench-token",
+        "GITHUB_REPOSITORY": REPOSITORY,
+        "ADT_STATE_DIR": tempfile.mkdtemp(prefix="adt-bench-"),
+    })
+    from telemetry import metrics
+
+    if not args.verbose:
+        logging.getLogger("adt.telemetry").setLevel(logging.WARNING)
+    _install_stub_models(args.model_latency_ms / 1000)
+    scenarios = {name: globals()[f"scenario_{name}"] for name in args.scenario or SCENARIOS}
+    report = {"settings": {key: value for key, value in vars(args).items() if key not in ("output", "verbose")}, "scenarios": {}}
+    try:
+        for name, scenario in scenarios.items():
+            print(f"Running {name}...", file=sys.stderr)
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                report["scenarios"][name] = scenario(fake, fixtures, args, metrics)
+    finally:
+        fake.stop()
+    return report
+
+
+def _print_summary(report: dict) -> None:
+    header = f"{'scenario':<22}{'ops':>6}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'API calls':>11}{'LLM calls':>11}{'tokens in':>11}{'tokens out':>11}"
+    print(header, file=sys.stderr)
+    for name, result in report["scenarios"].items():
+        print(f"{name:<22}{result['operations']:>6}{result['throughput_per_second']:>9}{result['latency_p50_ms']:>10}"
+              f"{result['latency_p95_ms']:>10}{result['github_api_calls']:>11}{result['llm_calls']:>11}"
+              f"{result['llm_input_tokens']:>11}{result['llm_output_tokens']:>11}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline agent and GitHub tool benchmarks.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Scenario to run (repeatable). Defaults to all.")
+    parser.add_argument("--pages", type=int, default=50, help="Documentation pages in the fake repository.")
+    parser.add_argument("--issues", type=int, default=100, help="Issues for the batch scenario.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Batch runner workers.")
+    parser.add_argument("--context-runs", type=int, default=10, help="Context fetches (fetch_many and sequential each).")
+    parser.add_argument("--qa-runs", type=int, default=10, help="Single-file QA runs.")
+    parser.add_argument("--pr-files", type=int, default=40, help="Changed files in the large pull request.")
+    parser.add_argument("--pr-runs", type=int, default=3, help="Evaluations of the large pull request.")
+    parser.add_argument("--github-latency-ms", type=float, default=0.0, help="Simulated latency added to every fake GitHub response.")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="Simulated latency added to every stub model call.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--verbose", action="store_true", help="Show tool output and telemetry logs.")
+    args = parser.parse_args()
+
+    report = run(args)
+    _print_summary(report)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
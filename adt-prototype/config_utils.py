@@ -1,7 +1,10 @@
+import os
 import toml
 
 # --- Configuration Loading ---
-CONFIG_FILE_PATH = "config.toml"
+# Resolved next to this file, so scripts and `adk web` find it from any working directory.
+# ADT_CONFIG_FILE points at a different file.
+CONFIG_FILE_PATH = os.getenv("ADT_CONFIG_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.toml"))
 
 def load_config() -> dict:
     """Loads the TOML configuration file."""
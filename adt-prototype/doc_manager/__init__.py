@@ -1,16 +1,16 @@
-from .agent import root_agent
+import importlib
 
-agent = root_agent
+# Agents are built on first access (see registry.py), so importing this package, or helper
+# modules such as doc_manager.qa_agent.incremental, does not import ADK or build any agent.
 
-__all__ = ["agent"]
 
-from .qa_agent.agent import qa_agent
-from .generation_agent.agent import generation_agent
-from .evaluation_agent.agent import evaluation_agent
+def __getattr__(name):
+    if name == "root_agent":
+        from .registry import get_agent
+        return get_agent("doc_manager_agent")
+    if name == "agent":
+        return importlib.import_module(".agent", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = [
-    "root_agent",
-    "qa_agent",
-    "generation_agent",
-    "evaluation_agent",
-]
\ No newline at end of file
+
+__all__ = ["root_agent"]
@@ -0,0 +1,329 @@
+"""Concurrent batch processing of GitHub issues through GenerationAgent and EvaluationAgent.
+
+DocManagerAgent handles a batch one issue at a time inside a single conversation. This
+runner drives the same sub-agents programmatically instead: every issue gets its own
+isolated sessions, a bounded pool of workers processes issues concurrently, and a
+bounded queue applies backpressure to the issue source.
+
+Each issue's progress is checkpointed in the workflow store (branch, PR, verdict), so a
+re-run skips finished steps, and issues claimed by another live runner are left alone.
+
+Run from the adt-prototype directory:
+
+    python -m doc_manager.batch_runner 12 15 18
+    python -m doc_manager.batch_runner --label documentation
+    python -m doc_manager.batch_runner --resume
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from config_utils import config
+from telemetry import current_trace_id, start_metrics_server, trace
+from verdict_cache import get_verdict_cache_stats
+from workflow_store import ENABLED as CHECKPOINTS_ENABLED
+from workflow_store import (APPROVED, CHANGES_REQUESTED, FINAL_STAGES, GENERATED, GENERATION_FAILED, PENDING, PR_OPENED,
+                            ClaimLostError, get_workflow_store)
+from github_tools.github_client import get_default_repository
+from github_tools.github_tool import get_issue, iter_issues, warm_issue_index
+from .registry import get_agent
+
+BATCH_SETTINGS = config.get("batch", {})
+MAX_CONCURRENCY = BATCH_SETTINGS.get("max_concurrency", 4)
+QUEUE_SIZE = BATCH_SETTINGS.get("queue_size", 8)
+ISSUE_TIMEOUT_SECONDS = BATCH_SETTINGS.get("issue_timeout_seconds", 900)
+GITHUB_BASE_BRANCH = config.get("general", {}).get("github_base_branch", "main")
+
+APP_NAME = "adt_batch"
+
+_PR_NUMBER_RE = re.compile(r"PR #(\d+)")
+_BRANCH_RE = re.compile(r"branch '([^']+)'")
+
+
+async def _run_agent(runner: InMemoryRunner, prompt: str) -> str:
+    """Runs one prompt in a fresh session and returns the agent's final text response."""
+    user_id = f"batch-{uuid.uuid4().hex[:8]}"
+    session = await runner.session_service.create_session(
+        app_name=APP_NAME, user_id=user_id, state={"trace_id": current_trace_id()}
+    )
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+    final_text = ""
+    async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        if event.is_final_response() and event.content and event.content.parts:
+            final_text = "".join(part.text or "" for part in event.content.parts)
+    return final_text
+
+
+class BatchRunner:
+    """Fans issues out to a bounded pool of Generation -> Evaluation pipelines."""
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, queue_size: int = QUEUE_SIZE,
+                 issue_timeout_seconds: float = ISSUE_TIMEOUT_SECONDS, base_branch: str = GITHUB_BASE_BRANCH,
+                 checkpoints: bool = CHECKPOINTS_ENABLED):
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.issue_timeout_seconds = issue_timeout_seconds
+        self.base_branch = base_branch
+        self.store = get_workflow_store(get_default_repository() or "") if checkpoints else None
+        self.run_id = uuid.uuid4().hex[:12]
+        self.generation_runner = InMemoryRunner(agent=get_agent("generation_agent"), app_name=APP_NAME)
+        self.evaluation_runner = InMemoryRunner(agent=get_agent("evaluation_agent"), app_name=APP_NAME)
+
+    async def _checkpoint(self, issue_number: int, worker: str | None, **fields) -> None:
+        if self.store is not None and not await asyncio.to_thread(self.store.checkpoint, issue_number, worker, **fields):
+            raise ClaimLostError(f"Lost the claim on issue #{issue_number}; another worker owns it now.")
+
+    async def _renew_claim(self, issue_number: int, worker: str, lost: asyncio.Event, task: asyncio.Future) -> None:
+        while True:
+            await asyncio.sleep(self.store.lease_seconds / 3)
+            if not await asyncio.to_thread(self.store.renew, issue_number, worker):
+                lost.set()
+                task.cancel()
+                return
+
+    async def _run_claimed(self, issue_number: int, title: str, step) -> dict:
+        """Claims the issue in the workflow store and runs `step(checkpoint, worker)` while renewing the lease.
+
+        Returns status 'claimed_elsewhere' without doing anything if another live worker holds the issue,
+        and 'claim_lost' if the claim expired and was taken over while the step ran; the step is then cancelled.
+        """
+        worker = f"{self.run_id}-{uuid.uuid4().hex[:6]}"
+        state = await asyncio.to_thread(self.store.claim, issue_number, worker, self.run_id, title)
+        if state is None:
+            return {"issue_number": issue_number, "title": title, "status": "claimed_elsewhere"}
+        lost = asyncio.Event()
+        task = asyncio.ensure_future(step(state, worker))
+        heartbeat = asyncio.create_task(self._renew_claim(issue_number, worker, lost, task))
+        try:
+            return await task
+        except (ClaimLostError, asyncio.CancelledError) as e:
+            if isinstance(e, ClaimLostError) or lost.is_set():
+                print(f"WARNING: Lost the claim on issue #{issue_number}; stopped processing it.")
+                return {"issue_number": issue_number, "title": title, "status": "claim_lost"}
+            # Timeout or shutdown; the completed steps stay checkpointed.
+            await asyncio.to_thread(self.store.checkpoint, issue_number, worker, last_error="Cancelled (timeout or shutdown).")
+            raise
+        except Exception as e:
+            await asyncio.to_thread(self.store.checkpoint, issue_number, worker, last_error=str(e) or type(e).__name__)
+            raise
+        finally:
+            heartbeat.cancel()
+            task.cancel()
+            await asyncio.to_thread(self.store.release, issue_number, worker)
+
+    async def run_issue(self, issue: dict, evaluate: bool = True) -> dict:
+        """Claims the issue in the workflow store and processes it from its last checkpoint.
+
+        Returns status 'claimed_elsewhere' without doing anything if another live runner holds it.
+        """
+        if self.store is None:
+            return await self.process_issue(issue, evaluate)
+        return await self._run_claimed(issue["number"], issue.get("title", ""),
+                                       lambda state, worker: self.process_issue(issue, evaluate, state, worker))
+
+    async def run_evaluation(self, pr_number: int, issue_number: int) -> dict:
+        """Claims the issue and evaluates one of its PRs, checkpointing the verdict (used by the webhook workers)."""
+        if self.store is None:
+            return await self.evaluate_pull_request(pr_number, issue_number)
+        return await self._run_claimed(issue_number, "",
+                                       lambda state, worker: self.evaluate_pull_request(pr_number, issue_number, worker))
+
+    async def process_issue(self, issue: dict, evaluate: bool = True, checkpoint: dict | None = None,
+                            worker: str | None = None) -> dict:
+        """Runs GenerationAgent then EvaluationAgent for one issue, each in its own session.
+
+        Steps already recorded in `checkpoint` are skipped: an issue with an open PR goes
+        straight to evaluation, and one with a final verdict returns it without any model
+        calls. A failed generation is retried until the issue has used the store's
+        `max_attempts` claims. With `evaluate=False` it stops once the PR is open (e.g.
+        when the PR's own webhook will queue its evaluation). `worker` is the claim that
+        checkpoints are written under.
+        """
+        number = issue["number"]
+        checkpoint = checkpoint or {}
+        stage = checkpoint.get("stage") or PENDING
+        result = {"issue_number": number, "title": issue.get("title", ""), "status": "failed",
+                  "branch_name": checkpoint.get("branch_name"), "pr_number": checkpoint.get("pr_number"), "approved": False}
+        started = time.monotonic()
+
+        # `attempts` already counts this claim.
+        exhausted = (stage == GENERATION_FAILED and self.store is not None
+                     and (checkpoint.get("attempts") or 0) > self.store.max_attempts)
+        if stage in FINAL_STAGES or exhausted:
+            result.update(status=stage, approved=bool(checkpoint.get("approved")), resumed_from=stage,
+                          generation_response=checkpoint.get("generation_response"),
+                          evaluation_response=checkpoint.get("evaluation_response"), elapsed_seconds=0.0)
+            return result
+
+        if stage in (PENDING, GENERATED, GENERATION_FAILED):
+            generation_prompt = (
+                f"Process issue #{number}: {issue.get('title', '')}\n\n"
+                f"Issue body:\n{issue.get('body') or '(empty)'}\n\n"
+                f"Use base branch '{self.base_branch}'."
+            )
+            if stage == GENERATION_FAILED:
+                result["resumed_from"] = stage
+            if stage == GENERATED and result["branch_name"]:
+                result["resumed_from"] = stage
+                generation_prompt += (
+                    f"\n\nA previous attempt already committed the changes for this issue to branch '{result['branch_name']}' "
+                    f"but did not open a pull request. Do not commit again: check the branch with `get_file_content` at ref "
+                    f"'{result['branch_name']}' if needed, then create the pull request from it."
+                )
+            generation_text = await _run_agent(self.generation_runner, generation_prompt)
+            result["generation_response"] = generation_text
+            branch_match = _BRANCH_RE.search(generation_text)
+            pr_match = _PR_NUMBER_RE.search(generation_text)
+            result["branch_name"] = branch_match.group(1) if branch_match else result["branch_name"]
+            if not pr_match:
+                result["status"] = "generation_failed"
+                if result["branch_name"]:
+                    # Committed but no PR: the next run only has to open the PR.
+                    await self._checkpoint(number, worker, stage=GENERATED, branch_name=result["branch_name"], generation_response=generation_text)
+                else:
+                    await self._checkpoint(number, worker, stage=GENERATION_FAILED, generation_response=generation_text)
+                result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+                return result
+            result["pr_number"] = int(pr_match.group(1))
+            await self._checkpoint(number, worker, stage=PR_OPENED, branch_name=result["branch_name"], pr_number=result["pr_number"],
+                                   generation_response=generation_text, last_error=None)
+        else:
+            result["resumed_from"] = stage
+
+        if not evaluate:
+            result["status"] = "pr_opened"
+            result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+            return result
+
+        result.update(await self.evaluate_pull_request(result["pr_number"], number, worker))
+        result["elapsed_seconds"] = round(time.monotonic() - started, 2)
+        return result
+
+    async def evaluate_pull_request(self, pr_number: int, issue_number: int, worker: str | None = None) -> dict:
+        """Runs EvaluationAgent on one PR in its own session and checkpoints the verdict under the issue's claim `worker`."""
+        evaluation_text = await _run_agent(self.evaluation_runner, f"Evaluate PR #{pr_number} for issue #{issue_number}.")
+        approved = "has been evaluated and approved" in evaluation_text
+        status = APPROVED if approved else CHANGES_REQUESTED
+        await self._checkpoint(issue_number, worker, stage=status, approved=approved, evaluation_response=evaluation_text, last_error=None)
+        return {"evaluation_response": evaluation_text, "approved": approved, "status": status}
+
+    async def _worker(self, queue: asyncio.Queue, results: list) -> None:
+        while True:
+            issue = await queue.get()
+            try:
+                if issue is None:
+                    return
+                trace_id = f"issue-{issue['number']}-{uuid.uuid4().hex[:8]}"
+                try:
+                    with trace(trace_id):
+                        result = await asyncio.wait_for(self.run_issue(issue), timeout=self.issue_timeout_seconds)
+                except asyncio.TimeoutError:
+                    result = {"issue_number": issue["number"], "status": "timeout",
+                              "error_message": f"Timed out after {self.issue_timeout_seconds}s."}
+                except Exception as e:
+                    result = {"issue_number": issue["number"], "status": "error", "error_message": str(e)}
+                result["trace_id"] = trace_id
+                print(f"Issue #{result['issue_number']}: {result['status']}")
+                results.append(result)
+            finally:
+                queue.task_done()
+
+    async def run(self, issues) -> dict:
+        """Processes an iterable of issue dicts (number, title, body) and returns an aggregated report.
+
+        The iterable is consumed lazily; once `queue_size` issues are waiting, pulling more
+        blocks until a worker frees up.
+        """
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        results: list = []
+        workers = [asyncio.create_task(self._worker(queue, results)) for _ in range(self.max_concurrency)]
+
+        iterator = iter(issues)
+        while True:
+            # Issue sources may page through the REST API, so pull from them off the event loop.
+            issue = await asyncio.to_thread(next, iterator, None)
+            if issue is None:
+                break
+            await queue.put(issue)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+        report = build_report(results, time.monotonic() - started)
+        report["verdict_cache"] = get_verdict_cache_stats()["stats"]
+        if self.store is not None:
+            report["workflow"] = self.store.stats()
+        return report
+
+
+def build_report(results: list, elapsed_seconds: float) -> dict:
+    """Aggregates per-issue results into a single batch report."""
+    results = sorted(results, key=lambda result: result["issue_number"])
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    return {
+        "status": "success",
+        "total": len(results),
+        "approved": counts.get("approved", 0),
+        "by_status": counts,
+        "elapsed_seconds": round(elapsed_seconds, 2),
+        "results": results,
+    }
+
+
+def _issues_by_number(numbers):
+    for number in numbers:
+        response = get_issue(number)
+        if response["status"] != "success":
+            print(f"Skipping issue #{number}: {response['error_message']}")
+            continue
+        yield response["issue"]
+
+
+def _reset_checkpoints(store, issues):
+    for issue in issues:
+        store.reset([issue["number"]])
+        yield issue
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process GitHub issues concurrently through GenerationAgent and EvaluationAgent.")
+    parser.add_argument("issue_numbers", nargs="*", type=int, help="Issues to process. Defaults to all open issues matching the filters.")
+    parser.add_argument("--label", action="append", default=[], help="Only process open issues with this label (repeatable).")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--resume", action="store_true", help="Process the unfinished issues recorded in the workflow store.")
+    parser.add_argument("--restart", action="store_true", help="Discard the selected issues' checkpoints and start them from scratch.")
+    args = parser.parse_args()
+
+    runner = BatchRunner(max_concurrency=args.concurrency)
+    if args.resume:
+        if runner.store is None:
+            parser.error("--resume needs workflow.enabled = true.")
+        issues = _issues_by_number(args.issue_numbers or [entry["number"] for entry in runner.store.unfinished()])
+    elif args.issue_numbers:
+        issues = _issues_by_number(args.issue_numbers)
+    else:
+        issues = iter_issues(labels=args.label, fields=("number", "title", "body"), direction="asc")
+    if args.restart and runner.store is not None:
+        issues = _reset_checkpoints(runner.store, issues)
+
+    start_metrics_server()
+    warm_issue_index()
+    report = asyncio.run(runner.run(issues))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
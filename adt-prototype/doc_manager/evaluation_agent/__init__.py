@@ -1,3 +1,8 @@
-from .agent import evaluation_agent
+def __getattr__(name):
+    if name == "evaluation_agent":
+        from .agent import evaluation_agent
+        return evaluation_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-__all__ = ["evaluation_agent"]
\ No newline at end of file
+
+__all__ = ["evaluation_agent"]
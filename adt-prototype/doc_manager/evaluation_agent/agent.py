@@ -1,40 +1,56 @@
-from google.adk.agents import Agent
-from google.genai import types
 import os
-from github_tools.github_tool import GITHUB_TOOLS
-from config_utils import config
+from telemetry import AGENT_CALLBACKS
+from ..registry import agent_model, agent_tools
 
 GITHUB_REPOSITORY = os.getenv("GITHUB_REPOSITORY")
 
-EVALUATION_AGENT_MODEL = config.get("models", {}).get("evaluation_agent", "gemini-2.5-pro-preview-05-06")
 
-evaluation_agent = Agent(
-    name="EvaluationAgent",
-    model=EVALUATION_AGENT_MODEL,
-    description=(
-        "Evaluates documentation pull requests against their original GitHub issues. "
-        "Approves PRs if they meet criteria."
-    ),
-    instruction=(
-        "You are EvaluationAgent, a detail-oriented reviewer responsible for evaluating documentation Pull Requests (PRs). "
-        "Your task is to assess whether a PR adequately addresses its corresponding GitHub issue and meets quality standards."
-        "\n"
-        "When asked to evaluate a PR (e.g., 'Evaluate PR #789 for issue #123'):\n"
-        "1.  You will be provided with the PR number and the original issue number by DocManagerAgent.\n"
-        "2.  Use the `get_issue` tool to fetch the details of the original GitHub issue. This provides the context and requirements.\n"
-        "3.  Use the `get_pull_request_diff` tool to fetch the changes made in the PR.\n"
-        "4.  Analyze the PR diff in conjunction with the issue details:\n"
-        "    a.  Does the PR fully address the problem described in the issue?\n"
-        "    b.  Are the changes accurate, clear, and well-written?\n"
-        "    c.  Are there any unintended side effects or new errors introduced?\n"
-        "    d.  (For this prototype, assume all changes are positive if they address the issue. More complex quality checks can be added later.)\n"
-        "5.  Based on your evaluation:\n"
-        "    a.  If the PR adequately addresses the issue and the changes are good: Use the `approve_pull_request` tool with the PR number. Then respond with: 'PR #<pr_number> for issue #<issue_number> has been evaluated and approved. Changes look good.'\n"
-        "    b.  If the PR does NOT adequately address the issue OR if you find significant problems with the changes: Respond with a clear explanation of the deficiencies. E.g., 'PR #<pr_number> for issue #<issue_number> does not fully address the issue because [specific reason] and/or has the following problems: [specific problem]. It has not been approved. GenerationAgent may need to revise.' Be specific so DocManagerAgent or GenerationAgent can act on your feedback.\n"
-        "6.  If any of the tools (`get_issue`, `get_pull_request_diff`, `approve_pull_request`) fail, report the specific error. E.g., 'Error fetching issue #<issue_number>: [error_message]'.\n"
-        "\n"
-        "Focus on comparing the PR to the issue and making an approval decision. You are the first line of approval."
-    ),
-    tools=GITHUB_TOOLS,
+def build_evaluation_agent():
+    """Builds EvaluationAgent, with its verdict cache enabled."""
+    from google.adk.agents import Agent
+    from verdict_cache import enable_verdict_cache
+    from .verdicts import resolve_evaluation_subject
 
-)
\ No newline at end of file
+    agent = Agent(
+        name="EvaluationAgent",
+        model=agent_model("evaluation_agent"),
+        description=(
+            "Evaluates documentation pull requests against their original GitHub issues. "
+            "Approves PRs if they meet criteria."
+        ),
+        instruction=(
+            "You are EvaluationAgent, a detail-oriented reviewer responsible for evaluating documentation Pull Requests (PRs). "
+            "Your task is to assess whether a PR adequately addresses its corresponding GitHub issue and meets quality standards."
+            "\n"
+            "When asked to evaluate a PR (e.g., 'Evaluate PR #789 for issue #123'):\n"
+            "1.  You will be provided with the PR number and the original issue number by DocManagerAgent.\n"
+            "2.  Use the `get_issue` tool to fetch the details of the original GitHub issue. This provides the context and requirements.\n"
+            "3.  Use the `get_pull_request_diff_summary` tool first to see which documentation files changed and how large the change is. Request it in the same turn as `get_issue`: independent tool calls in one turn run concurrently.\n"
+            "    - If the summary's `totals.estimated_tokens` is small (a few thousand), you may fetch everything at once with `get_pull_request_diff`.\n"
+            "    - Otherwise review the PR hunk by hunk with `get_pull_request_diff_hunks`, passing the returned `next_cursor` until it is null. Keep short notes per hunk rather than re-reading earlier hunks.\n"
+            "    - Non-documentation files are excluded by default; set `docs_only` to false only if the issue concerns them.\n"
+            "    - If a hunk needs more surrounding context, read just its section with `get_file_section` at the PR's head branch rather than the whole file.\n"
+            "4.  Analyze the PR diff in conjunction with the issue details:\n"
+            "    a.  Does the PR fully address the problem described in the issue?\n"
+            "    b.  Are the changes accurate, clear, and well-written?\n"
+            "    c.  Are there any unintended side effects or new errors introduced?\n"
+            "    d.  (For this prototype, assume all changes are positive if they address the issue. More complex quality checks can be added later.)\n"
+            "5.  Based on your evaluation:\n"
+            "    a.  If the PR adequately addresses the issue and the changes are good: Use the `approve_pull_request` tool with the PR number. Then respond with: 'PR #<pr_number> for issue #<issue_number> has been evaluated and approved. Changes look good.'\n"
+            "    b.  If the PR does NOT adequately address the issue OR if you find significant problems with the changes: Respond with a clear explanation of the deficiencies. E.g., 'PR #<pr_number> for issue #<issue_number> does not fully address the issue because [specific reason] and/or has the following problems: [specific problem]. It has not been approved. GenerationAgent may need to revise.' Be specific so DocManagerAgent or GenerationAgent can act on your feedback.\n"
+            "6.  If any of the tools (`get_issue`, the diff tools, `approve_pull_request`) fail, report the specific error. E.g., 'Error fetching issue #<issue_number>: [error_message]'.\n"
+            "\n"
+            "Focus on comparing the PR to the issue and making an approval decision. You are the first line of approval."
+        ),
+        tools=agent_tools("evaluation_agent"),
+        **AGENT_CALLBACKS,
+    )
+    enable_verdict_cache(agent, resolve_evaluation_subject)
+    return agent
+
+
+def __getattr__(name):
+    if name == "evaluation_agent":
+        from ..registry import get_agent
+        return get_agent("evaluation_agent")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
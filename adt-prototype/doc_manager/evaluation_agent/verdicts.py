@@ -0,0 +1,37 @@
+import re
+from github_tools.github_tool import approve_pull_request, get_issue, pull_request_fingerprint
+from verdict_cache import VerdictSubject, content_hash
+
+_REQUEST_RE = re.compile(r"PR #(\d+) for issue #(\d+)")
+APPROVED_PHRASE = "has been evaluated and approved"
+REJECTED_PHRASE = "has not been approved"
+
+
+def resolve_evaluation_subject(request_text: str) -> VerdictSubject | None:
+    """Keys an 'Evaluate PR #<n> for issue #<m>' request by the issue's title and body and the PR's complete diff."""
+    match = _REQUEST_RE.search(request_text)
+    if not match:
+        return None
+    pr_number, issue_number = int(match.group(1)), int(match.group(2))
+    response = get_issue(issue_number)
+    if response["status"] != "success":
+        return None
+    issue = response["issue"]
+
+    def replay_approval(verdict: str) -> bool:
+        # A stored approval may belong to an earlier PR with the same diff; make sure this one is approved too.
+        if APPROVED_PHRASE not in verdict:
+            return True
+        response = approve_pull_request(pr_number)
+        if response["status"] != "success":
+            print(f"Could not replay the cached approval of PR #{pr_number}: {response.get('error_message')}")
+            return False
+        return True
+
+    return VerdictSubject(
+        issue_hash=content_hash([issue["title"], issue["body"] or ""]),
+        content_hash=pull_request_fingerprint(pr_number),
+        identifiers={"PR #<pr_number>": f"PR #{pr_number}", "issue #<issue_number>": f"issue #{issue_number}"},
+        should_store=lambda text: APPROVED_PHRASE in text or REJECTED_PHRASE in text,
+        on_hit=replay_approval,
+    )
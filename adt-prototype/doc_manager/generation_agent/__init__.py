@@ -1,3 +1,8 @@
-from .agent import generation_agent
+def __getattr__(name):
+    if name == "generation_agent":
+        from .agent import generation_agent
+        return generation_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["generation_agent"]
@@ -1,3 +1,8 @@
-from .agent import qa_agent
+def __getattr__(name):
+    if name == "qa_agent":
+        from .agent import qa_agent
+        return qa_agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ["qa_agent"]
@@ -0,0 +1,134 @@
+"""Incremental QA: audit only documentation files that changed since the last run.
+
+The state file records, per repository, the last audited commit and the blob SHA
+(a content hash) of every documentation file at the time it was audited. A run
+lists the tree once, compares blob SHAs, and queues only new or changed files.
+Updates hold a file lock, so concurrent runs and agents do not lose each other's marks.
+
+Scheduled job usage (from the adt-prototype directory):
+
+    python -m doc_manager.qa_agent.incremental --ref main --prefix docs
+"""
+import argparse
+import json
+from datetime import datetime, timezone
+from config_utils import config
+from state_utils import load_json_state, locked_state, save_json_state
+from telemetry import instrument_tool
+from github_tools.github_client import get_default_repository, get_repo
+from github_tools.github_tool import _error_response, get_files_content, list_tree_entries, resolve_commit_sha
+from github_tools.scheduler import scheduled
+from .lint import DOC_EXTENSIONS, lint_files
+
+QA_INCREMENTAL_SETTINGS = config.get("qa_incremental", {})
+DEFAULT_PATH_PREFIX = QA_INCREMENTAL_SETTINGS.get("path_prefix", "")
+QA_STATE_FILE = "qa_state.json"
+
+
+def _load_repository_state() -> tuple[dict, dict]:
+    state = load_json_state(QA_STATE_FILE, {})
+    return state, state.setdefault(get_default_repository(), {"files": {}, "pending": {}})
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+def get_changed_doc_files(ref: str = "main", path_prefix: str = "") -> dict:
+    """Lists documentation files that are new or changed since they were last audited.
+
+    Call `mark_files_audited` with the paths once they have been QA'd so the next run skips them.
+    """
+    if not get_repo():
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    prefix = path_prefix or DEFAULT_PATH_PREFIX
+    try:
+        commit_sha = resolve_commit_sha(ref)
+        entries = [entry for entry in list_tree_entries(commit_sha, prefix) if entry["path"].lower().endswith(DOC_EXTENSIONS)]
+        current_paths = {entry["path"] for entry in entries}
+        root = prefix.strip("/")
+
+        def gone(path):
+            # Under the listed prefix but no longer in the tree.
+            return path not in current_paths and (not root or path == root or path.startswith(root + "/"))
+
+        with locked_state(QA_STATE_FILE):
+            state, repository_state = _load_repository_state()
+            audited = repository_state["files"]
+            changed = [entry for entry in entries if audited.get(entry["path"], {}).get("blob_sha") != entry["sha"]]
+            removed = [path for path in audited if gone(path)]
+            for path in removed:
+                del audited[path]
+            # Merged, not replaced: files still pending under other prefixes stay queued.
+            pending = repository_state.setdefault("pending", {})
+            for path in [path for path in pending if gone(path)]:
+                del pending[path]
+            pending.update({entry["path"]: {"blob_sha": entry["sha"], "commit": commit_sha} for entry in changed})
+            save_json_state(QA_STATE_FILE, state)
+        print(f"Incremental QA at {commit_sha[:12]}: {len(changed)} of {len(entries)} documentation file(s) need review.")
+        return {
+            "status": "success",
+            "commit_sha": commit_sha,
+            "last_audited_commit": repository_state.get("last_commit"),
+            "changed_files": [entry["path"] for entry in changed],
+            "removed_files": removed,
+            "unchanged_count": len(entries) - len(changed),
+        }
+    except Exception as e:
+        print(f"Error computing changed documentation files at ref '{ref}': {e}")
+        return _error_response(e)
+
+
+@instrument_tool
+def mark_files_audited(paths: list[str]) -> dict:
+    """Records files returned by `get_changed_doc_files` as audited at the commit they were listed at."""
+    with locked_state(QA_STATE_FILE):
+        state, repository_state = _load_repository_state()
+        pending = repository_state.get("pending", {})
+        marked = []
+        for path in paths:
+            record = pending.pop(path, None)
+            if record is None:
+                continue
+            record["audited_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            repository_state["files"][path] = record
+            repository_state["last_commit"] = record["commit"]
+            marked.append(path)
+        save_json_state(QA_STATE_FILE, state)
+    unknown = [path for path in paths if path not in marked]
+    return {"status": "success", "marked": marked, "not_pending": unknown, "still_pending": sorted(pending)}
+
+
+def run_incremental_qa(ref: str = "main", path_prefix: str = "") -> dict:
+    """Lints every changed documentation file and marks the clean ones as audited.
+
+    Flagged files stay pending so they are picked up again until someone reviews them.
+    """
+    changes = get_changed_doc_files(ref, path_prefix)
+    if changes["status"] != "success" or not changes["changed_files"]:
+        return changes
+    files_response = get_files_content(changes["changed_files"], ref=changes["commit_sha"])
+    known_paths = [entry["path"] for entry in list_tree_entries(changes["commit_sha"])]
+    report = lint_files(files_response["files"], known_paths=known_paths)
+
+    clean = [path for path, result in report.items() if not result["findings"]]
+    mark_files_audited(clean)
+    return {
+        "status": "success",
+        "commit_sha": changes["commit_sha"],
+        "checked": len(report),
+        "clean_files": clean,
+        "flagged_files": [{"path": path, **result} for path, result in report.items() if result["findings"]],
+        "errors": files_response["errors"],
+        "unchanged_count": changes["unchanged_count"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lint documentation files changed since the last incremental QA run.")
+    parser.add_argument("--ref", default=config.get("general", {}).get("github_base_branch", "main"))
+    parser.add_argument("--prefix", default=DEFAULT_PATH_PREFIX, help="Only consider files under this directory.")
+    args = parser.parse_args()
+    print(json.dumps(run_incremental_qa(args.ref, args.prefix), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from config_utils import config
+from markdown_utils import iter_lines_outside_fences, parse_headings, parse_sections, unclosed_fence_line
+
+QA_LINT_SETTINGS = config.get("qa_lint", {})
+MAX_WORKERS = QA_LINT_SETTINGS.get("max_workers", 0) or os.cpu_count() or 1
+# Below this many files the process pool costs more to start than it saves.
+PARALLEL_MIN_FILES = QA_LINT_SETTINGS.get("parallel_min_files", 8)
+MAX_SECTION_CHARS = QA_LINT_SETTINGS.get("max_section_chars", 4000)
+DOC_EXTENSIONS = tuple(QA_LINT_SETTINGS.get("doc_extensions", [".md", ".markdown", ".mdx"]))
+
+# Common English misspellings and their corrections. Extend per project with
+# qa_lint.dictionary_file (one "misspelling->correction" pair per line).
+MISSPELLINGS = {
+    "accomodate": "accommodate", "acheive": "achieve", "accross": "across", "adress": "address",
+    "agian": "again", "alot": "a lot", "apparant": "apparent", "arguement": "argument",
+    "asynchronus": "asynchronous", "availible": "available", "begining": "beginning",
+    "beleive": "believe", "calender": "calendar", "commited": "committed", "compatability": "compatibility",
+    "completly": "completely", "configuraton": "configuration", "definately": "definitely",
+    "dependancy": "dependency", "dependancies": "dependencies", "depricated": "deprecated",
+    "desciption": "description", "enviroment": "environment", "existance": "existence",
+    "explaination": "explanation", "fucntion": "function", "funtion": "function", "goverment": "government",
+    "guarentee": "guarantee", "immediatly": "immediately", "independant": "independent",
+    "intialize": "initialize", "instal": "install", "lenght": "length", "managment": "management",
+    "neccessary": "necessary", "necesary": "necessary", "occured": "occurred", "occurence": "occurrence",
+    "parameterss": "parameters", "paramter": "parameter", "paramters": "parameters", "persistant": "persistent",
+    "posible": "possible", "preceed": "precede", "prefered": "preferred", "recieve": "receive",
+    "recomend": "recommend", "refered": "referred", "reponse": "response", "repositary": "repository",
+    "reqest": "request", "requirment": "requirement", "retreive": "retrieve", "seperate": "separate",
+    "succesful": "successful", "successfull": "successful", "supress": "suppress", "teh": "the",
+    "thier": "their", "tommorow": "tomorrow", "trasnfer": "transfer", "truely": "truly",
+    "untill": "until", "usefull": "useful", "wich": "which", "writting": "writing",
+}
+
+_LINK_RE = re.compile(r"!?\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)")
+_INLINE_CODE_RE = re.compile(r"`[^`]*`")
+_URL_RE = re.compile(r"\b(?:https?|ftp)://\S+")
+_WORD_RE = re.compile(r"\b[A-Za-z]+\b")
+
+
+def _load_dictionary() -> dict:
+    dictionary = dict(MISSPELLINGS)
+    path = QA_LINT_SETTINGS.get("dictionary_file")
+    if not path:
+        return dictionary
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                if "->" in line and not line.lstrip().startswith("#"):
+                    wrong, right = line.split("->", 1)
+                    dictionary[wrong.strip().lower()] = right.strip()
+    except OSError as e:
+        print(f"WARNING: Could not read QA lint dictionary {path}: {e}")
+    return dictionary
+
+
+DICTIONARY = _load_dictionary()
+
+
+def _finding(rule: str, line: int, message: str) -> dict:
+    return {"rule": rule, "line": line, "message": message}
+
+
+def lint_document(path: str, content: str, known_paths: frozenset | None = None) -> dict:
+    """Runs every rule over one Markdown document.
+
+    Relative links are checked against `known_paths` (files and their parent
+    directories) when given. Links to anchors in other files cannot be resolved
+    here; they are returned in `external_anchors` for `lint_files` to check once
+    every document's anchors are known.
+    """
+    lines = content.splitlines(keepends=True)
+    findings = []
+
+    fence_line = unclosed_fence_line(lines)
+    if fence_line:
+        findings.append(_finding("code-fence", fence_line, "Code fence is opened here but never closed."))
+
+    headings = parse_headings(lines)
+    h1_lines = [number for number, level, _ in headings if level == 1]
+    for number in h1_lines[1:]:
+        findings.append(_finding("single-h1", number, f"Extra top-level heading; the first one is on line {h1_lines[0]}."))
+    previous_level = 0
+    for number, level, title in headings:
+        if not title:
+            findings.append(_finding("empty-heading", number, "Heading has no text."))
+        if previous_level and level > previous_level + 1:
+            findings.append(_finding("heading-increment", number,
+                                     f"Heading level jumps from H{previous_level} to H{level}; use H{previous_level + 1}."))
+        previous_level = level
+
+    anchors = {section.slug for section in parse_sections(content) if section.level}
+    external_anchors = []
+    directory = posixpath.dirname(path)
+    for number, line in iter_lines_outside_fences(lines):
+        prose = _INLINE_CODE_RE.sub("", line)
+        for match in _LINK_RE.finditer(prose):
+            target = match.group(1)
+            if re.match(r"^[a-z][a-z0-9+.-]*:", target, re.IGNORECASE):
+                continue
+            link_path, _, anchor = target.partition("#")
+            if not link_path:
+                if anchor and anchor.lower() not in anchors:
+                    findings.append(_finding("dead-anchor", number, f"Anchor '#{anchor}' does not match any heading in this file."))
+                continue
+            resolved = posixpath.normpath(posixpath.join(directory, link_path.split("?", 1)[0])).lstrip("/")
+            if link_path.startswith("/"):
+                resolved = posixpath.normpath(link_path).lstrip("/")
+            if known_paths is not None and resolved not in known_paths:
+                findings.append(_finding("dead-link", number, f"Relative link target '{link_path}' does not exist in the repository."))
+            elif anchor:
+                external_anchors.append({"line": number, "path": resolved, "anchor": anchor.lower(), "target": target})
+
+        for word in _WORD_RE.findall(_URL_RE.sub("", prose)):
+            correction = DICTIONARY.get(word.lower())
+            if correction:
+                findings.append(_finding("spelling", number, f"'{word}' should be '{correction}'."))
+
+    return {"path": path, "findings": findings, "anchors": sorted(anchors), "external_anchors": external_anchors}
+
+
+def _lint_task(args):
+    return lint_document(*args)
+
+
+def flagged_sections(content: str, findings: list) -> list[dict]:
+    """Returns the sections that contain findings, each cut at the next heading so only its own body is sent."""
+    lines = content.splitlines(keepends=True)
+    sections = {section.start_line: section for section in parse_sections(content)}
+    starts = sorted(sections) + [len(lines) + 1]
+    selected = {}
+    for finding in findings:
+        index = max((i for i, start in enumerate(starts[:-1]) if start <= finding["line"]), default=None)
+        start, end = (starts[index], starts[index + 1]) if index is not None else (1, starts[0])
+        if start not in selected:
+            text = "".join(lines[start - 1:end - 1])
+            if len(text) > MAX_SECTION_CHARS:
+                text = text[:MAX_SECTION_CHARS] + "\n... [section truncated]\n"
+            section = sections.get(start)
+            selected[start] = {"heading": section.title if section else "", "start_line": start,
+                               "end_line": end - 1, "text": text, "findings": []}
+        selected[start]["findings"].append(finding)
+    return [selected[start] for start in sorted(selected)]
+
+
+def lint_files(files: dict, known_paths=None, max_workers: int = MAX_WORKERS) -> dict:
+    """Lints many documents, in a process pool when there are enough of them.
+
+    `files` maps path to content. Returns per-path results with findings and the
+    flagged sections (not whole files) ready to hand to the model.
+    """
+    known = None
+    if known_paths is not None:
+        # Links may point at directories too, so every parent directory counts as a known path.
+        known = set(known_paths)
+        for known_path in known_paths:
+            parent = posixpath.dirname(known_path)
+            while parent and parent not in known:
+                known.add(parent)
+                parent = posixpath.dirname(parent)
+        known = frozenset(known)
+    tasks = [(path, content, known) for path, content in files.items() if path.lower().endswith(DOC_EXTENSIONS)]
+    if len(tasks) >= PARALLEL_MIN_FILES and max_workers > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_lint_task, tasks, chunksize=max(1, len(tasks) // (max_workers * 4))))
+    else:
+        results = [lint_document(*task) for task in tasks]
+
+    anchors_by_path = {result["path"]: set(result["anchors"]) for result in results}
+    report = {}
+    for result in results:
+        findings = result["findings"]
+        for reference in result["external_anchors"]:
+            target_anchors = anchors_by_path.get(reference["path"])
+            if target_anchors is not None and reference["anchor"] not in target_anchors:
+                findings.append(_finding("dead-anchor", reference["line"],
+                                         f"Anchor in '{reference['target']}' does not match any heading in {reference['path']}."))
+        findings.sort(key=lambda finding: finding["line"])
+        report[result["path"]] = {
+            "findings": findings,
+            "sections": flagged_sections(files[result["path"]], findings) if findings else [],
+        }
+    return report
@@ -0,0 +1,44 @@
+from github_tools.github_tool import get_files_content, list_repository_tree
+from telemetry import instrument_tool
+from .incremental import get_changed_doc_files, mark_files_audited
+from .lint import lint_files
+
+
+@instrument_tool
+def lint_docs(paths: list[str], ref: str = "main") -> dict:
+    """Runs the deterministic lint pass (structure, heading hierarchy, dead links and anchors, spelling, code fences) over documentation files.
+
+    Returns only the findings and the sections that contain them, so clean files
+    never need to be read in full.
+    """
+    files_response = get_files_content(paths, ref=ref)
+    if files_response["status"] != "success":
+        return files_response
+    tree_response = list_repository_tree(ref=ref)
+    known_paths = [entry["path"] for entry in tree_response["files"]] if tree_response["status"] == "success" else None
+
+    try:
+        report = lint_files(files_response["files"], known_paths=known_paths)
+    except Exception as e:
+        print(f"Error linting files at ref '{ref}': {e}")
+        return {"status": "error", "error_message": str(e)}
+
+    flagged = [{"path": path, **result} for path, result in report.items() if result["findings"]]
+    clean_files = [path for path, result in report.items() if not result["findings"]]
+    skipped = [path for path in files_response["files"] if path not in report]
+    print(f"Linted {len(report)} file(s) at ref '{ref}': {len(flagged)} flagged, {len(clean_files)} clean.")
+    return {
+        "status": "success",
+        "flagged_files": flagged,
+        "clean_files": clean_files,
+        "skipped_non_markdown": skipped,
+        "errors": files_response["errors"],
+        "links_checked": known_paths is not None,
+    }
+
+
+QA_TOOLS = [
+    lint_docs,
+    get_changed_doc_files,
+    mark_files_audited,
+]
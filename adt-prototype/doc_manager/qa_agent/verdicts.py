@@ -0,0 +1,42 @@
+import re
+from config_utils import config
+from github_tools.github_tool import get_issue, list_tree_entries
+from verdict_cache import VerdictSubject, content_hash
+from .lint import DOC_EXTENSIONS
+
+GITHUB_BASE_BRANCH = config.get("general", {}).get("github_base_branch", "main")
+
+_PATH_RE = re.compile(r"[\w./-]+(?:" + "|".join(re.escape(extension) for extension in DOC_EXTENSIONS) + r")\b")
+_REF_RE = re.compile(r"\b(?:at|on) (?:ref|branch) '?([\w./-]+?)'?(?:[\s.,]|$)")
+_CREATED_ISSUE_RE = re.compile(r"Successfully created issue #(\d+)")
+
+
+def _reported_issue_is_open(verdict: str) -> bool:
+    """A cached 'created issue #N' verdict only stands while #N is open; once it is closed, the files are audited again."""
+    match = _CREATED_ISSUE_RE.search(verdict)
+    if not match:
+        return True
+    response = get_issue(int(match.group(1)))
+    return response["status"] == "success" and response["issue"]["state"] == "open"
+
+
+def resolve_qa_subject(request_text: str) -> VerdictSubject | None:
+    """Keys a request to QA specific documentation files by those files' blob SHAs.
+
+    Requests that name no files (e.g. 'QA everything that changed') are not cached;
+    the incremental audit state already skips unchanged files there.
+    """
+    paths = sorted(set(_PATH_RE.findall(request_text)))
+    if not paths:
+        return None
+    ref_match = _REF_RE.search(request_text)
+    ref = ref_match.group(1) if ref_match else GITHUB_BASE_BRANCH
+    blobs = {entry["path"]: entry["sha"] for entry in list_tree_entries(ref)}
+    if any(path not in blobs for path in paths):
+        return None
+    return VerdictSubject(
+        issue_hash="",
+        content_hash=content_hash([[path, blobs[path]] for path in paths]),
+        should_store=lambda text: "Successfully created issue" in text or "No issues found" in text,
+        on_hit=_reported_issue_is_open,
+    )
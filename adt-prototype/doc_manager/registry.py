@@ -0,0 +1,189 @@
+"""Config-driven agent registry: each agent's model and tool subset, and lazy construction.
+
+Agents are built on first use rather than at import, so short-lived jobs that only
+need a helper module (e.g. the incremental QA lint) never import ADK or build agents.
+Each agent gets only its default tools below, or the list under `[agents.<name>].tools`
+in config.toml, which replaces them. With `[async_tools].enabled`, the read tools are
+registered as their coroutine variants, which ADK awaits without blocking its event loop.
+Every other blocking tool is registered wrapped to run on a worker thread.
+
+Report import and agent build times from the adt-prototype directory:
+
+    python -m doc_manager.registry
+"""
+import argparse
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from config_utils import config
+from telemetry import emit, metrics
+
+DEFAULT_MODEL = "gemini-2.5-pro-preview-05-06"
+
+# Modules whose tool lists make up the registry, imported only when an agent is built.
+TOOL_COLLECTIONS = {
+    "github_tools.github_tool": "GITHUB_TOOLS",
+    "github_tools.docs_index": "DOCS_TOOLS",
+    "doc_manager.qa_agent.tools": "QA_TOOLS",
+    "github_tools.async_tools": "FETCH_TOOLS",
+}
+
+# Coroutine variants registered over the blocking tools of the same name.
+ASYNC_TOOLS_ENABLED = config.get("async_tools", {}).get("enabled", True)
+ASYNC_TOOL_COLLECTIONS = {
+    "github_tools.async_tools": "ASYNC_GITHUB_TOOLS",
+}
+
+DEFAULT_AGENT_TOOLS = {
+    "doc_manager_agent": [
+        "get_open_issues", "get_issue", "get_file_content", "get_files_content", "list_repository_tree",
+        "get_diff_between_refs", "search_docs", "get_file_section", "fetch_many",
+    ],
+    "qa_agent": [
+        "lint_docs", "get_changed_doc_files", "mark_files_audited", "get_file_content", "get_files_content",
+        "list_repository_tree", "search_docs", "get_file_section", "create_github_issue",
+    ],
+    "generation_agent": [
+        "get_issue", "get_file_content", "get_files_content", "list_repository_tree", "search_docs", "get_file_section",
+        "commit_file_edits", "create_branch_and_commit_file", "commit_multiple_files", "create_pull_request",
+    ],
+    "evaluation_agent": [
+        "get_issue", "get_pull_request_diff_summary", "get_pull_request_diff_hunks", "get_pull_request_diff",
+        "get_file_section", "get_file_content", "approve_pull_request",
+    ],
+}
+
+# Agent name -> "module:builder".
+AGENT_BUILDERS = {
+    "qa_agent": "doc_manager.qa_agent.agent:build_qa_agent",
+    "generation_agent": "doc_manager.generation_agent.agent:build_generation_agent",
+    "evaluation_agent": "doc_manager.evaluation_agent.agent:build_evaluation_agent",
+    "doc_manager_agent": "doc_manager.agent:build_doc_manager_agent",
+}
+
+_tools: dict | None = None
+_agents: dict = {}
+_build_seconds: dict = {}
+_lock = threading.RLock()
+
+
+def _agent_settings(name: str) -> dict:
+    return config.get("agents", {}).get(name, {})
+
+
+def agent_model(name: str) -> str:
+    """The agent's model: `[agents.<name>].model`, else `[models].<name>`, else the default."""
+    return _agent_settings(name).get("model") or config.get("models", {}).get(name, DEFAULT_MODEL)
+
+
+def agent_tool_names(name: str) -> list[str]:
+    """The tool names configured for an agent under `[agents.<name>].tools`, else its defaults."""
+    return list(_agent_settings(name).get("tools", DEFAULT_AGENT_TOOLS.get(name, [])))
+
+
+def get_tool_registry() -> dict:
+    """Returns every registered tool by name, importing the tool modules on first use."""
+    global _tools
+    with _lock:
+        if _tools is None:
+            tools = {}
+            collections = list(TOOL_COLLECTIONS.items())
+            if ASYNC_TOOLS_ENABLED:
+                collections += ASYNC_TOOL_COLLECTIONS.items()
+            for module_name, attribute in collections:
+                for tool in getattr(importlib.import_module(module_name), attribute):
+                    tools[tool.__name__] = tool
+            # ADK calls blocking tools on its event loop's thread, where their HTTP calls, PyGithub's request
+            # pacing and the scheduler's waits would stall every other session. Run them on worker threads.
+            from github_tools.async_tools import _in_worker_thread
+            _tools = {name: tool if inspect.iscoroutinefunction(tool) else _in_worker_thread(tool) for name, tool in tools.items()}
+        return _tools
+
+
+def agent_tools(name: str) -> list:
+    """Resolves an agent's configured tool names to the tool functions."""
+    registry = get_tool_registry()
+    names = agent_tool_names(name)
+    unknown = [tool for tool in names if tool not in registry]
+    if unknown:
+        raise ValueError(f"Unknown tool(s) {unknown} configured for {name}. Known tools: {sorted(registry)}.")
+    return [registry[tool] for tool in names]
+
+
+def get_agent(name: str):
+    """Returns the named agent, building it (and, for the root agent, its sub-agents) on first use."""
+    with _lock:
+        if name not in _agents:
+            if name not in AGENT_BUILDERS:
+                raise ValueError(f"Unknown agent '{name}'. Known agents: {sorted(AGENT_BUILDERS)}.")
+            module_name, builder = AGENT_BUILDERS[name].split(":")
+            started = time.perf_counter()
+            agent = getattr(importlib.import_module(module_name), builder)()
+            # Includes the first import of ADK and the tool modules for whichever agent is built first.
+            elapsed = time.perf_counter() - started
+            _agents[name] = agent
+            _build_seconds[name] = elapsed
+            metrics.observe("adt_agent_build_seconds", elapsed, help_text="Time to construct an agent on first use.", agent=name)
+            emit("agent_built", agent=name, model=agent_model(name), tools=len(agent.tools), duration_ms=round(elapsed * 1000, 1))
+        return _agents[name]
+
+
+def _cold_import_seconds(module: str) -> float | None:
+    """Imports `module` in a fresh interpreter and returns how long the import took."""
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run([sys.executable, "-c", code], cwd=package_dir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+
+def _schema_chars(tool) -> int:
+    """Rough size of a tool's declaration as sent to the model: its name, signature and docstring."""
+    return len(tool.__name__) + len(str(inspect.signature(tool))) + len(inspect.getdoc(tool) or "")
+
+
+def startup_report(modules: tuple = ("config_utils", "telemetry", "github_tools", "doc_manager", "doc_manager.batch_runner")) -> dict:
+    """Measures cold import time of key modules and build time of every agent, and lists each agent's tools."""
+    imports = {module: _cold_import_seconds(module) for module in modules}
+    agents = {}
+    for name in AGENT_BUILDERS:
+        agent = get_agent(name)
+        agents[name] = {
+            "model": agent_model(name),
+            "build_seconds": round(_build_seconds[name], 4),
+            "tools": [tool.__name__ for tool in agent.tools],
+            "tool_schema_chars": sum(_schema_chars(tool) for tool in agent.tools),
+        }
+    return {
+        "cold_import_seconds": {module: round(seconds, 4) if seconds is not None else None for module, seconds in imports.items()},
+        "agents": agents,
+        "registered_tools": len(get_tool_registry()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report import and agent construction times and each agent's tools.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    report = startup_report()
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print("Cold import (fresh interpreter):")
+    for module, seconds in report["cold_import_seconds"].items():
+        print(f"  {module:<28} {'failed' if seconds is None else f'{seconds * 1000:8.1f} ms'}")
+    print("Agents (built in order; the first build includes importing ADK and the tools):")
+    for name, entry in report["agents"].items():
+        print(f"  {name:<20} {entry['build_seconds'] * 1000:8.1f} ms  {len(entry['tools']):>2} of {report['registered_tools']} tools"
+              f"  ~{entry['tool_schema_chars'] // 4} schema tokens  {entry['model']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""Event-driven intake: a GitHub webhook receiver feeding a durable work queue drained by the agents.
+
+The receiver verifies each delivery's X-Hub-Signature-256, turns issue, pull_request and
+push events into deduplicated work items, and answers immediately; workers then drain
+the queue by calling the existing agents:
+
+    issues (opened, reopened, labeled)       -> GenerationAgent opens a PR for the issue
+    pull_request (opened, synchronize, ...)  -> EvaluationAgent reviews the PR for its issue
+    push to the base branch touching docs    -> incremental lint, then QAAgent on flagged files
+
+Run from the adt-prototype directory (set GITHUB_WEBHOOK_SECRET to the webhook's secret):
+
+    python -m doc_manager.webhooks serve
+    python -m doc_manager.webhooks replay recorded/*.json --drain
+    python -m doc_manager.webhooks status
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from google.adk.runners import InMemoryRunner
+from config_utils import config
+from telemetry import emit, metrics, start_metrics_server, trace
+from work_queue import LEASE_LOST, get_work_queue
+from github_tools.github_client import get_default_repository
+from github_tools.github_tool import get_issue, warm_issue_index
+from .batch_runner import APP_NAME, ISSUE_TIMEOUT_SECONDS, BatchRunner, _run_agent
+from .qa_agent.incremental import DEFAULT_PATH_PREFIX, mark_files_audited, run_incremental_qa
+from .qa_agent.lint import DOC_EXTENSIONS
+from .registry import get_agent
+
+WEBHOOK_SETTINGS = config.get("webhooks", {})
+HOST = WEBHOOK_SETTINGS.get("host", "127.0.0.1")
+PORT = WEBHOOK_SETTINGS.get("port", 8787)
+PATH = WEBHOOK_SETTINGS.get("path", "/webhook")
+MAX_BODY_BYTES = WEBHOOK_SETTINGS.get("max_body_bytes", 5 * 1024 * 1024)
+WORKERS = WEBHOOK_SETTINGS.get("workers", 2)
+POLL_INTERVAL_SECONDS = WEBHOOK_SETTINGS.get("poll_interval_seconds", 1)
+ISSUE_LABELS = WEBHOOK_SETTINGS.get("issue_labels", [])
+ALLOW_UNSIGNED = WEBHOOK_SETTINGS.get("allow_unsigned", False)
+RECORD_DIR = WEBHOOK_SETTINGS.get("record_dir", "")
+GITHUB_BASE_BRANCH = config.get("general", {}).get("github_base_branch", "main")
+
+SECRET_ENV_VAR = "GITHUB_WEBHOOK_SECRET"
+
+ISSUE_ACTIONS = ("opened", "reopened", "labeled")
+PULL_REQUEST_ACTIONS = ("opened", "reopened", "synchronize", "ready_for_review")
+
+_LINKED_ISSUE_RE = re.compile(r"\b(?:issue|closes|fixes|resolves)\s+#(\d+)", re.IGNORECASE)
+_BRANCH_ISSUE_RE = re.compile(r"^(\d+)-")
+_QA_DONE_PHRASES = ("Successfully created issue", "No issues found", "already tracked")
+
+
+# --- Signatures ---
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """Returns the X-Hub-Signature-256 header value GitHub sends for `body`."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature_header: str | None) -> bool:
+    """Checks an X-Hub-Signature-256 header in constant time."""
+    if not signature_header or not signature_header.startswith("sha256="):
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature_header)
+
+
+# --- Events to work items ---
+
+def _linked_issue_number(pull_request: dict) -> int | None:
+    """The issue a PR addresses: from 'issue #N' / 'Fixes #N' in its body, else the '<N>-title' branch name."""
+    match = _LINKED_ISSUE_RE.search(pull_request.get("body") or "")
+    if match:
+        return int(match.group(1))
+    match = _BRANCH_ISSUE_RE.match(pull_request.get("head", {}).get("ref", ""))
+    return int(match.group(1)) if match else None
+
+
+def _touches_docs(push: dict) -> bool:
+    commits = push.get("commits") or []
+    if not commits or len(commits) >= 20:
+        # GitHub lists at most 20 commits per push; without the full list, assume docs may have changed.
+        return True
+    prefix = DEFAULT_PATH_PREFIX.strip("/")
+    for commit in commits:
+        for path in commit.get("added", []) + commit.get("modified", []) + commit.get("removed", []):
+            if path.lower().endswith(DOC_EXTENSIONS) and (not prefix or path.startswith(prefix + "/")):
+                return True
+    return False
+
+
+def work_items_for_event(event: str, payload: dict, base_branch: str = GITHUB_BASE_BRANCH) -> tuple[list[dict], str]:
+    """Maps a webhook event to work items. Returns (items, reason) where reason explains an empty list.
+
+    Each item has kind, dedup_key, coalesce_key and payload (see WorkQueue.enqueue).
+    """
+    repository = (payload.get("repository") or {}).get("full_name")
+    expected = get_default_repository()
+    if expected and repository and repository.lower() != expected.lower():
+        return [], f"event for another repository ({repository})"
+
+    if event == "issues":
+        issue = payload.get("issue") or {}
+        action = payload.get("action")
+        if action not in ISSUE_ACTIONS or issue.get("state") != "open" or "pull_request" in issue:
+            return [], f"issue action '{action}' is not handled"
+        labels = {label["name"] for label in issue.get("labels", [])}
+        if ISSUE_LABELS and not labels.intersection(ISSUE_LABELS):
+            return [], "issue has none of the configured labels"
+        number = issue["number"]
+        # A reopened issue needs new work even though its earlier item is done. Redeliveries of
+        # the same reopen share `updated_at`, so they still deduplicate.
+        dedup_key = f"issue:{number}:reopened:{issue.get('updated_at', '')}" if action == "reopened" else f"issue:{number}"
+        return [{"kind": "issue", "dedup_key": dedup_key, "coalesce_key": f"issue:{number}",
+                 "payload": {"number": number, "title": issue.get("title", ""), "body": issue.get("body") or ""}}], ""
+
+    if event == "pull_request":
+        pull_request = payload.get("pull_request") or {}
+        action = payload.get("action")
+        if action not in PULL_REQUEST_ACTIONS or pull_request.get("state") != "open" or pull_request.get("draft"):
+            return [], f"pull_request action '{action}' is not handled"
+        if pull_request.get("base", {}).get("ref") != base_branch:
+            return [], f"pull request does not target '{base_branch}'"
+        issue_number = _linked_issue_number(pull_request)
+        if issue_number is None:
+            return [], "pull request does not reference an issue"
+        number = pull_request["number"]
+        head_sha = pull_request.get("head", {}).get("sha", "")
+        return [{"kind": "evaluate_pr", "dedup_key": f"pr:{number}:{head_sha}", "coalesce_key": f"pr:{number}",
+                 "payload": {"pr_number": number, "issue_number": issue_number, "head_sha": head_sha}}], ""
+
+    if event == "push":
+        if payload.get("ref") != f"refs/heads/{base_branch}" or payload.get("deleted"):
+            return [], f"push is not to '{base_branch}'"
+        if not _touches_docs(payload):
+            return [], "push does not change documentation files"
+        after = payload.get("after", "")
+        return [{"kind": "qa", "dedup_key": f"qa:{base_branch}:{after}", "coalesce_key": f"qa:{base_branch}",
+                 "payload": {"ref": base_branch, "commit_sha": after}}], ""
+
+    return [], f"event '{event}' is not handled"
+
+
+def handle_delivery(event: str, payload: dict, delivery_id: str | None = None, queue=None) -> dict:
+    """Deduplicates a delivery and enqueues its work items. Shared by the HTTP receiver and replay."""
+    queue = queue or get_work_queue()
+    items, reason = work_items_for_event(event, payload)
+    outcomes = queue.enqueue_delivery(delivery_id, event, items)
+    if outcomes is None:
+        outcome = {"status": "success", "result": "duplicate_delivery", "items": []}
+    else:
+        enqueued = [{"kind": item["kind"], "dedup_key": item["dedup_key"], **result} for item, result in zip(items, outcomes)]
+        outcome = {"status": "success", "result": "enqueued" if enqueued else "ignored", "items": enqueued}
+        if reason:
+            outcome["reason"] = reason
+    metrics.inc("adt_webhook_deliveries_total", help_text="Webhook deliveries received.", event=event, result=outcome["result"])
+    emit("webhook", github_event=event, delivery_id=delivery_id, result=outcome["result"],
+         items=[f"{item['dedup_key']}={item['result']}" for item in outcome["items"]])
+    return outcome
+
+
+def _record(event: str, delivery_id: str | None, payload: dict) -> None:
+    os.makedirs(RECORD_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{event}-{delivery_id or uuid.uuid4().hex[:8]}.json"
+    with open(os.path.join(RECORD_DIR, name), 'w') as f:
+        json.dump({"event": event, "delivery_id": delivery_id, "payload": payload}, f, indent=2)
+
+
+# --- HTTP receiver ---
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    secret: str | None = None
+
+    def _respond(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if self.path.split("?")[0] != PATH:
+            self._respond(404, {"status": "error", "error_message": "Not found."})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._respond(413, {"status": "error", "error_message": "Payload too large."})
+            return
+        body = self.rfile.read(length)
+        if self.secret and not verify_signature(self.secret, body, self.headers.get("X-Hub-Signature-256")):
+            metrics.inc("adt_webhook_rejected_total", help_text="Webhook deliveries rejected.", reason="signature")
+            self._respond(401, {"status": "error", "error_message": "Invalid signature."})
+            return
+        event = self.headers.get("X-GitHub-Event")
+        if not event:
+            self._respond(400, {"status": "error", "error_message": "Missing X-GitHub-Event header."})
+            return
+        if event == "ping":
+            self._respond(200, {"status": "success", "result": "pong"})
+            return
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                payload = json.loads(urllib.parse.parse_qs(body.decode()).get("payload", ["{}"])[0])
+            else:
+                payload = json.loads(body)
+        except ValueError:
+            self._respond(400, {"status": "error", "error_message": "Body is not valid JSON."})
+            return
+        delivery_id = self.headers.get("X-GitHub-Delivery")
+        try:
+            if RECORD_DIR:
+                _record(event, delivery_id, payload)
+            outcome = handle_delivery(event, payload, delivery_id)
+        except Exception as e:
+            print(f"Error handling {event} delivery {delivery_id}: {e}")
+            self._respond(500, {"status": "error", "error_message": str(e)})
+            return
+        print(f"Webhook {event} ({delivery_id}): {outcome['result']}")
+        self._respond(202, outcome)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_webhook_server(host: str = HOST, port: int = PORT, secret: str | None = None) -> ThreadingHTTPServer:
+    """Starts the receiver on a daemon thread. Refuses to run unsigned unless webhooks.allow_unsigned is set."""
+    secret = secret or os.getenv(SECRET_ENV_VAR)
+    if not secret and not ALLOW_UNSIGNED:
+        raise RuntimeError(f"{SECRET_ENV_VAR} is not set. Set it to the webhook's secret (or webhooks.allow_unsigned = true for local testing).")
+    handler = type("WebhookHandler", (_WebhookHandler,), {"secret": secret})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="adt-webhooks", daemon=True).start()
+    print(f"Listening for GitHub webhooks on http://{host}:{server.server_address[1]}{PATH}")
+    return server
+
+
+# --- Workers ---
+
+class QueueWorker:
+    """Drains the work queue with a bounded pool of workers, each item in its own agent sessions."""
+
+    def __init__(self, concurrency: int = WORKERS, item_timeout_seconds: float = ISSUE_TIMEOUT_SECONDS, queue=None):
+        self.concurrency = concurrency
+        self.item_timeout_seconds = item_timeout_seconds
+        self.queue = queue or get_work_queue()
+        self.batch_runner = BatchRunner(max_concurrency=concurrency, issue_timeout_seconds=item_timeout_seconds)
+        self.qa_runner = InMemoryRunner(agent=get_agent("qa_agent"), app_name=APP_NAME)
+        self.worker_id = f"worker-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    async def _process_issue(self, payload: dict) -> dict:
+        # The delivery may be minutes old; skip issues closed since.
+        response = await asyncio.to_thread(get_issue, payload["number"])
+        if response["status"] != "success":
+            raise RuntimeError(response["error_message"])
+        issue = response["issue"]
+        if issue["state"] != "open":
+            return {"issue_number": issue["number"], "status": "skipped", "reason": "issue is closed"}
+        # The PR's own pull_request delivery queues its evaluation.
+        result = await self.batch_runner.run_issue(issue, evaluate=False)
+        if result["status"] in ("generation_failed", "claim_lost"):
+            # Fail the item so the queue retries it with backoff; the workflow checkpoint says where to resume.
+            raise RuntimeError(f"Issue #{issue['number']} was not processed ({result['status']}).")
+        # 'claimed_elsewhere': another worker is processing the issue, so this item has nothing to do.
+        return result
+
+    async def _evaluate_pull_request(self, payload: dict) -> dict:
+        result = await self.batch_runner.run_evaluation(payload["pr_number"], payload["issue_number"])
+        if result["status"] in ("claimed_elsewhere", "claim_lost"):
+            # The issue's generation may still be finishing; retry once its worker lets go.
+            raise RuntimeError(f"Issue #{payload['issue_number']} is held by another worker ({result['status']}).")
+        return {"pr_number": payload["pr_number"], "issue_number": payload["issue_number"], **result}
+
+    async def _run_qa(self, payload: dict) -> dict:
+        lint = await asyncio.to_thread(run_incremental_qa, payload["ref"])
+        if lint["status"] != "success":
+            raise RuntimeError(lint["error_message"])
+        reviewed = []
+        for flagged in lint.get("flagged_files", []):
+            path = flagged["path"]
+            text = await _run_agent(self.qa_runner, f"QA file {path} at ref '{lint['commit_sha']}'.")
+            if any(phrase in text for phrase in _QA_DONE_PHRASES):
+                reviewed.append(path)
+            print(f"QA of {path}: {text[:200]}")
+        if reviewed:
+            await asyncio.to_thread(mark_files_audited, reviewed)
+        return {"status": "success", "commit_sha": lint.get("commit_sha"), "clean_files": lint.get("clean_files", []),
+                "reviewed_files": reviewed,
+                "unreviewed_files": [entry["path"] for entry in lint.get("flagged_files", []) if entry["path"] not in reviewed]}
+
+    async def process(self, item: dict) -> dict:
+        handlers = {"issue": self._process_issue, "evaluate_pr": self._evaluate_pull_request, "qa": self._run_qa}
+        handler = handlers.get(item["kind"])
+        if handler is None:
+            raise ValueError(f"Unknown work item kind '{item['kind']}'.")
+        return await handler(item["payload"])
+
+    async def _worker(self, index: int, stop: asyncio.Event, until_empty: bool) -> None:
+        name = f"{self.worker_id}-{index}"
+        while not stop.is_set():
+            item = await asyncio.to_thread(self.queue.claim, name)
+            if item is None:
+                if until_empty:
+                    return
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            trace_id = f"{item['dedup_key'].replace(':', '-')}-{uuid.uuid4().hex[:8]}"
+            started = time.monotonic()
+            try:
+                with trace(trace_id):
+                    result = await asyncio.wait_for(self.process(item), timeout=self.item_timeout_seconds)
+                completed = await asyncio.to_thread(self.queue.complete, item["id"], name, result)
+                outcome = result.get("status", "done") if completed else LEASE_LOST
+            except Exception as e:
+                error = f"Timed out after {self.item_timeout_seconds}s." if isinstance(e, asyncio.TimeoutError) else str(e)
+                outcome = await asyncio.to_thread(self.queue.fail, item["id"], name, error)
+                print(f"Work item {item['dedup_key']} (attempt {item['attempt']}) failed: {error}")
+            elapsed = time.monotonic() - started
+            metrics.inc("adt_work_items_processed_total", help_text="Work items processed.", kind=item["kind"], outcome=outcome)
+            metrics.observe("adt_work_item_seconds", elapsed, help_text="Work item processing time.", kind=item["kind"])
+            emit("work_item", trace_id=trace_id, kind=item["kind"], key=item["dedup_key"], outcome=outcome,
+                 attempt=item["attempt"], elapsed_ms=round(elapsed * 1000, 1))
+            print(f"Work item {item['dedup_key']}: {outcome}")
+
+    async def run(self, until_empty: bool = False, stop: asyncio.Event | None = None) -> dict:
+        """Processes items until stopped, or with `until_empty` until no item is ready. Returns the queue stats."""
+        stop = stop or asyncio.Event()
+        await asyncio.gather(*(self._worker(index, stop, until_empty) for index in range(self.concurrency)))
+        return self.queue.stats()
+
+
+# --- Replay ---
+
+def load_recorded_deliveries(patterns: list[str], event: str | None = None) -> list[dict]:
+    """Loads deliveries saved by the receiver ({"event", "delivery_id", "payload"}) or raw payloads with `event`."""
+    deliveries = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if "payload" in data and "event" in data:
+                deliveries.append({"event": data["event"], "delivery_id": data.get("delivery_id"), "payload": data["payload"]})
+            elif event:
+                deliveries.append({"event": event, "delivery_id": None, "payload": data})
+            else:
+                raise ValueError(f"{path} is a raw payload; pass --event to replay it.")
+    return deliveries
+
+
+def post_delivery(url: str, delivery: dict, secret: str | None) -> dict:
+    """Sends a recorded delivery to a running receiver, signed like GitHub signs it."""
+    body = json.dumps(delivery["payload"]).encode()
+    headers = {"Content-Type": "application/json", "X-GitHub-Event": delivery["event"],
+               "X-GitHub-Delivery": delivery["delivery_id"] or str(uuid.uuid4())}
+    if secret:
+        headers["X-Hub-Signature-256"] = sign_payload(secret, body)
+    request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return {"status": "error", "http_status": e.code, "error_message": e.read().decode(errors="replace")}
+
+
+def _replay(args) -> None:
+    deliveries = load_recorded_deliveries(args.files, args.event)
+    secret = os.getenv(SECRET_ENV_VAR)
+    for delivery in deliveries:
+        if args.dry_run:
+            items, reason = work_items_for_event(delivery["event"], delivery["payload"])
+            outcome = {"items": [{"kind": item["kind"], "dedup_key": item["dedup_key"]} for item in items], "reason": reason}
+        elif args.post:
+            outcome = post_delivery(args.post, delivery, secret)
+        else:
+            outcome = handle_delivery(delivery["event"], delivery["payload"], delivery["delivery_id"])
+        print(json.dumps({"event": delivery["event"], "delivery_id": delivery["delivery_id"], **outcome}))
+    if args.drain and not args.dry_run and not args.post:
+        print(json.dumps(asyncio.run(QueueWorker(concurrency=args.workers).run(until_empty=True)), indent=2))
+
+
+def _serve(args) -> None:
+    start_metrics_server()
+    warm_issue_index()
+    server = start_webhook_server(args.host, args.port)
+    try:
+        asyncio.run(QueueWorker(concurrency=args.workers).run())
+    except KeyboardInterrupt:
+        print("Stopping webhook receiver.")
+    finally:
+        server.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Receive GitHub webhooks and process them through the documentation agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the webhook receiver and queue workers.")
+    serve.add_argument("--host", default=HOST)
+    serve.add_argument("--port", type=int, default=PORT)
+    serve.add_argument("--workers", type=int, default=WORKERS)
+
+    work = commands.add_parser("work", help="Drain the queue without receiving webhooks.")
+    work.add_argument("--workers", type=int, default=WORKERS)
+    work.add_argument("--until-empty", action="store_true", help="Exit once no item is ready instead of polling.")
+
+    replay = commands.add_parser("replay", help="Feed recorded webhook payloads into the queue.")
+    replay.add_argument("files", nargs="+", help="Recorded deliveries (files or glob patterns).")
+    replay.add_argument("--event", help="Event name for raw payload files (e.g. issues, pull_request, push).")
+    replay.add_argument("--dry-run", action="store_true", help="Only print the work items each delivery maps to.")
+    replay.add_argument("--post", metavar="URL", help="POST the deliveries to a running receiver instead.")
+    replay.add_argument("--drain", action="store_true", help="Process the queue until it is empty afterwards.")
+    replay.add_argument("--workers", type=int, default=WORKERS)
+
+    commands.add_parser("status", help="Show queue counts and recent failures.")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        _serve(args)
+    elif args.command == "work":
+        print(json.dumps(asyncio.run(QueueWorker(concurrency=args.workers).run(until_empty=args.until_empty)), indent=2))
+    elif args.command == "replay":
+        _replay(args)
+    else:
+        queue = get_work_queue()
+        print(json.dumps({"queue": queue.stats(), "recent_failures": queue.failed_items()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
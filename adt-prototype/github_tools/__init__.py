@@ -1 +1,5 @@
-from .github_tool import GITHUB_TOOLS, create_github_issue, get_issue, get_file_content, commit_changes, create_pull_request, approve_pull_request
+from .github_tool import GITHUB_TOOLS, create_github_issue, get_issue, get_file_content, get_files_content, list_repository_tree, get_diff_between_refs, commit_changes, commit_multiple_files, commit_file_edits, create_pull_request, approve_pull_request, get_pull_request_diff, get_pull_request_diff_summary, get_pull_request_diff_hunks, get_content_cache_stats, get_open_issues, iter_issues
+from .async_tools import ASYNC_GITHUB_TOOLS, FETCH_TOOLS, fetch_many
+from .docs_index import DOCS_TOOLS, get_docs_index, get_file_section, search_docs
+from .github_client import get_async_client, get_github, get_http_session, get_repo
+from .scheduler import get_scheduler_metrics
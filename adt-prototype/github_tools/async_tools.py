@@ -0,0 +1,292 @@
+import asyncio
+import base64
+import functools
+import re
+from urllib.parse import quote
+from config_utils import config
+from telemetry import instrument_tool
+from . import github_tool
+from .content_cache import is_commit_sha
+from .git_mirror import GitMirrorError, get_mirror
+from .github_client import get_async_client, get_default_repository, get_repo_api_url
+from .github_tool import BULK_READ_WORKERS, DIFF_MAX_TOKENS, _error_response, _read_from_mirror, content_cache
+from .scheduler import scheduled
+
+# --- Async GitHub Tools ---
+# Coroutine variants of the read tools on a keep-alive httpx client. ADK awaits them on
+# its event loop, so independent calls (several tools requested in one model turn, or the
+# batch runner's concurrent issues) overlap instead of queueing behind one blocking call.
+# They share the request scheduler, the content cache and the local mirror with the
+# blocking tools and keep their names, so the registry can register them in their place.
+
+ASYNC_TOOL_SETTINGS = config.get("async_tools", {})
+FETCH_MANY_MAX_ITEMS = ASYNC_TOOL_SETTINGS.get("fetch_many_max_items", 50)
+
+
+def _connected() -> bool:
+    if get_default_repository():
+        return True
+    print("Error connecting to GitHub: GITHUB_REPOSITORY environment variable not set (e.g., 'owner/repo_name').")
+    return False
+
+
+def _not_connected() -> dict:
+    return {"status": "error", "error_message": "Not connected to GitHub repository."}
+
+
+async def _fetch_file(path: str, ref: str) -> tuple[str, str]:
+    """Async counterpart of `github_tool._fetch_file`: (content, blob_sha) through the shared content cache."""
+    cached = content_cache.lookup(path, ref)
+    if cached and is_commit_sha(ref):
+        content_cache.record_hit()
+        return cached.content, cached.blob_sha
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    client = get_async_client()
+    response = await client.get(f"{get_repo_api_url()}/contents/{quote(path)}", params={"ref": ref}, headers=headers)
+    if response.status_code == 304 and cached:
+        content_cache.record_hit(revalidated=True)
+        return cached.content, cached.blob_sha
+    response.raise_for_status()
+
+    data = response.json()
+    if isinstance(data, list) or data.get("type") != "file":
+        raise IsADirectoryError(f"Path '{path}' is a directory, not a file.")
+    if data.get("encoding") == "base64":
+        content = base64.b64decode(data["content"]).decode()
+    else:
+        # Files over 1 MB come back without inline content; read them through the blob API instead.
+        blob = await client.get(f"{get_repo_api_url()}/git/blobs/{data['sha']}")
+        blob.raise_for_status()
+        content = base64.b64decode(blob.json()["content"]).decode()
+
+    content_cache.record_miss()
+    content_cache.store(path, ref, data["sha"], content, etag=response.headers.get("ETag"))
+    return content, data["sha"]
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+async def get_issue(issue_number: int) -> dict:
+    """Gets a specific GitHub issue."""
+    if not _connected():
+        return _not_connected()
+    try:
+        response = await get_async_client().get(f"{get_repo_api_url()}/issues/{issue_number}")
+        response.raise_for_status()
+        issue = response.json()
+        print(f"Retrieved issue #{issue['number']}: {issue['title']}")
+        return {"status": "success", "issue": {"title": issue["title"], "body": issue["body"], "state": issue["state"], "number": issue["number"]}}
+    except Exception as e:
+        print(f"Error getting issue {issue_number}: {e}")
+        return _error_response(e)
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+async def get_file_content(path: str, ref: str = "main") -> dict:
+    """Gets the content of a file from a specific branch or commit."""
+    if not _connected():
+        return _not_connected()
+    try:
+        content = await asyncio.to_thread(_read_from_mirror, path, ref)
+        if content is None:
+            content, _ = await _fetch_file(path, ref)
+        print(f"Read file content from '{path}' at ref '{ref}'.")
+        return {"status": "success", "content": content}
+    except IsADirectoryError as e:
+        return _error_response(e)
+    except Exception as e:
+        print(f"Error reading file '{path}' at ref '{ref}': {e}")
+        return _error_response(e)
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+async def get_files_content(paths: list[str], ref: str = "main") -> dict:
+    """Gets the contents of several files from a specific branch or commit in one call."""
+    if not _connected():
+        return _not_connected()
+    files = {}
+    errors = {}
+    mirror = get_mirror()
+    if mirror:
+        try:
+            for path, content in (await asyncio.to_thread(mirror.read_files, ref, paths)).items():
+                if content is None:
+                    errors[path] = f"File '{path}' not found at ref '{ref}'."
+                else:
+                    files[path] = content
+            print(f"Read {len(files)} file(s) at ref '{ref}' from the local mirror.")
+            return {"status": "success", "files": files, "errors": errors}
+        except GitMirrorError as e:
+            print(f"Local mirror could not serve ref '{ref}' ({e}). Falling back to the REST API.")
+
+    slots = asyncio.Semaphore(BULK_READ_WORKERS)
+
+    async def fetch(path):
+        async with slots:
+            try:
+                return path, (await _fetch_file(path, ref))[0], None
+            except Exception as e:
+                return path, None, str(e)
+
+    for path, content, error in await asyncio.gather(*(fetch(path) for path in paths)):
+        if error is None:
+            files[path] = content
+        else:
+            errors[path] = error
+    print(f"Read {len(files)} file(s) at ref '{ref}' ({len(errors)} failed).")
+    return {"status": "success", "files": files, "errors": errors}
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+async def get_diff_between_refs(base: str, head: str, path_prefix: str = "") -> dict:
+    """Gets the unified diff of the changes on `head` since it diverged from `base` (branches, tags or SHAs)."""
+    if not _connected():
+        return _not_connected()
+    try:
+        mirror = get_mirror()
+        if mirror:
+            try:
+                diff_content = await asyncio.to_thread(mirror.diff, base, head, path_prefix.strip("/"))
+                return {"status": "success", "diff_content": diff_content, "base": base, "head": head}
+            except GitMirrorError as e:
+                print(f"Local mirror could not diff '{base}...{head}' ({e}). Falling back to the REST API.")
+        response = await get_async_client().get(
+            f"{get_repo_api_url()}/compare/{quote(base, safe='')}...{quote(head, safe='')}",
+            headers={"Accept": "application/vnd.github.diff"},
+        )
+        response.raise_for_status()
+        diff_content = response.text
+        if path_prefix:
+            diff_content = "".join(
+                section for section in re.split(r"(?m)^(?=diff --git )", diff_content)
+                if section.startswith(f"diff --git a/{path_prefix.strip('/')}")
+            )
+        return {"status": "success", "diff_content": diff_content, "base": base, "head": head}
+    except Exception as e:
+        print(f"Error fetching diff '{base}...{head}': {e}")
+        return _error_response(e)
+
+
+@scheduled(idempotent=True)
+async def _fetch_pull_request_diff(pr_number: int, max_tokens: int) -> dict:
+    """Streams a pull request's diff and stops reading once `max_tokens` is spent."""
+    try:
+        max_chars = max_tokens * 4
+        chunks = []
+        size = 0
+        truncated = False
+        async with get_async_client().stream(
+            "GET", f"{get_repo_api_url()}/pulls/{pr_number}", headers={"Accept": "application/vnd.github.diff"},
+        ) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_chars:
+                    truncated = True
+                    break
+        diff_content = "".join(chunks)[:max_chars]
+
+        print(f"Successfully fetched diff for PR #{pr_number}{' (truncated)' if truncated else ''}.")
+        result = {"status": "success", "diff_content": diff_content, "pr_number": pr_number, "truncated": truncated}
+        if truncated:
+            result["note"] = (f"The diff exceeds {max_tokens} tokens and was cut off. Use get_pull_request_diff_summary "
+                              "and get_pull_request_diff_hunks to review it hunk by hunk.")
+        return result
+    except Exception as e:
+        print(f"Error fetching diff for PR #{pr_number}: {e}")
+        return _error_response(e)
+
+
+@instrument_tool
+async def get_pull_request_diff(pr_number: int) -> dict:
+    """Fetches the diff of a pull request, cut off at the configured token budget.
+
+    For large pull requests use `get_pull_request_diff_summary` and `get_pull_request_diff_hunks` instead.
+    """
+    if not _connected():
+        return _not_connected()
+    return await _fetch_pull_request_diff(pr_number, DIFF_MAX_TOKENS)
+
+
+def _in_worker_thread(tool):
+    """Coroutine variant of a blocking tool that runs it on a worker thread, so it does not stall the event loop.
+
+    Used for the tools built on PyGithub's paginated objects, which have no async client, and by the
+    registry for every other blocking tool.
+    """
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(tool, *args, **kwargs)
+    return wrapper
+
+
+list_repository_tree = _in_worker_thread(github_tool.list_repository_tree)
+get_pull_request_diff_summary = _in_worker_thread(github_tool.get_pull_request_diff_summary)
+get_pull_request_diff_hunks = _in_worker_thread(github_tool.get_pull_request_diff_hunks)
+
+
+async def _no_files() -> dict:
+    return {"status": "success", "files": {}, "errors": {}}
+
+
+@instrument_tool
+async def fetch_many(issue_numbers: list[int] | None = None, paths: list[str] | None = None, pr_numbers: list[int] | None = None,
+                     ref: str = "main") -> dict:
+    """Fetches several issues, files (at `ref`) and pull request diffs concurrently, in one call.
+
+    Use it to gather context in about one round trip instead of calling `get_issue`,
+    `get_file_content` and `get_pull_request_diff` one after another. The diff token budget
+    is shared by the requested pull requests. Items that fail are listed under `errors`.
+    """
+    if not _connected():
+        return _not_connected()
+    issue_numbers, paths, pr_numbers = issue_numbers or [], paths or [], pr_numbers or []
+    requested = len(issue_numbers) + len(paths) + len(pr_numbers)
+    if requested > FETCH_MANY_MAX_ITEMS:
+        return {"status": "error", "error_message": f"Requested {requested} items; fetch at most {FETCH_MANY_MAX_ITEMS} per call."}
+
+    diff_budget = DIFF_MAX_TOKENS // max(1, len(pr_numbers))
+    issue_results, file_result, diff_results = await asyncio.gather(
+        asyncio.gather(*(get_issue(number) for number in issue_numbers)),
+        get_files_content(list(paths), ref) if paths else _no_files(),
+        asyncio.gather(*(_fetch_pull_request_diff(number, diff_budget) for number in pr_numbers)),
+    )
+
+    issues, diffs, errors = {}, {}, {}
+    for number, result in zip(issue_numbers, issue_results):
+        if result["status"] == "success":
+            issues[str(number)] = result["issue"]
+        else:
+            errors[f"issue #{number}"] = result["error_message"]
+    if file_result["status"] != "success":
+        errors.update({path: file_result["error_message"] for path in paths})
+    errors.update(file_result.get("errors", {}))
+    for number, result in zip(pr_numbers, diff_results):
+        if result["status"] == "success":
+            diffs[str(number)] = {key: value for key, value in result.items() if key not in ("status", "pr_number")}
+        else:
+            errors[f"PR #{number}"] = result["error_message"]
+    print(f"Fetched {len(issues)} issue(s), {len(file_result.get('files', {}))} file(s) and {len(diffs)} diff(s) ({len(errors)} failed).")
+    return {"status": "success", "issues": issues, "files": file_result.get("files", {}), "diffs": diffs, "errors": errors}
+
+
+# Registered under the blocking tools' names when `async_tools.enabled` is on.
+ASYNC_GITHUB_TOOLS = [
+    get_issue,
+    get_file_content,
+    get_files_content,
+    list_repository_tree,
+    get_diff_between_refs,
+    get_pull_request_diff,
+    get_pull_request_diff_summary,
+    get_pull_request_diff_hunks,
+]
+
+FETCH_TOOLS = [fetch_many]
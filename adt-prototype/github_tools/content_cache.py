@@ -0,0 +1,145 @@
+import re
+import threading
+from collections import OrderedDict
+
+_COMMIT_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def is_commit_sha(ref: str) -> bool:
+    """Returns True if the ref is a full commit SHA (and therefore immutable)."""
+    return bool(ref) and bool(_COMMIT_SHA_RE.match(ref))
+
+
+class CachedFile:
+    """A cached file body together with the validators needed to reuse it."""
+
+    __slots__ = ("path", "blob_sha", "content", "etag")
+
+    def __init__(self, path: str, blob_sha: str, content: str, etag: str | None):
+        self.path = path
+        self.blob_sha = blob_sha
+        self.content = content
+        self.etag = etag
+
+
+class ContentCache:
+    """Size-bounded LRU cache of file contents shared by all GitHub tools.
+
+    File bodies are stored once per (path, blob SHA). A separate index maps
+    (path, ref) to the ETag and blob SHA last seen for that ref, so a branch
+    read can be revalidated with If-None-Match instead of re-downloaded.
+    Reads pinned to a full commit SHA never need revalidation. `max_bytes`
+    bounds the UTF-8 size of the cached bodies.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (path, blob SHA) -> (content, size in bytes)
+        self._blobs: "OrderedDict[tuple[str, str], tuple[str, int]]" = OrderedDict()
+        self._refs: dict[tuple[str, str], tuple[str | None, str]] = {}
+        # (path, blob SHA) -> the (path, ref) keys pointing at it, so eviction need not scan `_refs`.
+        self._blob_refs: dict[tuple[str, str], set[tuple[str, str]]] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+
+    def lookup(self, path: str, ref: str) -> CachedFile | None:
+        """Returns the cached entry for (path, ref) without counting a hit or miss."""
+        with self._lock:
+            validators = self._refs.get((path, ref))
+            if validators is None:
+                return None
+            etag, blob_sha = validators
+            entry = self._blobs.get((path, blob_sha))
+            if entry is None:
+                # The body was evicted; the ref index entry is useless on its own.
+                self._unlink_ref((path, ref))
+                return None
+            self._blobs.move_to_end((path, blob_sha))
+            return CachedFile(path, blob_sha, entry[0], etag)
+
+    def store(self, path: str, ref: str, blob_sha: str, content: str, etag: str | None = None) -> None:
+        """Stores a file body and records which blob the ref currently points at."""
+        size = len(content.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            key = (path, blob_sha)
+            if key in self._blobs:
+                self._blobs.move_to_end(key)
+            else:
+                self._blobs[key] = (content, size)
+                self._bytes += size
+            self._unlink_ref((path, ref))
+            self._refs[(path, ref)] = (etag, blob_sha)
+            self._blob_refs.setdefault(key, set()).add((path, ref))
+            self._evict()
+
+    def record_hit(self, revalidated: bool = False) -> None:
+        with self._lock:
+            self.hits += 1
+            if revalidated:
+                self.revalidations += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def invalidate(self, path: str, ref: str | None = None) -> None:
+        """Forgets which blob a ref points at, for one ref or for every ref of the path."""
+        with self._lock:
+            if ref is not None:
+                removed = self._unlink_ref((path, ref))
+            else:
+                keys = [key for key in self._refs if key[0] == path]
+                for key in keys:
+                    self._unlink_ref(key)
+                removed = bool(keys)
+            if removed:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self._refs.clear()
+            self._blob_refs.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._blobs),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _unlink_ref(self, ref_key: tuple[str, str]) -> bool:
+        """Drops a (path, ref) entry from both indexes. Returns False if there was none. Caller holds the lock."""
+        validators = self._refs.pop(ref_key, None)
+        if validators is None:
+            return False
+        blob_key = (ref_key[0], validators[1])
+        refs = self._blob_refs.get(blob_key)
+        if refs is not None:
+            refs.discard(ref_key)
+            if not refs:
+                del self._blob_refs[blob_key]
+        return True
+
+    def _evict(self) -> None:
+        while self._blobs and (len(self._blobs) > self.max_entries or self._bytes > self.max_bytes):
+            blob_key, (_, size) = self._blobs.popitem(last=False)
+            self._bytes -= size
+            for ref_key in self._blob_refs.pop(blob_key, ()):
+                del self._refs[ref_key]
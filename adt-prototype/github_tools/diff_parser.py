@@ -0,0 +1,43 @@
+import re
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token) used for budgeting."""
+    return len(text) // 4 + 1
+
+
+def parse_hunks(patch: str) -> list[dict]:
+    """Splits the body of a single-file patch into hunks with their line ranges and stats."""
+    hunks = []
+    current = None
+    for line in patch.splitlines(keepends=True):
+        match = _HUNK_HEADER_RE.match(line)
+        if match:
+            current = {
+                "header": line.rstrip("\n"),
+                "old_start": int(match.group(1)),
+                "old_lines": int(match.group(2) or 1),
+                "new_start": int(match.group(3)),
+                "new_lines": int(match.group(4) or 1),
+                "additions": 0,
+                "deletions": 0,
+                "lines": [line],
+            }
+            hunks.append(current)
+        elif current is not None:
+            current["lines"].append(line)
+            if line.startswith("+"):
+                current["additions"] += 1
+            elif line.startswith("-"):
+                current["deletions"] += 1
+    for hunk in hunks:
+        hunk["text"] = "".join(hunk.pop("lines"))
+    return hunks
+
+
+def is_doc_path(path: str, extensions, prefixes) -> bool:
+    """Returns True for documentation files: a doc extension, or anything under a docs directory."""
+    lowered = path.lower()
+    return lowered.endswith(tuple(extensions)) or any(lowered.startswith(prefix) for prefix in prefixes)
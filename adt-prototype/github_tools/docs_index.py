@@ -0,0 +1,277 @@
+"""Heading-aware BM25 index over the repository's Markdown documentation.
+
+Every file is split into chunks at its headings; each chunk is a heading plus the
+text up to the next heading of any level. Chunks are ranked with BM25, with the
+heading, its parent headings and the file path weighted above body text. The index
+is persisted as a JSON state file and refreshed incrementally: when the ref moves,
+only files whose blob SHA changed are re-read.
+
+Prebuild or refresh it from the adt-prototype directory:
+
+    python -m github_tools.docs_index --ref main
+"""
+import argparse
+import math
+import re
+import threading
+import time
+from collections import Counter
+from config_utils import config
+from markdown_utils import match_sections, parse_headings, parse_sections
+from state_utils import load_json_state, save_json_state
+from telemetry import instrument_tool
+from .github_client import get_default_repository, get_repo
+from .github_tool import _error_response, get_file_content, get_files_content, list_tree_entries, resolve_commit_sha
+from .scheduler import scheduled
+
+DOCS_INDEX_SETTINGS = config.get("docs_index", {})
+DOC_EXTENSIONS = tuple(DOCS_INDEX_SETTINGS.get("doc_extensions", [".md", ".markdown", ".mdx"]))
+PATH_PREFIX = DOCS_INDEX_SETTINGS.get("path_prefix", "")
+REFRESH_INTERVAL_SECONDS = DOCS_INDEX_SETTINGS.get("refresh_interval_seconds", 60)
+FETCH_BATCH_SIZE = DOCS_INDEX_SETTINGS.get("fetch_batch_size", 50)
+MAX_RESULTS = DOCS_INDEX_SETTINGS.get("max_results", 5)
+SNIPPET_CHARS = DOCS_INDEX_SETTINGS.get("snippet_chars", 240)
+HEADING_WEIGHT = DOCS_INDEX_SETTINGS.get("heading_weight", 3)
+BM25_K1 = DOCS_INDEX_SETTINGS.get("k1", 1.2)
+BM25_B = DOCS_INDEX_SETTINGS.get("b", 0.75)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9_]*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have how i if in is it its of on or that the this to use "
+    "using was what when where which will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords, with a light plural fold ("files" -> "file")."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def chunk_document(path: str, content: str) -> list[dict]:
+    """Splits a Markdown file into per-heading chunks with term frequencies and a snippet."""
+    lines = content.splitlines(keepends=True)
+    slugs = {section.start_line: section.slug for section in parse_sections(content) if section.level}
+    headings = parse_headings(lines)
+    boundaries = [(1, 0, "")] if not headings or headings[0][0] > 1 else []
+    boundaries += headings
+    path_terms = tokenize(path.replace("/", " ").replace("-", " ").replace("_", " "))
+
+    chunks = []
+    trail: list = []
+    for index, (line, level, title) in enumerate(boundaries):
+        end = boundaries[index + 1][0] if index + 1 < len(boundaries) else len(lines) + 1
+        body = "".join(lines[line:end - 1] if level else lines[line - 1:end - 1])
+        if level:
+            trail = [entry for entry in trail if entry[0] < level] + [(level, title)]
+        elif not body.strip():
+            continue
+        breadcrumb = " > ".join(entry[1] for entry in trail) if level else ""
+        terms = Counter(tokenize(body))
+        for term in tokenize(breadcrumb) + path_terms:
+            terms[term] += HEADING_WEIGHT
+        chunks.append({
+            "anchor": slugs.get(line, ""),
+            "heading": title,
+            "level": level,
+            "breadcrumb": breadcrumb,
+            "start_line": line,
+            "end_line": end,
+            "snippet": " ".join(body.split())[:SNIPPET_CHARS],
+            "terms": dict(terms),
+            "length": sum(terms.values()),
+        })
+    return chunks
+
+
+class DocsIndex:
+    """BM25 over heading chunks of one ref's documentation, refreshed by blob SHA."""
+
+    def __init__(self, repository: str, ref: str):
+        self.repository = repository
+        self.ref = ref
+        self.state_file = f"docs_index-{repository.replace('/', '__')}-{re.sub(r'[^A-Za-z0-9_.-]', '_', ref)}.json"
+        self._lock = threading.Lock()
+        self._files: dict = {}
+        self._commit = None
+        self._last_refresh = 0.0
+        self._loaded = False
+        self._postings: dict = {}
+        self._chunks: list = []
+        self._average_length = 0.0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        state = load_json_state(self.state_file, {})
+        if state.get("settings") == self._settings():
+            self._files = state.get("files", {})
+            self._commit = state.get("commit")
+            self._rebuild_postings()
+
+    @staticmethod
+    def _settings() -> list:
+        return [list(DOC_EXTENSIONS), PATH_PREFIX, HEADING_WEIGHT, SNIPPET_CHARS]
+
+    def _rebuild_postings(self) -> None:
+        self._chunks = [(path, chunk) for path, entry in sorted(self._files.items()) for chunk in entry["chunks"]]
+        self._postings = {}
+        for chunk_id, (_, chunk) in enumerate(self._chunks):
+            for term, frequency in chunk["terms"].items():
+                self._postings.setdefault(term, []).append((chunk_id, frequency))
+        total = sum(chunk["length"] for _, chunk in self._chunks)
+        self._average_length = total / len(self._chunks) if self._chunks else 0.0
+
+    def refresh(self, force: bool = False) -> dict:
+        """Brings the index up to date with the ref, re-reading only files whose blob SHA changed."""
+        with self._lock:
+            self._load()
+            if not force and self._commit and time.monotonic() - self._last_refresh < REFRESH_INTERVAL_SECONDS:
+                return {"commit": self._commit, "changed": 0, "removed": 0}
+            commit = resolve_commit_sha(self.ref)
+            self._last_refresh = time.monotonic()
+            if commit == self._commit:
+                return {"commit": commit, "changed": 0, "removed": 0}
+
+            entries = {entry["path"]: entry["sha"] for entry in list_tree_entries(commit, PATH_PREFIX)
+                       if entry["path"].lower().endswith(DOC_EXTENSIONS)}
+            removed = [path for path in self._files if path not in entries]
+            for path in removed:
+                del self._files[path]
+            stale = [path for path, sha in entries.items() if self._files.get(path, {}).get("sha") != sha]
+            for start in range(0, len(stale), FETCH_BATCH_SIZE):
+                batch = stale[start:start + FETCH_BATCH_SIZE]
+                # Read at the commit SHA so the content matches the blob SHAs just listed.
+                response = get_files_content(batch, ref=commit)
+                if response["status"] != "success":
+                    raise RuntimeError(response["error_message"])
+                for path, content in response["files"].items():
+                    self._files[path] = {"sha": entries[path], "chunks": chunk_document(path, content)}
+                for path, error in response["errors"].items():
+                    print(f"WARNING: Could not index '{path}': {error}")
+
+            self._commit = commit
+            self._rebuild_postings()
+            save_json_state(self.state_file, {"repository": self.repository, "ref": self.ref, "commit": commit,
+                                              "settings": self._settings(), "files": self._files})
+            print(f"Docs index for '{self.ref}' at {commit[:12]}: {len(stale)} file(s) re-indexed, {len(removed)} removed, {len(self._chunks)} sections.")
+            return {"commit": commit, "changed": len(stale), "removed": len(removed)}
+
+    def search(self, query: str, path_prefix: str = "", max_results: int = MAX_RESULTS) -> list[dict]:
+        with self._lock:
+            chunk_count = len(self._chunks)
+            scores: dict = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (chunk_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings:
+                    length = self._chunks[chunk_id][1]["length"]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            prefix = path_prefix.strip("/")
+            ranked = sorted(((score, chunk_id) for chunk_id, score in scores.items()
+                             if not prefix or self._chunks[chunk_id][0].startswith(prefix + "/") or self._chunks[chunk_id][0] == prefix),
+                            reverse=True)[:max_results]
+            results = []
+            for score, chunk_id in ranked:
+                path, chunk = self._chunks[chunk_id]
+                results.append({"path": path, "anchor": chunk["anchor"], "heading": chunk["heading"] or "(preamble)",
+                                "breadcrumb": chunk["breadcrumb"], "start_line": chunk["start_line"],
+                                "end_line": chunk["end_line"], "score": round(score, 3), "snippet": chunk["snippet"]})
+            return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"ref": self.ref, "commit": self._commit, "files": len(self._files), "sections": len(self._chunks), "terms": len(self._postings)}
+
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+def get_docs_index(ref: str, repository: str | None = None) -> DocsIndex:
+    """Returns the shared docs index for a repository and ref."""
+    key = (repository or get_default_repository(), ref)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = DocsIndex(*key)
+        return _indexes[key]
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+def search_docs(query: str, path_prefix: str = "", max_results: int = 0, ref: str = "main") -> dict:
+    """Searches the documentation by topic and returns the best-matching sections (file path, heading anchor, line range and a short snippet).
+
+    Use it to find which file and section document something before reading or editing
+    it; then fetch just that section with `get_file_section`.
+    """
+    if not get_repo():
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    try:
+        index = get_docs_index(ref)
+        refresh = index.refresh()
+        results = index.search(query, path_prefix, max_results or MAX_RESULTS)
+        print(f"search_docs('{query}') at '{ref}': {len(results)} result(s).")
+        return {"status": "success", "query": query, "results": results, "commit": refresh["commit"]}
+    except Exception as e:
+        print(f"Error searching docs for '{query}': {e}")
+        return _error_response(e)
+
+
+@instrument_tool
+@scheduled(idempotent=True)
+def get_file_section(path: str, section: str = "", ref: str = "main") -> dict:
+    """Gets one section of a Markdown file (the heading and everything under it, including subsections) by heading text or anchor.
+
+    With an empty `section`, returns the file's outline (headings, anchors and line ranges)
+    instead of any content.
+    """
+    response = get_file_content(path, ref)
+    if response["status"] != "success":
+        return response
+    content = response["content"]
+    sections = parse_sections(content)
+    outline = [entry.to_dict() for entry in sections if entry.level]
+    if not section:
+        return {"status": "success", "path": path, "outline": outline}
+    matches = match_sections(sections, section)
+    if len(matches) != 1:
+        problem = "was not found" if not matches else "is ambiguous"
+        return {"status": "error", "error_message": f"Section '{section}' {problem} in '{path}'. Use an anchor from the outline.",
+                "outline": outline}
+    match = matches[0]
+    return {"status": "success", "path": path, **match.to_dict(), "content": match.text(content.splitlines(keepends=True))}
+
+
+DOCS_TOOLS = [
+    search_docs,
+    get_file_section,
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or refresh the documentation section index.")
+    parser.add_argument("--ref", default=config.get("general", {}).get("github_base_branch", "main"))
+    parser.add_argument("--query", help="Run a search after refreshing.")
+    args = parser.parse_args()
+
+    index = get_docs_index(args.ref)
+    index.refresh(force=True)
+    print(index.stats())
+    if args.query:
+        for result in index.search(args.query):
+            print(f"{result['score']:>8}  {result['path']}#{result['anchor']}  {result['breadcrumb']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import base64
+import os
+import subprocess
+import threading
+import time
+from config_utils import config
+from state_utils import get_state_path
+from .github_client import get_default_repository
+
+GIT_MIRROR_SETTINGS = config.get("git_mirror", {})
+
+
+class GitMirrorError(Exception):
+    """Raised when a git command against the local mirror fails."""
+
+
+class GitMirror:
+    """A local bare clone of the repository, kept current with incremental fetches.
+
+    Reads are served from the local object store, so listing a tree or reading
+    hundreds of files costs one `git fetch` at most instead of one HTTP call per file.
+    """
+
+    def __init__(self, remote_url: str, path: str, fetch_interval_seconds: float = 60, auth_token: str | None = None):
+        self.remote_url = remote_url
+        self.path = path
+        self.fetch_interval_seconds = fetch_interval_seconds
+        self.auth_token = auth_token
+        self._last_fetch = 0.0
+        self._lock = threading.Lock()
+
+    def _git(self, *args: str, input_bytes: bytes | None = None, remote: bool = False) -> bytes:
+        command = ["git"]
+        if remote and self.auth_token:
+            # Pass the token per command so it never lands in the mirror's config.
+            credentials = base64.b64encode(f"x-access-token:{self.auth_token}".encode()).decode()
+            command += ["-c", f"http.extraHeader=Authorization: Basic {credentials}"]
+        if args[0] != "clone":
+            command += ["--git-dir", self.path]
+        command += list(args)
+        # Paths are always literal: a file named "[id].md" is not a glob.
+        completed = subprocess.run(command, input=input_bytes, capture_output=True, env={**os.environ, "GIT_LITERAL_PATHSPECS": "1"})
+        if completed.returncode != 0:
+            raise GitMirrorError(f"git {args[0]} failed: {completed.stderr.decode(errors='replace').strip()}")
+        return completed.stdout
+
+    def ensure(self) -> None:
+        """Clones the mirror if it does not exist yet."""
+        with self._lock:
+            if os.path.isdir(self.path):
+                return
+            print(f"Cloning {self.remote_url} into local mirror '{self.path}'.")
+            self._git("clone", "--bare", "--quiet", self.remote_url, self.path, remote=True)
+            self._last_fetch = time.monotonic()
+
+    def fetch(self, force: bool = False) -> None:
+        """Fetches new commits for all branches and tags, at most once per fetch interval unless forced."""
+        self.ensure()
+        with self._lock:
+            if not force and time.monotonic() - self._last_fetch < self.fetch_interval_seconds:
+                return
+            self._git("fetch", "--quiet", "--prune", self.remote_url,
+                      "+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*", remote=True)
+            self._last_fetch = time.monotonic()
+
+    def mark_stale(self) -> None:
+        """Makes the next read fetch first, e.g. after we pushed a commit through the API."""
+        with self._lock:
+            self._last_fetch = 0.0
+
+    def resolve(self, ref: str) -> str:
+        """Returns the commit SHA for a branch, tag or SHA, fetching once if the ref is unknown locally."""
+        self.fetch()
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").decode().strip()
+        except GitMirrorError:
+            self.fetch(force=True)
+            try:
+                return self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").decode().strip()
+            except GitMirrorError:
+                raise GitMirrorError(f"Ref '{ref}' not found in local mirror.") from None
+
+    def list_tree(self, ref: str, path_prefix: str = "") -> list[dict]:
+        """Lists every file under `path_prefix` at `ref` with its blob SHA and size."""
+        commit = self.resolve(ref)
+        args = ["ls-tree", "-r", "-l", "-z", commit]
+        if path_prefix:
+            args += ["--", path_prefix]
+        entries = []
+        for record in self._git(*args).split(b"\0"):
+            if not record:
+                continue
+            meta, path = record.split(b"\t", 1)
+            _, object_type, sha, size = meta.split()
+            if object_type != b"blob":
+                continue
+            entries.append({"path": path.decode(), "sha": sha.decode(), "size": int(size)})
+        return entries
+
+    def read_files(self, ref: str, paths: list[str]) -> dict:
+        """Reads many files at one ref with one `git ls-tree` and one `git cat-file --batch` process.
+
+        Returns a dict mapping each path to its content, or to None if it is not a file at that ref.
+        """
+        results = dict.fromkeys(paths)
+        if not paths:
+            return results
+        # Resolve paths to blob SHAs from NUL-terminated output first, so cat-file only ever reads
+        # hex object names: paths with spaces or newlines cannot garble its line-based protocol.
+        blobs = {}
+        for record in self._git("ls-tree", "-z", self.resolve(ref), "--", *paths).split(b"\0"):
+            if not record:
+                continue
+            meta, path = record.split(b"\t", 1)
+            _, object_type, sha = meta.split()
+            if object_type == b"blob" and path.decode() in results:
+                blobs[path.decode()] = sha.decode()
+        if not blobs:
+            return results
+
+        shas = list(blobs.values())
+        output = self._git("cat-file", "--batch=%(objectname) %(objecttype) %(objectsize)",
+                           input_bytes="".join(f"{sha}\n" for sha in shas).encode())
+        contents = {}
+        offset = 0
+        for sha in shas:
+            header_end = output.index(b"\n", offset)
+            object_name, _, size = output[offset:header_end].split(b" ")
+            offset = header_end + 1
+            contents[object_name.decode()] = output[offset:offset + int(size)].decode()
+            offset += int(size) + 1
+        for path, sha in blobs.items():
+            results[path] = contents[sha]
+        return results
+
+    def read_file(self, ref: str, path: str) -> str:
+        """Reads one file at a ref."""
+        content = self.read_files(ref, [path])[path]
+        if content is None:
+            raise FileNotFoundError(f"File '{path}' not found at ref '{ref}' in local mirror.")
+        return content
+
+    def diff(self, base: str, head: str, path_prefix: str = "") -> str:
+        """Returns the unified diff between the merge base of `base` and `head`, and `head`."""
+        args = ["diff", f"{self.resolve(base)}...{self.resolve(head)}"]
+        if path_prefix:
+            args += ["--", path_prefix]
+        return self._git(*args).decode(errors="replace")
+
+
+_mirror = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror() -> GitMirror | None:
+    """Returns the configured local mirror, or None when `git_mirror.enabled` is off."""
+    global _mirror
+    if not GIT_MIRROR_SETTINGS.get("enabled", False):
+        return None
+    with _mirror_lock:
+        if _mirror is None:
+            repository = get_default_repository()
+            remote_url = GIT_MIRROR_SETTINGS.get("remote_url") or f"https://github.com/{repository}.git"
+            _mirror = GitMirror(
+                remote_url=remote_url,
+                path=GIT_MIRROR_SETTINGS.get("path") or get_state_path(f"mirror-{repository.replace('/', '-')}.git"),
+                fetch_interval_seconds=GIT_MIRROR_SETTINGS.get("fetch_interval_seconds", 60),
+                auth_token=os.getenv("GITHUB_TOKEN") if remote_url.startswith("https://") else None,
+            )
+        return _mirror
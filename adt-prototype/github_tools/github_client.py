@@ -0,0 +1,167 @@
+import asyncio
+import os
+import ssl
+import threading
+import weakref
+import certifi
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from github import Auth, Github
+from dotenv import load_dotenv
+from config_utils import config
+from telemetry import record_http_call
+from .scheduler import scheduler
+
+load_dotenv()
+
+GITHUB_CLIENT_SETTINGS = config.get("github_client", {})
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", GITHUB_CLIENT_SETTINGS.get("api_url", "https://api.github.com"))
+POOL_SIZE = GITHUB_CLIENT_SETTINGS.get("pool_size", 10)
+REQUEST_TIMEOUT = GITHUB_CLIENT_SETTINGS.get("timeout_seconds", 30)
+
+# Nothing below touches the network until a tool actually needs GitHub.
+_lock = threading.Lock()
+_github = None
+_session = None
+_repos = {}
+# httpx async clients are bound to the event loop they were created on. They share one
+# SSL context, since loading the CA bundle dominates the cost of creating a client.
+_async_clients = weakref.WeakKeyDictionary()
+_ssl_context = None
+
+
+def get_default_repository() -> str | None:
+    """Returns the repository name ('owner/repo') the tools operate on by default."""
+    return os.getenv("GITHUB_REPOSITORY")
+
+
+def _get_token() -> str:
+    token = os.getenv("GITHUB_TOKEN")
+    if not token:
+        raise ValueError("GITHUB_TOKEN environment variable not set.")
+    return token
+
+
+def get_http_session() -> requests.Session:
+    """Returns the shared keep-alive HTTP session, authenticated with GITHUB_TOKEN.
+
+    Used for REST calls PyGithub does not cover (conditional reads, raw diffs).
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(
+                lambda response, *args, **kwargs: _observe_response(response.headers, int(response.headers.get("Content-Length", 0) or 0))
+            )
+            session.headers.update(_api_headers())
+            _session = session
+        return _session
+
+
+def _api_headers() -> dict:
+    return {
+        "Authorization": f"token {_get_token()}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the running event loop's keep-alive async HTTP client, authenticated with GITHUB_TOKEN.
+
+    Used by the coroutine variants of the read tools in `async_tools`.
+    """
+    global _ssl_context
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            if _ssl_context is None:
+                _ssl_context = ssl.create_default_context(cafile=certifi.where())
+            client = httpx.AsyncClient(
+                headers=_api_headers(),
+                verify=_ssl_context,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+                follow_redirects=True,
+                event_hooks={"response": [_observe_async_response]},
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def _observe_async_response(response: httpx.Response) -> None:
+    _observe_response(response.headers, int(response.headers.get("Content-Length", 0) or 0))
+
+
+def get_github() -> Github:
+    """Returns the shared PyGithub client, building it on first use. Every object it hands out is lazy."""
+    global _github
+    with _lock:
+        if _github is None:
+            _github = Github(
+                auth=Auth.Token(_get_token()),
+                base_url=GITHUB_API_URL,
+                pool_size=POOL_SIZE,
+                timeout=REQUEST_TIMEOUT,
+                lazy=True,
+            )
+            _install_response_hook(_github)
+        return _github
+
+
+def _observe_response(headers, response_bytes: int) -> None:
+    scheduler.observe_response(headers)
+    record_http_call(response_bytes)
+
+
+def _install_response_hook(github: Github) -> None:
+    """Observes every PyGithub response (rate-limit headers, size) through its per-response hook."""
+    requester = getattr(github, "requester", None) or getattr(github, "_Github__requester", None)
+    original = getattr(requester, "DEBUG_ON_RESPONSE", None)
+    if original is None:
+        print("WARNING: PyGithub response hook unavailable; GitHub calls made through PyGithub will not be metered.")
+        return
+
+    def on_response(status, headers, output):
+        _observe_response(headers, len(output or ""))
+        return original(status, headers, output)
+
+    requester.DEBUG_ON_RESPONSE = on_response
+
+
+def get_repo(repository: str | None = None):
+    """Returns the repository object for 'owner/repo' (default: GITHUB_REPOSITORY), or None if unavailable.
+
+    Repository objects are created lazily, so this does not issue a request; the
+    first tool call that needs data is the first network round trip.
+
+    Objects the lazy repository hands out are lazy too. `get_commit(ref)`, `get_git_ref(ref)`
+    and `get_pull(number)` return stubs whose identifying attributes are parsed from the URL
+    without a request: `get_commit("main").sha` is "main", not a SHA. Any other attribute
+    (`.object.sha` of a ref, `.head` of a pull) fetches the object. Resolve SHAs with
+    `github_tool.resolve_commit_sha`, never from a stub.
+    """
+    name = repository or get_default_repository()
+    if not name:
+        print("Error connecting to GitHub: GITHUB_REPOSITORY environment variable not set (e.g., 'owner/repo_name').")
+        return None
+    if name in _repos:
+        return _repos[name]
+    try:
+        repo = get_github().get_repo(name)
+    except Exception as e:
+        print(f"Error connecting to GitHub: {e}")
+        return None
+    with _lock:
+        return _repos.setdefault(name, repo)
+
+
+def get_repo_api_url(repository: str | None = None) -> str:
+    """Returns the REST URL of a repository without resolving it over the network."""
+    return f"{GITHUB_API_URL.rstrip('/')}/repos/{repository or get_default_repository()}"
@@ -1,26 +1,52 @@
-import os
-from github import Github
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from github import GithubException, InputGitTreeElement
+import base64
+import hashlib
+import json
 import re
-import requests
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+from config_utils import config
+from telemetry import instrument_tool, metrics
+from .content_cache import ContentCache, is_commit_sha
+from .diff_parser import estimate_tokens, is_doc_path, parse_hunks
+from .git_mirror import GitMirrorError, get_mirror
+from .issue_index import get_issue_index
+from .patching import PatchConflictError, apply_edits
+from .scheduler import scheduled, scheduler
+from state_utils import load_json_state, locked_state, save_json_state
+from .github_client import REQUEST_TIMEOUT, get_default_repository, get_http_session, get_repo, get_repo_api_url
 
-load_dotenv()
+GITHUB_TOOL_SETTINGS = config.get("github_tool_settings", {})
+INLINE_BLOB_MAX_BYTES = GITHUB_TOOL_SETTINGS.get("inline_blob_max_bytes", 64 * 1024)
+BLOB_UPLOAD_WORKERS = GITHUB_TOOL_SETTINGS.get("blob_upload_workers", 4)
+BULK_READ_WORKERS = GITHUB_TOOL_SETTINGS.get("bulk_read_workers", 4)
 
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_REPOSITORY = os.getenv("GITHUB_REPOSITORY")
+ISSUE_SETTINGS = config.get("issues", {})
+ISSUES_PER_PAGE = ISSUE_SETTINGS.get("per_page", 100)
+ISSUES_SUMMARY_MAX_TOKENS = ISSUE_SETTINGS.get("summary_max_tokens", 4000)
+ISSUES_SUMMARY_BODY_CHARS = ISSUE_SETTINGS.get("summary_body_chars", 280)
+ISSUE_SYNC_STATE_FILE = "issue_sync.json"
+ISSUE_DEDUP_ENABLED = config.get("issue_dedup", {}).get("enabled", True)
 
-if not GITHUB_TOKEN:
-    raise ValueError("GITHUB_TOKEN environment variable not set.")
-if not GITHUB_REPOSITORY:
-    raise ValueError("GITHUB_REPOSITORY environment variable not set (e.g., 'owner/repo_name').")
+DIFF_SETTINGS = config.get("diffs", {})
+DIFF_MAX_TOKENS = DIFF_SETTINGS.get("max_tokens", 20000)
+DIFF_HUNK_PAGE_TOKENS = DIFF_SETTINGS.get("hunk_page_tokens", 6000)
+DIFF_DOC_EXTENSIONS = tuple(DIFF_SETTINGS.get("doc_extensions", [".md", ".markdown", ".mdx", ".rst", ".txt"]))
+DIFF_DOC_PATH_PREFIXES = tuple(DIFF_SETTINGS.get("doc_path_prefixes", ["docs/"]))
+_pull_request_files = OrderedDict()
+_pull_request_files_lock = threading.Lock()
 
-try:
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(GITHUB_REPOSITORY)
-    print(f"Successfully connected to GitHub repository: {GITHUB_REPOSITORY}")
-except Exception as e:
-    print(f"Error connecting to GitHub: {e}")
-    repo = None
+CONTENT_CACHE_SETTINGS = config.get("content_cache", {})
+content_cache = ContentCache(
+    max_entries=CONTENT_CACHE_SETTINGS.get("max_entries", 256),
+    max_bytes=CONTENT_CACHE_SETTINGS.get("max_bytes", 32 * 1024 * 1024),
+)
+
+metrics.register_collector(
+    lambda: ((f"adt_content_cache_{name}", {}, value) for name, value in content_cache.stats().items())
+)
 
 def _to_kebab_case(text: str) -> str:
     text = text.lower()
@@ -29,20 +55,111 @@ def _to_kebab_case(text: str) -> str:
     text = text.strip('-')
     return text
 
-def create_github_issue(title: str, body: str) -> dict:
-    """Creates a new GitHub issue."""
+def _error_response(error: Exception) -> dict:
+    """Builds a tool error response and hands the exception to the scheduler's retry policy."""
+    scheduler.record_error(error)
+    return {"status": "error", "error_message": str(error)}
+
+def _fetch_file(path: str, ref: str) -> tuple[str, str]:
+    """Returns (content, blob_sha) for a file, reusing the shared content cache.
+
+    Cached branch reads are revalidated with If-None-Match; a 304 response costs no rate limit.
+    """
+    repo = get_repo()
+    cached = content_cache.lookup(path, ref)
+    if cached and is_commit_sha(ref):
+        content_cache.record_hit()
+        return cached.content, cached.blob_sha
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    response = get_http_session().get(f"{get_repo_api_url()}/contents/{quote(path)}", params={"ref": ref}, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304 and cached:
+        content_cache.record_hit(revalidated=True)
+        return cached.content, cached.blob_sha
+    response.raise_for_status()
+
+    data = response.json()
+    if isinstance(data, list) or data.get("type") != "file":
+        raise IsADirectoryError(f"Path '{path}' is a directory, not a file.")
+    if data.get("encoding") == "base64":
+        content = base64.b64decode(data["content"]).decode()
+    else:
+        # Files over 1 MB come back without inline content; read them through the blob API instead.
+        content = base64.b64decode(repo.get_git_blob(data["sha"]).content).decode()
+
+    content_cache.record_miss()
+    content_cache.store(path, ref, data["sha"], content, etag=response.headers.get("ETag"))
+    return content, data["sha"]
+
+def _read_from_mirror(path: str, ref: str) -> str | None:
+    """Reads a file from the local git mirror, or returns None so the caller falls back to the REST API."""
+    mirror = get_mirror()
+    if not mirror:
+        return None
+    try:
+        return mirror.read_file(ref, path)
+    except (GitMirrorError, FileNotFoundError) as e:
+        print(f"Local mirror could not serve '{path}' at ref '{ref}' ({e}). Falling back to the REST API.")
+        return None
+
+def _mark_mirror_stale() -> None:
+    mirror = get_mirror()
+    if mirror:
+        mirror.mark_stale()
+
+def get_content_cache_stats() -> dict:
+    """Reports hit/miss counts and size of the shared file content cache."""
+    return {"status": "success", "cache": content_cache.stats()}
+
+@instrument_tool
+@scheduled(idempotent=False)
+def create_github_issue(title: str, body: str, force: bool = False) -> dict:
+    """Creates a new GitHub issue, unless an open issue with a near-identical title and body already exists.
+
+    In that case the existing issue's number and URL are returned with `duplicate` set.
+    Pass `force=True` to create the issue regardless.
+    """
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    index = get_issue_index(get_default_repository()) if ISSUE_DEDUP_ENABLED else None
+    if index and not force:
+        existing = None
+        if index.ready:
+            try:
+                index.sync(_issues_updated_since)
+                existing = index.find_duplicate(title, body)
+            except Exception as e:
+                print(f"WARNING: Duplicate issue check failed ({e}). Creating the issue anyway.")
+        else:
+            # The first build pages through every issue; never do that inside a tool call.
+            index.start_background_sync(_issues_updated_since)
+            print("WARNING: The duplicate issue index is still being built. Creating the issue without the duplicate check.")
+        if existing:
+            print(f"Issue '{title}' duplicates open issue #{existing['number']} (similarity {existing['similarity']}). Not creating it.")
+            return {"status": "success", "issue_url": existing["url"], "issue_number": existing["number"], "duplicate": True,
+                    "existing_title": existing["title"], "similarity": existing["similarity"]}
     try:
         issue = repo.create_issue(title=title, body=body)
         print(f"Created GitHub issue: {issue.html_url}")
-        return {"status": "success", "issue_url": issue.html_url, "issue_number": issue.number}
     except Exception as e:
         print(f"Error creating issue: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
+    if index:
+        try:
+            index.add_issue(issue.number, title, body, issue.html_url)
+        except Exception as e:
+            # The issue exists; the next sync will index it.
+            print(f"WARNING: Could not add issue #{issue.number} to the duplicate issue index: {e}")
+    return {"status": "success", "issue_url": issue.html_url, "issue_number": issue.number, "duplicate": False}
 
+@instrument_tool
+@scheduled(idempotent=True)
 def get_issue(issue_number: int) -> dict:
     """Gets a specific GitHub issue."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
@@ -51,39 +168,170 @@ def get_issue(issue_number: int) -> dict:
         return {"status": "success", "issue": {"title": issue.title, "body": issue.body, "state": issue.state, "number": issue.number}}
     except Exception as e:
         print(f"Error getting issue {issue_number}: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
 
 
+@instrument_tool
+@scheduled(idempotent=True)
 def get_file_content(path: str, ref: str = "main") -> dict:
     """Gets the content of a file from a specific branch or commit."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
-        contents = repo.get_contents(path, ref=ref)
-        if isinstance(contents, list):
-             return {"status": "error", "error_message": f"Path '{path}' is a directory, not a file."}
+        content = _read_from_mirror(path, ref)
+        if content is None:
+            content, _ = _fetch_file(path, ref)
         print(f"Read file content from '{path}' at ref '{ref}'.")
-        return {"status": "success", "content": contents.decoded_content.decode()}
+        return {"status": "success", "content": content}
+    except IsADirectoryError as e:
+        return _error_response(e)
     except Exception as e:
         print(f"Error reading file '{path}' at ref '{ref}': {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
+
 
+@instrument_tool
+@scheduled(idempotent=True)
+def get_files_content(paths: list[str], ref: str = "main") -> dict:
+    """Gets the contents of several files from a specific branch or commit in one call."""
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    files = {}
+    errors = {}
+    mirror = get_mirror()
+    if mirror:
+        try:
+            for path, content in mirror.read_files(ref, paths).items():
+                if content is None:
+                    errors[path] = f"File '{path}' not found at ref '{ref}'."
+                else:
+                    files[path] = content
+            print(f"Read {len(files)} file(s) at ref '{ref}' from the local mirror.")
+            return {"status": "success", "files": files, "errors": errors}
+        except GitMirrorError as e:
+            print(f"Local mirror could not serve ref '{ref}' ({e}). Falling back to the REST API.")
+
+    def fetch(path):
+        try:
+            return path, _fetch_file(path, ref)[0], None
+        except Exception as e:
+            return path, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=BULK_READ_WORKERS) as pool:
+        for path, content, error in pool.map(fetch, paths):
+            if error is None:
+                files[path] = content
+            else:
+                errors[path] = error
+    print(f"Read {len(files)} file(s) at ref '{ref}' ({len(errors)} failed).")
+    return {"status": "success", "files": files, "errors": errors}
+
+def resolve_commit_sha(ref: str) -> str:
+    """Returns the commit SHA a branch, tag or SHA currently points at."""
+    if is_commit_sha(ref):
+        return ref
+    mirror = get_mirror()
+    if mirror:
+        try:
+            return mirror.resolve(ref)
+        except GitMirrorError as e:
+            print(f"Local mirror could not resolve ref '{ref}' ({e}). Falling back to the REST API.")
+    # Not `get_repo().get_commit(ref).sha`: on the lazy repository that stub echoes `ref` back.
+    # The sha media type returns just the SHA as text, without the commit's files.
+    response = get_http_session().get(
+        f"{get_repo_api_url()}/commits/{quote(ref, safe='')}",
+        headers={"Accept": "application/vnd.github.sha"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.text.strip()
+
+def list_tree_entries(ref: str, path_prefix: str = "") -> list[dict]:
+    """Lists every file under `path_prefix` at `ref` as {"path", "sha", "size"} dicts, where `sha` is the blob SHA."""
+    prefix = path_prefix.strip("/")
+    mirror = get_mirror()
+    if mirror:
+        try:
+            return mirror.list_tree(ref, prefix)
+        except GitMirrorError as e:
+            print(f"Local mirror could not list ref '{ref}' ({e}). Falling back to the REST API.")
+    tree = get_repo().get_git_tree(ref, recursive=True)
+    return [
+        {"path": element.path, "sha": element.sha, "size": element.size}
+        for element in tree.tree
+        if element.type == "blob" and (not prefix or element.path == prefix or element.path.startswith(prefix + "/"))
+    ]
+
+@instrument_tool
+@scheduled(idempotent=True)
+def list_repository_tree(path_prefix: str = "", ref: str = "main") -> dict:
+    """Lists all files (recursively) under a directory of the repository, with their sizes in bytes."""
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    prefix = path_prefix.strip("/")
+    try:
+        files = [{"path": entry["path"], "size": entry["size"]} for entry in list_tree_entries(ref, prefix)]
+        print(f"Listed {len(files)} file(s) under '{prefix or '/'}' at ref '{ref}'.")
+        return {"status": "success", "ref": ref, "files": files, "count": len(files)}
+    except Exception as e:
+        print(f"Error listing tree '{prefix}' at ref '{ref}': {e}")
+        return _error_response(e)
 
+@instrument_tool
+@scheduled(idempotent=True)
+def get_diff_between_refs(base: str, head: str, path_prefix: str = "") -> dict:
+    """Gets the unified diff of the changes on `head` since it diverged from `base` (branches, tags or SHAs)."""
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    try:
+        mirror = get_mirror()
+        if mirror:
+            try:
+                return {"status": "success", "diff_content": mirror.diff(base, head, path_prefix.strip("/")), "base": base, "head": head}
+            except GitMirrorError as e:
+                print(f"Local mirror could not diff '{base}...{head}' ({e}). Falling back to the REST API.")
+        response = get_http_session().get(
+            f"{get_repo_api_url()}/compare/{quote(base, safe='')}...{quote(head, safe='')}",
+            headers={"Accept": "application/vnd.github.diff"},
+            timeout=REQUEST_TIMEOUT,
+        )
+        response.raise_for_status()
+        diff_content = response.text
+        if path_prefix:
+            diff_content = "".join(
+                section for section in re.split(r"(?m)^(?=diff --git )", diff_content)
+                if section.startswith(f"diff --git a/{path_prefix.strip('/')}")
+            )
+        return {"status": "success", "diff_content": diff_content, "base": base, "head": head}
+    except Exception as e:
+        print(f"Error fetching diff '{base}...{head}': {e}")
+        return _error_response(e)
+
+@instrument_tool
+@scheduled(idempotent=False)
 def commit_changes(file_path: str, content: str, commit_message: str, branch: str) -> dict:
     """Commits changes to a file on a specific branch, creating the branch if it doesn't exist."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
         sha = None
         try:
-            contents = repo.get_contents(file_path, ref=branch)
-            if isinstance(contents, list):
-                 return {"status": "error", "error_message": f"Commit target path '{file_path}' is a directory."}
-            sha = contents.sha
+            _, sha = _fetch_file(file_path, branch)
+        except IsADirectoryError:
+            return {"status": "error", "error_message": f"Commit target path '{file_path}' is a directory."}
+        except Exception:
+            sha = None
+
+        if sha:
             print(f"Found existing file '{file_path}' on branch '{branch}' with SHA {sha}.")
             commit = repo.update_file(path=file_path, message=commit_message, content=content, sha=sha, branch=branch)
             print(f"Updated file '{file_path}' on branch '{branch}'.")
-        except Exception as e:
+        else:
             try:
                 repo.get_branch(branch)
                 print(f"Branch '{branch}' exists, but file '{file_path}' not found. Creating file.")
@@ -92,15 +340,36 @@ def commit_changes(file_path: str, content: str, commit_message: str, branch: st
 
             commit = repo.create_file(path=file_path, message=commit_message, content=content, branch=branch)
             print(f"Created file '{file_path}' on branch '{branch}'.")
-
+        content_cache.invalidate(file_path, branch)
+        _mark_mirror_stale()
 
         return {"status": "success", "commit_url": commit['commit'].html_url}
     except Exception as e:
         print(f"Error committing changes to '{file_path}' on branch '{branch}': {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
 
+def _create_branch_from_base(branch_name: str, base_branch_name: str) -> None:
+    """Creates a branch from the head of the base branch, reusing it if it already exists."""
+    repo = get_repo()
+    base_branch = repo.get_branch(base_branch_name)
+    print(f"Found base branch '{base_branch_name}' with SHA: {base_branch.commit.sha}")
+
+    try:
+        repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_branch.commit.sha)
+        print(f"Successfully created new branch '{branch_name}' from '{base_branch_name}'.")
+    except Exception as e:
+        try:
+            repo.get_branch(branch_name)
+            print(f"Branch '{branch_name}' already exists. Proceeding to commit.")
+        except Exception as get_branch_e:
+            print(f"Error creating branch '{branch_name}': {e}. Also failed to confirm if it exists: {get_branch_e}")
+            raise RuntimeError(f"Error creating branch '{branch_name}': {e}") from e
+
+@instrument_tool
+@scheduled(idempotent=False)
 def create_branch_and_commit_file(issue_number: int, issue_title: str, file_path: str, content: str, commit_message: str, base_branch_name: str = "main") -> dict:
     """Creates a branch based on issue details, then commits a file to it."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
 
@@ -108,41 +377,198 @@ def create_branch_and_commit_file(issue_number: int, issue_title: str, file_path
     print(f"Constructed branch name: {branch_name}")
 
     try:
-        base_branch = repo.get_branch(base_branch_name)
-        print(f"Found base branch '{base_branch_name}' with SHA: {base_branch.commit.sha}")
-
-        try:
-            repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=base_branch.commit.sha)
-            print(f"Successfully created new branch '{branch_name}' from '{base_branch_name}'.")
-        except Exception as e:
-            try:
-                repo.get_branch(branch_name)
-                print(f"Branch '{branch_name}' already exists. Proceeding to commit.")
-            except Exception as get_branch_e:
-                print(f"Error creating branch '{branch_name}': {e}. Also failed to confirm if it exists: {get_branch_e}")
-                return {"status": "error", "error_message": f"Error creating branch '{branch_name}': {e}"}
+        _create_branch_from_base(branch_name, base_branch_name)
 
         sha = None
         try:
-            existing_file = repo.get_contents(file_path, ref=branch_name)
-            if isinstance(existing_file, list):
-                 return {"status": "error", "error_message": f"Target path '{file_path}' on branch '{branch_name}' is a directory."}
-            sha = existing_file.sha
+            _, sha = _fetch_file(file_path, branch_name)
+        except IsADirectoryError:
+            return {"status": "error", "error_message": f"Target path '{file_path}' on branch '{branch_name}' is a directory."}
+        except Exception:
+            sha = None
+
+        if sha:
             print(f"File '{file_path}' found on branch '{branch_name}'. Updating.")
             commit_details = repo.update_file(path=file_path, message=commit_message, content=content, sha=sha, branch=branch_name)
-        except Exception:
+        else:
             print(f"File '{file_path}' not found on branch '{branch_name}'. Creating.")
             commit_details = repo.create_file(path=file_path, message=commit_message, content=content, branch=branch_name)
-        
+        content_cache.invalidate(file_path, branch_name)
+        _mark_mirror_stale()
+
         print(f"Successfully committed '{file_path}' to branch '{branch_name}'. Commit URL: {commit_details['commit'].html_url}")
         return {"status": "success", "branch_name": branch_name, "commit_url": commit_details['commit'].html_url, "file_path": file_path}
 
     except Exception as e:
         print(f"An error occurred in create_branch_and_commit_file: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
+
+def _build_tree_elements(changes: list[dict]) -> list[InputGitTreeElement]:
+    """Turns change dicts into tree entries, uploading large files as blobs concurrently."""
+    repo = get_repo()
+    elements = [None] * len(changes)
+    large = []
+    for index, change in enumerate(changes):
+        path = change.get("path")
+        if not path:
+            raise ValueError(f"Change #{index + 1} has no 'path'.")
+        if change.get("delete"):
+            elements[index] = InputGitTreeElement(path=path, mode="100644", type="blob", sha=None)
+        elif isinstance(change.get("content"), str):
+            if len(change["content"].encode()) > INLINE_BLOB_MAX_BYTES:
+                large.append(index)
+            else:
+                elements[index] = InputGitTreeElement(path=path, mode="100644", type="blob", content=change["content"])
+        else:
+            raise ValueError(f"Change for '{path}' needs either 'content' or 'delete': true.")
+
+    if large:
+        with ThreadPoolExecutor(max_workers=min(BLOB_UPLOAD_WORKERS, len(large))) as pool:
+            blobs = pool.map(lambda index: repo.create_git_blob(changes[index]["content"], "utf-8"), large)
+            for index, blob in zip(large, blobs):
+                print(f"Created blob {blob.sha} for '{changes[index]['path']}'.")
+                elements[index] = InputGitTreeElement(path=changes[index]["path"], mode="100644", type="blob", sha=blob.sha)
+    return elements
+
+@instrument_tool
+@scheduled(idempotent=False)
+def commit_multiple_files(issue_number: int, issue_title: str, changes: list[dict], commit_message: str, base_branch_name: str = "main") -> dict:
+    """Creates a branch based on issue details, then commits several file changes to it as one commit.
+
+    Each change is a dict with a `path` and either `content` (the complete new file content)
+    or `delete` set to true to remove the file.
+    """
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    if not changes:
+        return {"status": "error", "error_message": "No changes were provided."}
 
+    branch_name = f"{issue_number}-{_to_kebab_case(issue_title)}"
+    print(f"Constructed branch name: {branch_name}")
+
+    try:
+        commit = _commit_to_branch(branch_name, changes, commit_message, base_branch_name)
+        file_paths = [change["path"] for change in changes]
+        return {"status": "success", "branch_name": branch_name, "commit_sha": commit.sha, "commit_url": commit.html_url, "file_paths": file_paths}
+    except Exception as e:
+        print(f"An error occurred in commit_multiple_files: {e}")
+        return _error_response(e)
+
+def _commit_to_branch(branch_name: str, changes: list[dict], commit_message: str, base_branch_name: str, parent_sha: str | None = None):
+    """Commits `changes` to a branch as one commit through the Git Data API and returns the commit.
+
+    The branch is created from the base branch if it does not exist. With `parent_sha`, the
+    commit is made on top of exactly that commit: a missing branch is created there, and if
+    the branch has moved on, PatchConflictError is raised instead of overwriting newer work.
+    """
+    repo = get_repo()
+    elements = _build_tree_elements(changes)
+    if parent_sha is None:
+        _create_branch_from_base(branch_name, base_branch_name)
+        ref = repo.get_git_ref(f"heads/{branch_name}")
+        parent_sha = ref.object.sha
+    else:
+        try:
+            ref = repo.create_git_ref(ref=f"refs/heads/{branch_name}", sha=parent_sha)
+            print(f"Successfully created new branch '{branch_name}' at {parent_sha}.")
+        except GithubException:
+            ref = repo.get_git_ref(f"heads/{branch_name}")
+        if ref.object.sha != parent_sha:
+            raise PatchConflictError(f"Branch '{branch_name}' moved to {ref.object.sha} while the edits were prepared against {parent_sha}.")
+
+    parent = repo.get_git_commit(parent_sha)
+    tree = repo.create_git_tree(elements, base_tree=parent.tree)
+    commit = repo.create_git_commit(message=commit_message, tree=tree, parents=[parent])
+    # Not forced: GitHub rejects the update unless it fast-forwards from `parent`.
+    ref.edit(sha=commit.sha)
+    _mark_mirror_stale()
+    for change in changes:
+        content_cache.invalidate(change["path"], branch_name)
+    print(f"Committed {len(changes)} file change(s) to branch '{branch_name}' in commit {commit.sha}.")
+    return commit
+
+@instrument_tool
+@scheduled(idempotent=False)
+def commit_file_edits(issue_number: int, issue_title: str, edits: list[dict], commit_message: str, base_branch_name: str = "main") -> dict:
+    """Applies targeted edits to existing files and commits them to the issue's branch as one commit.
+
+    Each edit is a dict with a `path` and either:
+      - `patch`: a unified diff of that file, containing only the changed hunks with a few lines of context; or
+      - `section`: a Markdown heading's text or anchor, plus `content`: the new text of that section up to the
+        next heading of the same or higher level. Start `content` with a heading line to replace the heading
+        too; otherwise the existing heading is kept.
+    Several edits to the same file are applied in order. Edits are applied against the issue branch if it
+    already exists, otherwise against the base branch's current commit. If any edit does not match the
+    file (changed context lines, a missing or ambiguous section), nothing is committed and every conflict
+    is returned.
+    """
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    if not edits:
+        return {"status": "error", "error_message": "No edits were provided."}
+
+    branch_name = f"{issue_number}-{_to_kebab_case(issue_title)}"
+    try:
+        try:
+            parent_sha = repo.get_git_ref(f"heads/{branch_name}").object.sha
+            print(f"Applying edits on top of existing branch '{branch_name}' at {parent_sha}.")
+        except GithubException as e:
+            if e.status != 404:
+                raise
+            parent_sha = resolve_commit_sha(base_branch_name)
+            print(f"Applying edits against '{base_branch_name}' at {parent_sha}.")
+
+        edits_by_path: dict = {}
+        for index, edit in enumerate(edits, start=1):
+            if not edit.get("path"):
+                return {"status": "error", "error_message": f"Edit #{index} has no 'path'."}
+            edits_by_path.setdefault(edit["path"], []).append(edit)
+
+        changes, files, conflicts = [], [], []
+        for path, file_edits in edits_by_path.items():
+            try:
+                original, blob_sha = _fetch_file(path, parent_sha)
+            except IsADirectoryError:
+                conflicts.append({"path": path, "error": "Path is a directory."})
+                continue
+            except Exception as e:
+                if getattr(getattr(e, "response", None), "status_code", None) != 404:
+                    raise
+                conflicts.append({"path": path, "error": f"File does not exist at {parent_sha}. Use commit_multiple_files to add new files."})
+                continue
+            try:
+                content, applied = apply_edits(original, file_edits)
+            except PatchConflictError as e:
+                conflicts.append({"path": path, "error": str(e)})
+                continue
+            if content != original:
+                changes.append({"path": path, "content": content})
+            files.append({"path": path, "base_blob_sha": blob_sha, "edits": applied})
+
+        if conflicts:
+            print(f"{len(conflicts)} file(s) had conflicting edits; nothing was committed.")
+            return {"status": "error", "error_message": "Some edits did not apply, so nothing was committed. Re-read the affected files and retry.",
+                    "conflicts": conflicts, "base_sha": parent_sha}
+        if not changes:
+            return {"status": "error", "error_message": "The edits leave every file unchanged; nothing to commit.", "base_sha": parent_sha}
+
+        commit = _commit_to_branch(branch_name, changes, commit_message, base_branch_name, parent_sha=parent_sha)
+        return {"status": "success", "branch_name": branch_name, "commit_sha": commit.sha, "commit_url": commit.html_url,
+                "base_sha": parent_sha, "files": files}
+    except PatchConflictError as e:
+        print(f"Conflict committing edits to '{branch_name}': {e}")
+        return {"status": "error", "error_message": str(e), "conflicts": [{"path": None, "error": str(e)}]}
+    except Exception as e:
+        print(f"An error occurred in commit_file_edits: {e}")
+        return _error_response(e)
+
+@instrument_tool
+@scheduled(idempotent=False)
 def create_pull_request(title: str, body: str, head_branch: str, base_branch: str = "main") -> dict:
     """Creates a pull request."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
@@ -157,10 +583,13 @@ def create_pull_request(title: str, body: str, head_branch: str, base_branch: st
         return {"status": "success", "pr_url": pr.html_url, "pr_number": pr.number}
     except Exception as e:
         print(f"Error creating pull request from '{head_branch}' to '{base_branch}': {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
 
+@instrument_tool
+@scheduled(idempotent=False)
 def approve_pull_request(pr_number: int, message: str = "Looks good.") -> dict:
     """Approves a pull request."""
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
@@ -181,56 +610,350 @@ def approve_pull_request(pr_number: int, message: str = "Looks good.") -> dict:
         return {"status": "success", "message": "PR approved or review submitted.", "pr_url": pr.html_url, "pr_state": pr.state}
     except Exception as e:
         print(f"Error approving pull request #{pr_number}: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
 
+@instrument_tool
+@scheduled(idempotent=True)
 def get_pull_request_diff(pr_number: int) -> dict:
-    """Fetches the diff of a pull request."""
+    """Fetches the diff of a pull request, cut off at the configured token budget.
+
+    For large pull requests use `get_pull_request_diff_summary` and `get_pull_request_diff_hunks` instead.
+    """
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
-        pr = repo.get_pull(pr_number)
-        diff_url = pr.diff_url
-        
-        response = requests.get(diff_url)
-        response.raise_for_status()
-        
-        diff_content = response.text
-        print(f"Successfully fetched diff for PR #{pr_number}.")
-        return {"status": "success", "diff_content": diff_content, "pr_number": pr_number}
+        max_chars = DIFF_MAX_TOKENS * 4
+        with get_http_session().get(
+            f"{get_repo_api_url()}/pulls/{pr_number}",
+            headers={"Accept": "application/vnd.github.diff"},
+            timeout=REQUEST_TIMEOUT,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            # Stop reading once the budget is spent instead of downloading the whole payload.
+            chunks = []
+            size = 0
+            truncated = False
+            for chunk in response.iter_content(chunk_size=64 * 1024, decode_unicode=True):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_chars:
+                    truncated = True
+                    break
+        diff_content = "".join(chunks)[:max_chars]
+
+        print(f"Successfully fetched diff for PR #{pr_number}{' (truncated)' if truncated else ''}.")
+        result = {"status": "success", "diff_content": diff_content, "pr_number": pr_number, "truncated": truncated}
+        if truncated:
+            result["note"] = (f"The diff exceeds {DIFF_MAX_TOKENS} tokens and was cut off. Use get_pull_request_diff_summary "
+                              "and get_pull_request_diff_hunks to review it hunk by hunk.")
+        return result
     except Exception as e:
         print(f"Error fetching diff for PR #{pr_number}: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
+
+def _load_pull_request_files(pr_number: int) -> tuple[str, str, list[dict]]:
+    """Returns (title, head_sha, files) for a PR, parsing each file's patch into hunks.
+
+    Uses the paginated PR files endpoint rather than one monolithic diff, and caches
+    the parsed result per head SHA so paging through hunks costs one PR lookup per call.
+    """
+    pr = get_repo().get_pull(pr_number)
+    key = (pr_number, pr.head.sha)
+    with _pull_request_files_lock:
+        if key in _pull_request_files:
+            _pull_request_files.move_to_end(key)
+            return pr.title, pr.head.sha, _pull_request_files[key]
 
-def get_open_issues() -> dict:
-    """Gets all open issues from the repository."""
+    files = []
+    for changed_file in pr.get_files():
+        files.append({
+            "path": changed_file.filename,
+            "previous_path": changed_file.previous_filename,
+            "status": changed_file.status,
+            "additions": changed_file.additions,
+            "deletions": changed_file.deletions,
+            "hunks": parse_hunks(changed_file.patch) if changed_file.patch else [],
+            "patch_available": changed_file.patch is not None,
+        })
+    with _pull_request_files_lock:
+        _pull_request_files[key] = files
+        while len(_pull_request_files) > 32:
+            _pull_request_files.popitem(last=False)
+    return pr.title, pr.head.sha, files
+
+def pull_request_fingerprint(pr_number: int) -> str:
+    """Returns a hash of a pull request's complete change set (every file's path, status and hunks)."""
+    _, _, files = _load_pull_request_files(pr_number)
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+def _filter_diff_files(files: list[dict], docs_only: bool, file_path: str = "") -> list[dict]:
+    if file_path:
+        return [entry for entry in files if entry["path"] == file_path]
+    if docs_only:
+        return [entry for entry in files if is_doc_path(entry["path"], DIFF_DOC_EXTENSIONS, DIFF_DOC_PATH_PREFIXES)]
+    return files
+
+@instrument_tool
+@scheduled(idempotent=True)
+def get_pull_request_diff_summary(pr_number: int, docs_only: bool = True) -> dict:
+    """Summarizes a pull request's changes per file (status, additions, deletions, hunk count, estimated tokens) without the diff text.
+
+    With `docs_only` (default) only documentation files are listed; the number of other files is reported.
+    """
+    repo = get_repo()
     if not repo:
         return {"status": "error", "error_message": "Not connected to GitHub repository."}
     try:
-        open_issues = repo.get_issues(state='open')
-        issues_list = []
-        for issue in open_issues:
-            issues_list.append({
-                "number": issue.number,
-                "title": issue.title,
-                "body": issue.body,
-                "state": issue.state,
-                "url": issue.html_url
+        title, head_sha, files = _load_pull_request_files(pr_number)
+        selected = _filter_diff_files(files, docs_only)
+        summary = []
+        for entry in selected:
+            summary.append({
+                "path": entry["path"],
+                "previous_path": entry["previous_path"],
+                "status": entry["status"],
+                "additions": entry["additions"],
+                "deletions": entry["deletions"],
+                "hunk_count": len(entry["hunks"]),
+                "estimated_tokens": sum(estimate_tokens(hunk["text"]) for hunk in entry["hunks"]),
+                "patch_available": entry["patch_available"],
+            })
+        print(f"Summarized diff for PR #{pr_number}: {len(summary)} file(s).")
+        return {
+            "status": "success",
+            "pr_number": pr_number,
+            "title": title,
+            "head_sha": head_sha,
+            "files": summary,
+            "totals": {
+                "files": len(summary),
+                "additions": sum(entry["additions"] for entry in summary),
+                "deletions": sum(entry["deletions"] for entry in summary),
+                "hunks": sum(entry["hunk_count"] for entry in summary),
+                "estimated_tokens": sum(entry["estimated_tokens"] for entry in summary),
+            },
+            "excluded_non_doc_files": len(files) - len(selected),
+        }
+    except Exception as e:
+        print(f"Error summarizing diff for PR #{pr_number}: {e}")
+        return _error_response(e)
+
+@instrument_tool
+@scheduled(idempotent=True)
+def get_pull_request_diff_hunks(pr_number: int, file_path: str = "", cursor: int = 0, max_tokens: int = 0, docs_only: bool = True) -> dict:
+    """Returns the next diff hunks of a pull request that fit in a token budget, starting at `cursor`.
+
+    Call again with the returned `next_cursor` until it is null. Pass `file_path` to page
+    through a single file's hunks. `max_tokens` of 0 uses the configured default.
+    """
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    try:
+        _, head_sha, files = _load_pull_request_files(pr_number)
+        hunks = [
+            (entry, index, hunk)
+            for entry in _filter_diff_files(files, docs_only, file_path)
+            for index, hunk in enumerate(entry["hunks"])
+        ]
+        budget = max_tokens or DIFF_HUNK_PAGE_TOKENS
+        page = []
+        used_tokens = 0
+        position = cursor
+        while position < len(hunks):
+            entry, index, hunk = hunks[position]
+            cost = estimate_tokens(hunk["text"])
+            if page and used_tokens + cost > budget:
+                break
+            text = hunk["text"]
+            if cost > budget:
+                text = text[:budget * 4] + "\n... [hunk truncated]\n"
+            page.append({
+                "path": entry["path"],
+                "hunk_index": index,
+                "header": hunk["header"],
+                "new_start": hunk["new_start"],
+                "new_lines": hunk["new_lines"],
+                "additions": hunk["additions"],
+                "deletions": hunk["deletions"],
+                "text": text,
             })
-        print(f"Successfully fetched {len(issues_list)} open issues.")
-        return {"status": "success", "open_issues": issues_list}
+            used_tokens += min(cost, budget)
+            position += 1
+        print(f"Returned {len(page)} hunk(s) of PR #{pr_number} starting at cursor {cursor}.")
+        return {
+            "status": "success",
+            "pr_number": pr_number,
+            "head_sha": head_sha,
+            "hunks": page,
+            "cursor": cursor,
+            "next_cursor": position if position < len(hunks) else None,
+            "total_hunks": len(hunks),
+        }
+    except Exception as e:
+        print(f"Error fetching diff hunks for PR #{pr_number}: {e}")
+        return _error_response(e)
+
+ISSUE_FIELDS = ("number", "title", "body", "state", "url", "labels", "assignees", "updated_at", "is_pull_request")
+
+def _project_issue(item: dict, fields) -> dict:
+    issue = {
+        "number": item["number"],
+        "title": item["title"],
+        "body": item.get("body") or "",
+        "state": item["state"],
+        "url": item["html_url"],
+        "labels": [label["name"] for label in item.get("labels", [])],
+        "assignees": [assignee["login"] for assignee in item.get("assignees") or []],
+        "updated_at": item["updated_at"],
+        "is_pull_request": "pull_request" in item,
+    }
+    return {field: issue[field] for field in fields}
+
+def iter_issues(state: str = "open", labels=None, assignee: str | None = None, since: str | None = None,
+                include_pull_requests: bool = False, fields=ISSUE_FIELDS, sort: str = "updated", direction: str = "desc"):
+    """Yields issues one page at a time, filtered on the server where the REST API allows it.
+
+    Only the requested `fields` of each issue are kept, so memory stays bounded by one page.
+    GitHub lists pull requests as issues; they are skipped unless `include_pull_requests` is set.
+    """
+    url = f"{get_repo_api_url()}/issues"
+    params = {"state": state, "sort": sort, "direction": direction, "per_page": ISSUES_PER_PAGE}
+    if labels:
+        params["labels"] = ",".join(labels)
+    if assignee:
+        params["assignee"] = assignee
+    if since:
+        params["since"] = since
+    session = get_http_session()
+    while url:
+        response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        for item in response.json():
+            if not include_pull_requests and "pull_request" in item:
+                continue
+            yield _project_issue(item, fields)
+        # The next-page link already carries the query string.
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+def _watermark_key(repository: str, labels: list[str], assignee: str, include_pull_requests: bool) -> str:
+    """Names the incremental-sync watermark of one filter combination; unfiltered syncs use the bare repository name."""
+    filters = []
+    if labels:
+        filters.append("labels=" + ",".join(sorted(labels)))
+    if assignee:
+        filters.append(f"assignee={assignee}")
+    if include_pull_requests:
+        filters.append("pull_requests=1")
+    return f"{repository}?{'&'.join(filters)}" if filters else repository
+
+def _issues_updated_since(since: str | None):
+    """Feeds the duplicate-issue index: open and closed issues (not PRs) updated since `since`, oldest first."""
+    return iter_issues(state="all", since=since, fields=("number", "title", "body", "state", "url", "updated_at"),
+                       direction="asc")
+
+
+def warm_issue_index() -> None:
+    """Starts building or refreshing the duplicate-issue index in the background; called by the entry points at startup."""
+    if ISSUE_DEDUP_ENABLED and get_default_repository():
+        get_issue_index(get_default_repository()).start_background_sync(_issues_updated_since)
+
+@instrument_tool
+@scheduled(idempotent=True)
+def get_open_issues(labels: str = "", assignee: str = "", since: str = "", include_pull_requests: bool = False,
+                    incremental: bool = False, view: str = "summary", max_tokens: int = 0) -> dict:
+    """Gets open issues from the repository, as a token-budgeted summary by default.
+
+    Args:
+        labels: Comma-separated label names; only issues with all of them are returned.
+        assignee: Only issues assigned to this login ("none" for unassigned, "*" for any).
+        since: ISO 8601 timestamp; only issues updated at or after it are returned.
+        include_pull_requests: Also return pull requests, which GitHub lists as issues.
+        incremental: Only return issues updated after the previous incremental call with the same filters.
+        view: "summary" (title, labels and a short body excerpt) or "full" (complete bodies).
+        max_tokens: Approximate token budget for the result; 0 uses the configured default.
+    """
+    repo = get_repo()
+    if not repo:
+        return {"status": "error", "error_message": "Not connected to GitHub repository."}
+    try:
+        label_list = [label.strip() for label in labels.split(",") if label.strip()]
+        watermark_key = _watermark_key(get_default_repository(), label_list, assignee, include_pull_requests)
+        watermarks = load_json_state(ISSUE_SYNC_STATE_FILE, {}) if incremental else {}
+        watermark = watermarks.get(watermark_key) if incremental and not since else None
+        since = since or watermark
+
+        budget = max_tokens or ISSUES_SUMMARY_MAX_TOKENS
+        issues_list = []
+        used_tokens = 0
+        truncated = False
+        cut_off_at = None
+        issues = iter_issues(
+            labels=label_list,
+            assignee=assignee or None,
+            since=since or None,
+            include_pull_requests=include_pull_requests,
+            # Oldest-updated first, so an incremental sync cut short by the budget resumes where it stopped.
+            direction="asc" if incremental else "desc",
+        )
+        for issue in issues:
+            # GitHub's `since` is inclusive; the issues at the watermark were returned last time.
+            if watermark and issue["updated_at"] <= watermark:
+                continue
+            if view != "full" and len(issue["body"]) > ISSUES_SUMMARY_BODY_CHARS:
+                issue["body"] = issue["body"][:ISSUES_SUMMARY_BODY_CHARS].rstrip() + "..."
+            cost = len(json.dumps(issue)) // 4
+            if issues_list and used_tokens + cost > budget:
+                truncated = True
+                cut_off_at = issue["updated_at"]
+                break
+            issues_list.append(issue)
+            used_tokens += cost
+
+        if incremental and issues_list:
+            newest = issues_list[-1]["updated_at"]
+            if cut_off_at == newest:
+                # Issues sharing the cut-off timestamp were not all returned: stop short of it, so the
+                # next call repeats the returned ones rather than skipping the rest. If every returned
+                # issue shares it, the watermark stays where it was.
+                newest = max((issue["updated_at"] for issue in issues_list if issue["updated_at"] < cut_off_at), default=None)
+            if newest:
+                # Other filters' watermarks may have moved since they were read above.
+                with locked_state(ISSUE_SYNC_STATE_FILE):
+                    watermarks = load_json_state(ISSUE_SYNC_STATE_FILE, {})
+                    watermarks[watermark_key] = newest
+                    save_json_state(ISSUE_SYNC_STATE_FILE, watermarks)
+
+        print(f"Successfully fetched {len(issues_list)} open issues{' (truncated to token budget)' if truncated else ''}.")
+        result = {"status": "success", "open_issues": issues_list, "count": len(issues_list), "truncated": truncated}
+        if truncated:
+            result["note"] = "More issues match. Narrow the filters, call again with incremental=true to continue, or raise max_tokens."
+        if incremental:
+            result["since"] = since
+        return result
     except Exception as e:
         print(f"Error fetching open issues: {e}")
-        return {"status": "error", "error_message": str(e)}
+        return _error_response(e)
 
 # List of tools to expose to ADK agents.  Make sure you add the tools to the config.toml file. 
 GITHUB_TOOLS = [
     create_github_issue,
     get_issue,
     get_file_content,
+    get_files_content,
+    list_repository_tree,
+    get_diff_between_refs,
     commit_changes,
     create_branch_and_commit_file,
+    commit_multiple_files,
+    commit_file_edits,
     create_pull_request,
     approve_pull_request,
     get_pull_request_diff,
+    get_pull_request_diff_summary,
+    get_pull_request_diff_hunks,
     get_open_issues
 ]
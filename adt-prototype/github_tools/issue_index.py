@@ -0,0 +1,235 @@
+import base64
+import hashlib
+import random
+import re
+import struct
+import threading
+import time
+from config_utils import config
+from state_utils import load_json_state, save_json_state
+
+ISSUE_DEDUP_SETTINGS = config.get("issue_dedup", {})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _shingles(text: str, size: int) -> set:
+    """Word `size`-grams of the lowercased alphanumeric tokens, hashed to 32 bits."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        tokens = tokens + [""] * (size - len(tokens))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(tokens[i:i + size]).encode(), digest_size=4).digest(), "little")
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+class MinHasher:
+    """MinHash signatures from universal hash permutations (a*x + b mod 2^61-1)."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1, shingle_size: int = 3, max_text_chars: int = 4000):
+        generator = random.Random(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_text_chars = max_text_chars
+        self._permutations = [(generator.randint(1, _MERSENNE_PRIME - 1), generator.randint(0, _MERSENNE_PRIME - 1))
+                              for _ in range(num_perm)]
+
+    def signature(self, text: str) -> tuple:
+        hashes = _shingles(text[:self.max_text_chars], self.shingle_size)
+        return tuple(min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes) for a, b in self._permutations)
+
+
+def similarity(left: tuple, right: tuple) -> float:
+    """Estimated Jaccard similarity: the fraction of matching MinHash values."""
+    return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+def _pack(signature: tuple) -> str:
+    return base64.b64encode(struct.pack(f"<{len(signature)}I", *signature)).decode()
+
+
+def _unpack(packed: str) -> tuple:
+    data = base64.b64decode(packed)
+    return struct.unpack(f"<{len(data) // 4}I", data)
+
+
+class IssueIndex:
+    """Banded locality-sensitive hashing over MinHash signatures of open issues' titles and bodies.
+
+    Lookups only compare against issues sharing at least one band bucket, so they
+    stay fast with tens of thousands of issues. The index is persisted as a JSON
+    state file and updated incrementally from issues changed since its watermark;
+    closed issues are dropped. The first build pages through every issue, so it runs
+    in the background (`start_background_sync`) until the index is `ready`.
+    """
+
+    def __init__(self, repository: str, num_perm: int = 64, bands: int = 16, threshold: float = 0.6,
+                 shingle_size: int = 3, max_text_chars: int = 4000, sync_interval_seconds: float = 60):
+        if num_perm % bands:
+            raise ValueError("issue_dedup.num_perm must be a multiple of issue_dedup.bands.")
+        self.repository = repository
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.sync_interval_seconds = sync_interval_seconds
+        self.hasher = MinHasher(num_perm, shingle_size=shingle_size, max_text_chars=max_text_chars)
+        self.state_file = f"issue_index-{repository.replace('/', '__')}.json"
+        self._settings = [num_perm, bands, shingle_size, max_text_chars]
+        self._lock = threading.Lock()
+        self._issues: dict = {}
+        self._buckets: dict = {}
+        self._watermark = None
+        self._last_sync = 0.0
+        self._loaded = False
+        self._built = False
+        self._build_lock = threading.Lock()
+        self._build_thread = None
+
+    # --- Persistence ---
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        state = load_json_state(self.state_file, {})
+        if state.get("settings") != self._settings:
+            return  # Missing, or built with other parameters: rebuild from scratch on the next sync.
+        self._built = True
+        self._watermark = state.get("watermark")
+        for number, entry in state.get("issues", {}).items():
+            self._add(int(number), _unpack(entry["signature"]), entry["title"], entry["url"])
+
+    def _save(self) -> None:
+        save_json_state(self.state_file, {
+            "repository": self.repository,
+            "settings": self._settings,
+            "watermark": self._watermark,
+            "issues": {str(number): {"signature": _pack(entry["signature"]), "title": entry["title"], "url": entry["url"]}
+                       for number, entry in self._issues.items()},
+        })
+
+    # --- Buckets ---
+
+    def _band_keys(self, signature: tuple):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _add(self, number: int, signature: tuple, title: str, url: str) -> None:
+        self._remove(number)
+        self._issues[number] = {"signature": signature, "title": title, "url": url}
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(number)
+
+    def _remove(self, number: int) -> None:
+        entry = self._issues.pop(number, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry["signature"]):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(number)
+                if not bucket:
+                    del self._buckets[key]
+
+    # --- Public API ---
+
+    def sync(self, issue_source, force: bool = False) -> int:
+        """Applies issues updated since the watermark. `issue_source(since)` yields issue dicts
+        with number, title, body, state, url and updated_at, oldest update first."""
+        with self._lock:
+            self._load()
+            if not force and time.monotonic() - self._last_sync < self.sync_interval_seconds:
+                return 0
+            changed = 0
+            for issue in issue_source(self._watermark):
+                if issue["state"] == "open":
+                    self._add(issue["number"], self.hasher.signature(f"{issue['title']}\n{issue['body']}"), issue["title"], issue["url"])
+                else:
+                    self._remove(issue["number"])
+                if not self._watermark or issue["updated_at"] > self._watermark:
+                    self._watermark = issue["updated_at"]
+                changed += 1
+            self._last_sync = time.monotonic()
+            self._built = True
+            if changed:
+                self._save()
+            return changed
+
+    @property
+    def ready(self) -> bool:
+        """True once the index was built, by an earlier run (its state file) or a completed sync."""
+        # A sync in progress holds the lock; the index is not ready before it completes.
+        if not self._built and self._lock.acquire(blocking=False):
+            try:
+                self._load()
+            finally:
+                self._lock.release()
+        return self._built
+
+    def start_background_sync(self, issue_source) -> None:
+        """Syncs the index on a daemon thread, unless a background sync is already running."""
+        with self._build_lock:
+            if self._build_thread is not None and self._build_thread.is_alive():
+                return
+            self._build_thread = threading.Thread(target=self._background_sync, args=(issue_source,),
+                                                  name=f"issue-index-{self.repository}", daemon=True)
+            self._build_thread.start()
+
+    def _background_sync(self, issue_source) -> None:
+        try:
+            changed = self.sync(issue_source, force=True)
+            print(f"Duplicate issue index for {self.repository} is up to date ({changed} issue(s) applied).")
+        except Exception as e:
+            print(f"WARNING: Could not sync the duplicate issue index for {self.repository}: {e}")
+
+    def find_duplicate(self, title: str, body: str) -> dict | None:
+        """Returns the most similar open issue at or above the threshold, or None."""
+        signature = self.hasher.signature(f"{title}\n{body}")
+        with self._lock:
+            self._load()
+            candidates = set()
+            for key in self._band_keys(signature):
+                candidates |= self._buckets.get(key, set())
+            best = None
+            for number in candidates:
+                score = similarity(signature, self._issues[number]["signature"])
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, number)
+            if best is None:
+                return None
+            entry = self._issues[best[1]]
+            return {"number": best[1], "title": entry["title"], "url": entry["url"], "similarity": round(best[0], 3)}
+
+    def add_issue(self, number: int, title: str, body: str, url: str) -> None:
+        """Indexes an issue right after it was created, without waiting for the next sync."""
+        with self._lock:
+            self._load()
+            self._add(number, self.hasher.signature(f"{title}\n{body}"), title, url)
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"issues": len(self._issues), "buckets": len(self._buckets), "watermark": self._watermark}
+
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+def get_issue_index(repository: str) -> IssueIndex:
+    """Returns the shared duplicate-issue index for a repository."""
+    with _indexes_lock:
+        if repository not in _indexes:
+            _indexes[repository] = IssueIndex(
+                repository,
+                num_perm=ISSUE_DEDUP_SETTINGS.get("num_perm", 64),
+                bands=ISSUE_DEDUP_SETTINGS.get("bands", 16),
+                threshold=ISSUE_DEDUP_SETTINGS.get("similarity_threshold", 0.6),
+                shingle_size=ISSUE_DEDUP_SETTINGS.get("shingle_size", 3),
+                max_text_chars=ISSUE_DEDUP_SETTINGS.get("max_text_chars", 4000),
+                sync_interval_seconds=ISSUE_DEDUP_SETTINGS.get("sync_interval_seconds", 60),
+            )
+        return _indexes[repository]
@@ -0,0 +1,132 @@
+from markdown_utils import match_sections, parse_sections
+from .diff_parser import parse_hunks
+
+# How far (in lines) a hunk may have drifted from its stated position and still apply.
+MAX_HUNK_OFFSET = 200
+
+
+class PatchConflictError(ValueError):
+    """An edit does not match the file it is applied to."""
+
+
+def _split(content: str) -> list[str]:
+    return content.splitlines(keepends=True)
+
+
+def _hunk_sides(hunk_text: str) -> tuple[list[str], list[str]]:
+    """Returns the (old, new) lines of a hunk body, honouring '\\ No newline at end of file'."""
+    old, new = [], []
+    last = None
+    for line in hunk_text.splitlines(keepends=True)[1:]:
+        if line.startswith("\\"):
+            # The marker applies to the line before it.
+            if last is not None and last[-1].endswith("\n"):
+                last[-1] = last[-1][:-1]
+            continue
+        marker, text = line[:1], line[1:]
+        if line == "\n":
+            # Some tools strip the leading space from blank context lines.
+            marker, text = " ", "\n"
+        if marker == " ":
+            old.append(text)
+            new.append(text)
+            last = new
+        elif marker == "-":
+            old.append(text)
+            last = old
+        elif marker == "+":
+            new.append(text)
+            last = new
+    return old, new
+
+
+def _matches(lines: list[str], start: int, expected: list[str]) -> bool:
+    if start < 0 or start + len(expected) > len(lines):
+        return False
+    # Compare ignoring a missing final newline so a patch written against "x" applies to "x\n" and vice versa.
+    return all(lines[start + i].rstrip("\n") == expected[i].rstrip("\n") for i in range(len(expected)))
+
+
+def apply_unified_diff(original: str, patch: str) -> tuple[str, dict]:
+    """Applies a single-file unified diff (with or without ---/+++ headers) to `original`.
+
+    Each hunk's context and removed lines must match the file exactly, at the stated
+    line or within MAX_HUNK_OFFSET lines of it; otherwise PatchConflictError is raised.
+    Returns (new content, stats).
+    """
+    hunks = parse_hunks(patch)
+    if not hunks:
+        raise PatchConflictError("The patch contains no hunks ('@@ -a,b +c,d @@' headers).")
+    lines = _split(original)
+    result = []
+    position = 0
+    offset = 0
+    stats = {"hunks": len(hunks), "lines_added": 0, "lines_removed": 0}
+    for hunk in hunks:
+        old, new = _hunk_sides(hunk["text"])
+        stated = hunk["old_start"] - 1 if old else hunk["old_start"]
+        start = None
+        for delta in sorted(range(-MAX_HUNK_OFFSET, MAX_HUNK_OFFSET + 1), key=abs):
+            candidate = stated + offset + delta
+            if candidate >= position and _matches(lines, candidate, old):
+                start = candidate
+                break
+        if start is None:
+            expected = old[0].rstrip("\n") if old else ""
+            raise PatchConflictError(f"Hunk '{hunk['header']}' does not match the file (expected {expected!r} near line {stated + 1}).")
+        offset = start - stated
+        result.extend(lines[position:start])
+        result.extend(new)
+        position = start + len(old)
+        stats["lines_added"] += hunk["additions"]
+        stats["lines_removed"] += hunk["deletions"]
+    result.extend(lines[position:])
+    return "".join(result), stats
+
+
+def replace_section(original: str, heading: str, content: str) -> tuple[str, dict]:
+    """Replaces a Markdown section (the heading and everything up to the next heading of the same or higher level).
+
+    `heading` is the heading text or its anchor. If `content` does not start with a
+    heading line, the existing heading is kept and only the section body is replaced.
+    Raises PatchConflictError if the heading is missing or ambiguous.
+    """
+    lines = _split(original)
+    matches = match_sections(parse_sections(original), heading)
+    if not matches:
+        raise PatchConflictError(f"Section '{heading}' was not found.")
+    if len(matches) > 1:
+        anchors = ", ".join(section.slug for section in matches)
+        raise PatchConflictError(f"Section '{heading}' is ambiguous; use one of the anchors: {anchors}.")
+    section = matches[0]
+
+    start = section.start_line - 1
+    if not content.lstrip().startswith("#"):
+        start += 1  # Keep the existing heading line, and the blank line under it.
+        if start < section.end_line - 1 and not lines[start].strip() and not content.startswith("\n"):
+            start += 1
+    replacement = content if content.endswith("\n") or not content else content + "\n"
+    end = section.end_line - 1
+    if end < len(lines) and replacement and not replacement.endswith("\n\n"):
+        replacement += "\n"  # Keep a blank line before the next heading.
+    removed = lines[start:end]
+    new_lines = lines[:start] + _split(replacement) + lines[end:]
+    return "".join(new_lines), {"section": section.slug, "start_line": section.start_line,
+                                "lines_removed": len(removed), "lines_added": len(_split(replacement))}
+
+
+def apply_edits(original: str, edits: list[dict]) -> tuple[str, list[dict]]:
+    """Applies a file's edits in order. Each edit has either `patch` or `section` plus `content`."""
+    content = original
+    applied = []
+    for index, edit in enumerate(edits, start=1):
+        if edit.get("patch"):
+            content, stats = apply_unified_diff(content, edit["patch"])
+        elif edit.get("section"):
+            if not isinstance(edit.get("content"), str):
+                raise PatchConflictError(f"Edit #{index} replaces section '{edit['section']}' but has no 'content'.")
+            content, stats = replace_section(content, edit["section"], edit["content"])
+        else:
+            raise PatchConflictError(f"Edit #{index} needs either 'patch' or 'section' and 'content'.")
+        applied.append(stats)
+    return content, applied
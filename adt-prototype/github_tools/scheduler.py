@@ -0,0 +1,416 @@
+import asyncio
+import collections
+import contextvars
+import functools
+import inspect
+import random
+import threading
+import time
+import httpx
+import requests
+from concurrent.futures import Future
+from config_utils import config
+from telemetry import metrics
+
+SCHEDULER_SETTINGS = config.get("scheduler", {})
+
+_RETRYABLE_STATUSES = {500, 502, 503, 504}
+
+
+def _error_details(error: Exception) -> tuple[int | None, dict]:
+    """Extracts (HTTP status, response headers) from PyGithub and requests exceptions."""
+    status = getattr(error, "status", None)
+    headers = getattr(error, "headers", None) or {}
+    response = getattr(error, "response", None)
+    if response is not None:
+        status = status or getattr(response, "status_code", None)
+        headers = headers or getattr(response, "headers", None) or {}
+    return status, {str(key).lower(): value for key, value in dict(headers).items()}
+
+
+def _is_transient(error: Exception, status: int | None) -> bool:
+    if status in _RETRYABLE_STATUSES:
+        return True
+    return status is None and isinstance(error, (requests.ConnectionError, requests.Timeout, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class _SlotLimiter:
+    """In-flight limit shared by blocking tools (on worker threads) and coroutines (on event loops).
+
+    Waiters queue in FIFO order and a released slot is handed straight to the next one:
+    threads park on an event, coroutines await a future, so the event loop never blocks or polls.
+    """
+
+    def __init__(self, limit: int):
+        self._free = limit
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()  # threading.Event or (loop, asyncio.Future)
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                handed_over = waiter not in self._waiters
+                if not handed_over:
+                    self._waiters.remove(waiter)
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._wake, future)
+        except RuntimeError:
+            # The waiter's loop is closed; pass the slot on.
+            self.release()
+
+    @staticmethod
+    def _wake(future: asyncio.Future) -> None:
+        # A waiter cancelled after the handover releases the slot itself (see `acquire_async`).
+        if not future.done():
+            future.set_result(None)
+
+
+class RequestScheduler:
+    """Central gate for GitHub tool calls.
+
+    Every HTTP response spends a token from a bucket that mirrors the X-RateLimit-*
+    headers GitHub returns (see `observe_response`, called from the client hooks). A call
+    waits while the bucket is empty and for a free in-flight slot, and is retried with jittered
+    backoff when GitHub rate-limits it (any call: the request was rejected, not
+    applied) or fails transiently (idempotent calls only). Identical concurrent
+    reads are coalesced into one request. Async tools go through `run_async`,
+    which shares the bucket, the in-flight slots and the coalescing table.
+
+    Blocking calls wait by sleeping, so they belong on worker threads, never on an event
+    loop's thread (the agent registry runs blocking tools through `asyncio.to_thread`).
+    """
+
+    def __init__(self, max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 max_concurrent_requests: int = 8, hourly_limit: int = 5000):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._slots = _SlotLimiter(max_concurrent_requests)
+        self._lock = threading.Lock()
+        self._capacity = float(hourly_limit)
+        self._tokens = float(hourly_limit)
+        self._refill_per_second = hourly_limit / 3600.0
+        self._last_refill = time.monotonic()
+        self._reset_at = None
+        self._in_flight: dict = {}
+        self._local = threading.local()
+        # A context variable rather than a thread-local, so concurrent async tools on one thread keep their own errors.
+        self._last_error = contextvars.ContextVar("adt_scheduler_last_error", default=None)
+        self.metrics = {
+            "calls": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttled": 0,
+            "throttle_wait_seconds": 0.0,
+            "queue_wait_seconds": 0.0,
+            "coalesced": 0,
+            "rate_limit_remaining": None,
+            "rate_limit_limit": None,
+            "rate_limit_reset": None,
+        }
+
+    # --- Token bucket ---
+
+    def observe_response(self, headers) -> None:
+        """Spends a token for one GitHub HTTP response and reconciles the bucket with its X-RateLimit-* headers."""
+        with self._lock:
+            self._refill()
+            self._tokens = max(0.0, self._tokens - 1)
+        try:
+            lowered = {str(key).lower(): value for key, value in headers.items()}
+        except AttributeError:
+            return
+        remaining = lowered.get("x-ratelimit-remaining")
+        limit = lowered.get("x-ratelimit-limit")
+        reset = lowered.get("x-ratelimit-reset")
+        if remaining is None or limit is None:
+            return
+        self.observe_rate_limit(int(remaining), int(limit), int(reset) if reset else None)
+
+    def observe_rate_limit(self, remaining: int, limit: int, reset_epoch: int | None) -> None:
+        with self._lock:
+            self._refill()
+            self._capacity = float(limit)
+            self._refill_per_second = limit / 3600.0
+            if reset_epoch is not None and reset_epoch > (self._reset_at or 0):
+                # A new window (or the first one we see): GitHub's count replaces ours, up or down.
+                self._tokens = float(remaining)
+                self._reset_at = reset_epoch
+            else:
+                # Within a window, responses can arrive out of order; never believe we have more than GitHub says.
+                self._tokens = min(self._tokens, float(remaining))
+            self.metrics.update(rate_limit_remaining=remaining, rate_limit_limit=limit, rate_limit_reset=reset_epoch)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self._refill_per_second)
+        self._last_refill = now
+        if self._reset_at and time.time() >= self._reset_at:
+            self._tokens = self._capacity
+            self._reset_at = None
+
+    def _token_wait(self) -> float:
+        """Returns 0 while the bucket has a token left, or how long to wait before checking again.
+
+        Tokens are spent per HTTP response, so a call that is served locally costs nothing.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                return 0.0
+            if self._reset_at:
+                wait = max(0.0, self._reset_at - time.time())
+            else:
+                wait = (1 - self._tokens) / self._refill_per_second
+            wait = min(max(wait, 0.05), self.max_delay)
+            self.metrics["throttled"] += 1
+            self.metrics["throttle_wait_seconds"] += wait
+        print(f"GitHub rate limit budget exhausted; waiting {wait:.1f}s.")
+        return wait
+
+    def _wait_for_token(self) -> None:
+        while wait := self._token_wait():
+            time.sleep(wait)
+
+    async def _wait_for_token_async(self) -> None:
+        while wait := self._token_wait():
+            await asyncio.sleep(wait)
+
+    # --- Retry classification ---
+
+    def record_error(self, error: Exception) -> None:
+        """Remembers the exception behind a tool's error response so the scheduler can decide whether to retry."""
+        self._last_error.set(error)
+
+    def _pop_error(self) -> Exception | None:
+        error = self._last_error.get()
+        self._last_error.set(None)
+        return error
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool) -> float | None:
+        """Returns how long to wait before retrying, or None if the error is not retryable."""
+        status, headers = _error_details(error)
+        message = str(error).lower()
+        rate_limited = status == 429 or (status == 403 and (
+            "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0" or "rate limit" in message))
+        if rate_limited:
+            with self._lock:
+                self.metrics["rate_limited"] += 1
+            if "retry-after" in headers:
+                return min(float(headers["retry-after"]), self.max_delay)
+            if headers.get("x-ratelimit-remaining") == "0" and headers.get("x-ratelimit-reset"):
+                self.observe_rate_limit(0, int(headers.get("x-ratelimit-limit", self._capacity)), int(headers["x-ratelimit-reset"]))
+                return min(max(0.0, int(headers["x-ratelimit-reset"]) - time.time()), self.max_delay)
+        elif not idempotent or not _is_transient(error, status):
+            return None
+        # Full jitter keeps concurrent workers from retrying in lockstep.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    # --- Execution ---
+
+    def run(self, fn, args: tuple, kwargs: dict, idempotent: bool):
+        """Runs a tool function through the bucket, the in-flight limit and the retry policy."""
+        if getattr(self._local, "active", False):
+            # Nested tool call (e.g. get_file_section -> get_file_content): the outer call already holds a slot.
+            return fn(*args, **kwargs)
+
+        key, leader = self._join_in_flight(fn, args, kwargs, idempotent)
+        if leader is not None:
+            result = leader.result()
+            return dict(result) if isinstance(result, dict) else result
+
+        try:
+            result = self._run_with_retries(fn, args, kwargs, idempotent)
+        except BaseException as e:
+            if key is not None:
+                self._finish(key, exception=e)
+            raise
+        if key is not None:
+            self._finish(key, result=result)
+        return result
+
+    async def run_async(self, fn, args: tuple, kwargs: dict, idempotent: bool):
+        """Coroutine counterpart of `run` for async tools; waits without blocking the event loop."""
+        key, leader = self._join_in_flight(fn, args, kwargs, idempotent)
+        if leader is not None:
+            # Shielded so a cancelled follower does not cancel the leader's future.
+            result = await asyncio.shield(asyncio.wrap_future(leader))
+            return dict(result) if isinstance(result, dict) else result
+
+        try:
+            result = await self._run_with_retries_async(fn, args, kwargs, idempotent)
+        except BaseException as e:
+            if key is not None:
+                self._finish(key, exception=e)
+            raise
+        if key is not None:
+            self._finish(key, result=result)
+        return result
+
+    def _join_in_flight(self, fn, args: tuple, kwargs: dict, idempotent: bool) -> tuple:
+        """Returns (key, None) when this call leads (key is None for writes), or (key, leader future) to wait on.
+
+        Sync and async variants of a tool share a name but are keyed apart: a blocking call on the event
+        loop's thread must never wait for a coroutine on that same loop.
+        """
+        if not idempotent:
+            return None, None
+        key = (fn.__name__, inspect.iscoroutinefunction(fn), repr(args), repr(sorted(kwargs.items())))
+        with self._lock:
+            leader = self._in_flight.get(key)
+            if leader is None:
+                self._in_flight[key] = Future()
+            else:
+                self.metrics["coalesced"] += 1
+        return key, leader
+
+    def _finish(self, key, result=None, exception=None) -> None:
+        with self._lock:
+            future = self._in_flight.pop(key)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _run_with_retries(self, fn, args: tuple, kwargs: dict, idempotent: bool):
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            self._wait_for_token()
+            self._slots.acquire()
+            self._start_attempt(queued)
+            self._local.active = True
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                self._local.active = False
+                self._slots.release()
+
+            delay = self._retry_after(fn, result, attempt, idempotent)
+            if delay is None:
+                return result
+            attempt += 1
+            time.sleep(delay)
+
+    async def _run_with_retries_async(self, fn, args: tuple, kwargs: dict, idempotent: bool):
+        attempt = 0
+        while True:
+            queued = time.monotonic()
+            await self._wait_for_token_async()
+            await self._slots.acquire_async()
+            self._start_attempt(queued)
+            try:
+                result = await fn(*args, **kwargs)
+            finally:
+                self._slots.release()
+
+            delay = self._retry_after(fn, result, attempt, idempotent)
+            if delay is None:
+                return result
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _start_attempt(self, queued: float) -> None:
+        with self._lock:
+            self.metrics["calls"] += 1
+            self.metrics["queue_wait_seconds"] += time.monotonic() - queued
+        self._pop_error()
+
+    def _retry_after(self, fn, result, attempt: int, idempotent: bool) -> float | None:
+        """Returns how long to wait before retrying a failed attempt, or None to return its result."""
+        error = self._pop_error()
+        failed = isinstance(result, dict) and result.get("status") == "error"
+        if not failed or error is None or attempt >= self.max_retries:
+            return None
+        delay = self._retry_delay(error, attempt, idempotent)
+        if delay is None:
+            return None
+        with self._lock:
+            self.metrics["retries"] += 1
+        print(f"Retrying {fn.__name__} in {delay:.1f}s (attempt {attempt + 1} of {self.max_retries}): {error}")
+        return delay
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            self._refill()
+            metrics = dict(self.metrics)
+            metrics["bucket_tokens"] = round(self._tokens, 1)
+            metrics["in_flight_reads"] = len(self._in_flight)
+            metrics["throttle_wait_seconds"] = round(metrics["throttle_wait_seconds"], 3)
+            metrics["queue_wait_seconds"] = round(metrics["queue_wait_seconds"], 3)
+            return metrics
+
+
+scheduler = RequestScheduler(
+    max_retries=SCHEDULER_SETTINGS.get("max_retries", 4),
+    base_delay=SCHEDULER_SETTINGS.get("base_delay_seconds", 1.0),
+    max_delay=SCHEDULER_SETTINGS.get("max_delay_seconds", 60.0),
+    max_concurrent_requests=SCHEDULER_SETTINGS.get("max_concurrent_requests", 8),
+)
+
+
+def _collect_metrics():
+    for name, value in scheduler.get_metrics().items():
+        if isinstance(value, (int, float)):
+            yield f"adt_github_scheduler_{name}", {}, value
+
+
+metrics.register_collector(_collect_metrics)
+
+
+def scheduled(idempotent: bool):
+    """Routes every call of a GitHub tool through the shared scheduler.
+
+    Set `idempotent` for reads: they are coalesced with identical in-flight calls and
+    retried on transient failures. Writes are only retried when GitHub rate-limited them.
+    Coroutine functions stay coroutine functions, scheduled through `run_async`.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await scheduler.run_async(fn, args, kwargs, idempotent)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return scheduler.run(fn, args, kwargs, idempotent)
+        return wrapper
+    return decorator
+
+
+def get_scheduler_metrics() -> dict:
+    """Reports throttling, retry, coalescing and queue-wait metrics of the GitHub request scheduler."""
+    return {"status": "success", "metrics": scheduler.get_metrics()}
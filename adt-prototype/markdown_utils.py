@@ -0,0 +1,120 @@
+import re
+
+# --- Markdown Structure Helpers ---
+# Shared by the QA lint stage, section-level edits and the docs section index.
+
+_HEADING_RE = re.compile(r"^(#{1,6})(?:[ \t]+(.*?))?[ \t]*#*[ \t]*$")
+_FENCE_RE = re.compile(r"^[ ]{0,3}(`{3,}|~{3,})")
+
+
+class Section:
+    """A heading and the lines it owns, up to the next heading of the same or higher level.
+
+    Line numbers are 1-based; `end_line` is exclusive. Content before the first
+    heading is represented as a level-0 section with an empty title.
+    """
+
+    __slots__ = ("level", "title", "slug", "start_line", "end_line")
+
+    def __init__(self, level: int, title: str, slug: str, start_line: int, end_line: int):
+        self.level = level
+        self.title = title
+        self.slug = slug
+        self.start_line = start_line
+        self.end_line = end_line
+
+    def text(self, lines: list[str]) -> str:
+        return "".join(lines[self.start_line - 1:self.end_line - 1])
+
+    def to_dict(self) -> dict:
+        return {"level": self.level, "heading": self.title, "anchor": self.slug,
+                "start_line": self.start_line, "end_line": self.end_line}
+
+
+def slugify_heading(title: str) -> str:
+    """Returns the anchor GitHub generates for a heading."""
+    slug = title.strip().lower()
+    slug = re.sub(r"[^\w\- ]", "", slug)
+    return slug.replace(" ", "-")
+
+
+def iter_lines_outside_fences(lines: list[str]):
+    """Yields (line_number, line) for lines not inside fenced code blocks."""
+    fence = None
+    for number, line in enumerate(lines, start=1):
+        match = _FENCE_RE.match(line)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+                continue
+            yield number, line
+        elif match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) and not line.strip()[len(match.group(1)):].strip():
+            fence = None
+
+
+def unclosed_fence_line(lines: list[str]) -> int | None:
+    """Returns the line number of a code fence that is never closed, if any."""
+    fence = None
+    opened_at = None
+    for number, line in enumerate(lines, start=1):
+        match = _FENCE_RE.match(line)
+        if not match:
+            continue
+        if fence is None:
+            fence, opened_at = match.group(1), number
+        elif match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) and not line.strip()[len(match.group(1)):].strip():
+            fence = None
+    return opened_at if fence is not None else None
+
+
+def parse_headings(lines: list[str]) -> list[tuple[int, int, str]]:
+    """Returns (line_number, level, title) for every ATX heading outside code fences."""
+    headings = []
+    for number, line in iter_lines_outside_fences(lines):
+        match = _HEADING_RE.match(line.rstrip("\n"))
+        if match:
+            headings.append((number, len(match.group(1)), (match.group(2) or "").strip()))
+    return headings
+
+
+def parse_sections(content: str) -> list[Section]:
+    """Splits a Markdown document into heading-anchored sections.
+
+    Duplicate anchors get GitHub's `-1`, `-2` suffixes so every section has a unique slug.
+    """
+    lines = content.splitlines(keepends=True)
+    headings = parse_headings(lines)
+    end_of_file = len(lines) + 1
+    sections = []
+    if not headings or headings[0][0] > 1:
+        first = headings[0][0] if headings else end_of_file
+        if any(line.strip() for line in lines[:first - 1]):
+            sections.append(Section(0, "", "", 1, first))
+
+    seen = {}
+    for index, (number, level, title) in enumerate(headings):
+        end = end_of_file
+        for next_number, next_level, _ in headings[index + 1:]:
+            if next_level <= level:
+                end = next_number
+                break
+        slug = slugify_heading(title)
+        if slug in seen:
+            seen[slug] += 1
+            slug = f"{slug}-{seen[slug]}"
+        else:
+            seen[slug] = 0
+        sections.append(Section(level, title, slug, number, end))
+    return sections
+
+
+def match_sections(sections: list[Section], heading: str) -> list[Section]:
+    """Finds every section a heading reference matches: by heading text (case-insensitive), else by anchor.
+
+    More than one match means the reference is ambiguous.
+    """
+    wanted = heading.strip().lstrip("#").strip()
+    matches = [section for section in sections if section.level and section.title.lower() == wanted.lower()]
+    if not matches:
+        matches = [section for section in sections if section.level and section.slug in (wanted.lower(), slugify_heading(wanted))]
+    return matches
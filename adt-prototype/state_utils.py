@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from config_utils import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a lock within this process.
+    fcntl = None
+
+# --- Local State ---
+# Watermarks, indexes and caches that must survive between runs live under one directory.
+# A relative `state_dir` is resolved next to this file, like config.toml, so every entry point
+# shares the same state whatever its working directory. ADT_STATE_DIR is taken as given.
+STATE_DIR = os.path.abspath(os.getenv("ADT_STATE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), config.get("general", {}).get("state_dir", ".adt_state")))
+
+
+def get_state_path(filename: str) -> str:
+    """Returns the path of a file in the local state directory, creating the directory if needed."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, filename)
+
+
+_state_lock = threading.Lock()
+
+
+@contextmanager
+def locked_state(filename: str):
+    """Holds an exclusive lock on a state file, across threads and processes, for a load-modify-save cycle."""
+    if fcntl is None:
+        with _state_lock:
+            yield
+        return
+    with open(get_state_path(f".{filename}.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_json_state(filename: str, default=None):
+    """Loads a JSON state file, returning `default` if it is missing or unreadable."""
+    path = get_state_path(filename)
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except Exception as e:
+        print(f"WARNING: Could not read state file {path}: {e}. Starting from empty state.")
+        return default
+
+
+def save_json_state(filename: str, data) -> None:
+    """Atomically writes a JSON state file."""
+    path = get_state_path(filename)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{filename}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
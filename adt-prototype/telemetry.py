@@ -0,0 +1,299 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config_utils import config
+
+# --- Telemetry ---
+# Timing, API-call, byte and token accounting for tools and agents, emitted as
+# structured JSON logs and exposed in the Prometheus text format.
+
+TELEMETRY_SETTINGS = config.get("telemetry", {})
+
+_trace_id = contextvars.ContextVar("adt_trace_id", default=None)
+_span = contextvars.ContextVar("adt_span", default=None)
+
+logger = logging.getLogger("adt.telemetry")
+
+
+def _configure_logger() -> None:
+    if logger.handlers or not TELEMETRY_SETTINGS.get("json_logs", True):
+        return
+    log_file = TELEMETRY_SETTINGS.get("log_file")
+    handler = logging.FileHandler(log_file) if log_file else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+_configure_logger()
+
+
+def emit(event: str, **fields) -> None:
+    """Writes one structured JSON log line tagged with the current trace ID."""
+    record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "event": event,
+              "trace_id": fields.pop("trace_id", None) or _trace_id.get()}
+    record.update(fields)
+    logger.info(json.dumps(record, default=str))
+
+
+# --- Metrics registry ---
+
+class MetricsRegistry:
+    """Thread-safe counters and summaries rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict = {}
+        self._summaries: dict = {}
+        self._help: dict = {}
+        self._collectors = []
+
+    def inc(self, name: str, value: float = 1, help_text: str = "", **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._help.setdefault(name, (help_text, "counter"))
+
+    def observe(self, name: str, value: float, help_text: str = "", **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total = self._summaries.get(key, (0, 0.0))
+            self._summaries[key] = (count + 1, total + value)
+            self._help.setdefault(name, (help_text, "summary"))
+
+    def register_collector(self, collector) -> None:
+        """Adds a callable returning (name, labels dict, value) gauge samples at render time."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """Returns a copy of all counter values keyed by (name, sorted label items)."""
+        with self._lock:
+            return dict(self._counters)
+
+    def render(self) -> str:
+        lines = []
+
+        def label_text(labels):
+            if not labels:
+                return ""
+            escaped = (f'{key}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for key, value in labels)
+            return "{" + ",".join(escaped) + "}"
+
+        with self._lock:
+            counters = dict(self._counters)
+            summaries = dict(self._summaries)
+            help_entries = dict(self._help)
+        for name in sorted({key[0] for key in counters}):
+            help_text, _ = help_entries[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{label_text(labels)} {value}" for (metric, labels), value in sorted(counters.items()) if metric == name]
+        for name in sorted({key[0] for key in summaries}):
+            help_text, _ = help_entries[name]
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} summary"]
+            for (metric, labels), (count, total) in sorted(summaries.items()):
+                if metric == name:
+                    lines.append(f"{name}_count{label_text(labels)} {count}")
+                    lines.append(f"{name}_sum{label_text(labels)} {round(total, 6)}")
+        gauges: dict = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    gauges.setdefault(name, []).append((tuple(sorted(labels.items())), value))
+            except Exception as e:
+                print(f"WARNING: Metrics collector failed: {e}")
+        for name in sorted(gauges):
+            lines.append(f"# TYPE {name} gauge")
+            lines += [f"{name}{label_text(labels)} {value}" for labels, value in gauges[name]]
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+# --- Traces and spans ---
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextlib.contextmanager
+def trace(trace_id: str | None = None):
+    """Tags all tool calls, agent runs and LLM calls inside the block with one trace ID (e.g. per issue)."""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    token = _trace_id.set(trace_id)
+    try:
+        yield trace_id
+    finally:
+        _trace_id.reset(token)
+
+
+class _Span:
+    __slots__ = ("parent", "api_calls", "bytes_in")
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.api_calls = 0
+        self.bytes_in = 0
+
+
+def record_http_call(response_bytes: int = 0) -> None:
+    """Counts one GitHub API round trip against every enclosing tool span."""
+    span = _span.get()
+    while span is not None:
+        span.api_calls += 1
+        span.bytes_in += response_bytes
+        span = span.parent
+    metrics.inc("adt_github_api_calls_total", help_text="GitHub API requests made.")
+    metrics.inc("adt_github_response_bytes_total", response_bytes, help_text="Bytes received from the GitHub API.")
+
+
+def instrument_tool(fn):
+    """Records wall time, API calls, bytes received and result size for every call of a tool (sync or async)."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            span = _Span(_span.get())
+            token = _span.set(span)
+            started = time.perf_counter()
+            result, completed = None, False
+            try:
+                result = await fn(*args, **kwargs)
+                completed = True
+                return result
+            finally:
+                _span.reset(token)
+                _record_tool_call(fn.__name__, span, started, result, completed)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        span = _Span(_span.get())
+        token = _span.set(span)
+        started = time.perf_counter()
+        result, completed = None, False
+        try:
+            result = fn(*args, **kwargs)
+            completed = True
+            return result
+        finally:
+            _span.reset(token)
+            _record_tool_call(fn.__name__, span, started, result, completed)
+    return wrapper
+
+
+def _record_tool_call(tool: str, span: _Span, started: float, result, completed: bool) -> None:
+    elapsed = time.perf_counter() - started
+    status = "exception"
+    if completed:
+        status = result.get("status", "success") if isinstance(result, dict) else "success"
+    try:
+        result_bytes = len(json.dumps(result, default=str)) if result is not None else 0
+    except Exception:
+        result_bytes = 0
+    metrics.inc("adt_tool_calls_total", help_text="Tool invocations.", tool=tool, status=status)
+    metrics.observe("adt_tool_duration_seconds", elapsed, help_text="Tool wall time.", tool=tool)
+    metrics.inc("adt_tool_api_calls_total", span.api_calls, help_text="GitHub API requests made by tools.", tool=tool)
+    metrics.inc("adt_tool_response_bytes_total", span.bytes_in, help_text="GitHub response bytes received by tools.", tool=tool)
+    metrics.inc("adt_tool_result_bytes_total", result_bytes, help_text="Serialized size of tool results handed to the model.", tool=tool)
+    emit("tool_call", tool=tool, status=status, duration_ms=round(elapsed * 1000, 1),
+         api_calls=span.api_calls, response_bytes=span.bytes_in, result_bytes=result_bytes)
+
+
+# --- ADK agent callbacks ---
+
+_agent_starts: dict = {}
+_agent_starts_lock = threading.Lock()
+
+
+def _callback_trace_id(callback_context) -> str | None:
+    try:
+        return callback_context.state.get("trace_id") or _trace_id.get() or callback_context.invocation_id
+    except Exception:
+        return _trace_id.get()
+
+
+def before_agent(callback_context):
+    """ADK before_agent_callback: starts timing an agent run."""
+    with _agent_starts_lock:
+        _agent_starts[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+    return None
+
+
+def after_agent(callback_context):
+    """ADK after_agent_callback: records the agent run's wall time."""
+    with _agent_starts_lock:
+        started = _agent_starts.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        agent = callback_context.agent_name
+        metrics.inc("adt_agent_runs_total", help_text="Agent invocations.", agent=agent)
+        metrics.observe("adt_agent_duration_seconds", elapsed, help_text="Agent wall time, including sub-agents and tools.", agent=agent)
+        emit("agent_run", trace_id=_callback_trace_id(callback_context), agent=agent,
+             invocation_id=callback_context.invocation_id, duration_ms=round(elapsed * 1000, 1))
+    return None
+
+
+def after_model(callback_context, llm_response):
+    """ADK after_model_callback: records LLM input and output token counts."""
+    usage = getattr(llm_response, "usage_metadata", None)
+    if usage is None:
+        return None
+    agent = callback_context.agent_name
+    input_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    metrics.inc("adt_llm_calls_total", help_text="LLM requests.", agent=agent)
+    metrics.inc("adt_llm_tokens_total", input_tokens, help_text="LLM tokens.", agent=agent, direction="input")
+    metrics.inc("adt_llm_tokens_total", output_tokens, help_text="LLM tokens.", agent=agent, direction="output")
+    emit("llm_call", trace_id=_callback_trace_id(callback_context), agent=agent,
+         invocation_id=callback_context.invocation_id, input_tokens=input_tokens, output_tokens=output_tokens)
+    return None
+
+
+AGENT_CALLBACKS = {
+    "before_agent_callback": before_agent,
+    "after_agent_callback": after_agent,
+    "after_model_callback": after_model,
+}
+
+
+# --- Prometheus endpoint ---
+
+_server = None
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("/metrics", ""):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int | None = None, host: str = "127.0.0.1"):
+    """Serves /metrics in a background thread. Does nothing if no port is configured or it is already running."""
+    global _server
+    port = port if port is not None else TELEMETRY_SETTINGS.get("metrics_port", 0)
+    if not port or _server is not None:
+        return _server
+    _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="adt-metrics", daemon=True).start()
+    print(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return _server
@@ -0,0 +1,46 @@
+"""Shared fixtures. Run the suite from the adt-prototype directory with `python -m pytest`.
+
+Tests that talk to GitHub use the in-memory fake server from `benchmarks/`, so nothing
+touches the network.
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+from benchmarks.fake_github import FakeGitHub, FakeRepository  # noqa: E402
+
+REPOSITORY = "test/docs"
+
+# The GitHub client and the state directory are read at import time, so point them at the
+# fake server and a scratch directory before any test imports the app.
+_fake = FakeGitHub(REPOSITORY).start()
+os.environ.update({
+    "GITHUB_API_URL": _fake.url,
+    "GITHUB_TOKEN": "test-token",
+    "GITHUB_REPOSITORY": REPOSITORY,
+    "ADT_STATE_DIR": tempfile.mkdtemp(prefix="adt-test-"),
+})
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Gives every test its own empty state directory."""
+    import state_utils
+
+    monkeypatch.setattr(state_utils, "STATE_DIR", str(tmp_path / "state"))
+    return tmp_path / "state"
+
+
+@pytest.fixture
+def fake_github():
+    """The fake GitHub server, holding an empty repository and an empty content cache for each test."""
+    from github_tools.github_tool import content_cache
+
+    _fake.repo = FakeRepository(REPOSITORY)
+    _fake.reset_counts()
+    content_cache.clear()
+    return _fake
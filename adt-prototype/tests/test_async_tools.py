@@ -0,0 +1,18 @@
+import asyncio
+import inspect
+from github_tools.async_tools import fetch_many
+
+
+def test_fetch_many_defaults_are_not_shared_lists():
+    assert all(inspect.signature(fetch_many).parameters[name].default is None
+               for name in ("issue_numbers", "paths", "pr_numbers"))
+
+
+def test_fetch_many_fetches_only_what_was_asked_for(fake_github):
+    issue = fake_github.repo.add_issue("Broken link", "The install page links to a missing guide.")
+
+    result = asyncio.run(fetch_many(issue_numbers=[issue["number"]]))
+
+    assert result["status"] == "success"
+    assert result["issues"][str(issue["number"])]["title"] == "Broken link"
+    assert result["files"] == {} and result["diffs"] == {} and result["errors"] == {}
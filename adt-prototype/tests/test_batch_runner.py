@@ -0,0 +1,102 @@
+import asyncio
+import json
+import sys
+import pytest
+import verdict_cache
+import workflow_store
+from benchmarks.run_benchmarks import BATCH_LABEL, _install_stub_models, seed_repository
+from doc_manager import batch_runner
+from doc_manager.batch_runner import BatchRunner
+from workflow_store import APPROVED, GENERATION_FAILED
+
+
+@pytest.fixture
+def batch_issues(fake_github, monkeypatch):
+    """Four open issues in a seeded fake repository, with every agent on the scripted stub model."""
+    monkeypatch.setattr(workflow_store, "_stores", {})
+    monkeypatch.setattr(verdict_cache, "_cache", None)
+    seed_repository(fake_github, pages=3, issues=4, pr_files=1)
+    # A little model latency, so concurrent issues overlap.
+    _install_stub_models(0.02)
+    return [{"number": issue["number"], "title": issue["title"], "body": issue["body"]}
+            for issue in fake_github.repo.issues.values() if BATCH_LABEL in issue["labels"]]
+
+
+class CountingRunner(BatchRunner):
+    """Records how many issues were in flight at once."""
+
+    active = 0
+    peak = 0
+
+    async def process_issue(self, *args, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().process_issue(*args, **kwargs)
+        finally:
+            self.active -= 1
+
+
+def test_issues_fan_out_up_to_the_concurrency_limit_and_are_reported(batch_issues):
+    runner = CountingRunner(max_concurrency=2, queue_size=1)
+
+    report = asyncio.run(runner.run(iter(batch_issues)))
+
+    assert runner.peak == 2
+    assert report["total"] == 4
+    assert report["approved"] == 4
+    assert report["by_status"] == {"approved": 4}
+    assert [result["issue_number"] for result in report["results"]] == [1, 2, 3, 4]
+    for result in report["results"]:
+        assert result["approved"] and result["pr_number"] and result["branch_name"]
+        assert result["trace_id"].startswith(f"issue-{result['issue_number']}-")
+    assert report["workflow"] == {"by_stage": {"approved": 4}, "claimed": 0}
+
+
+def test_a_rerun_reports_finished_issues_without_repeating_them(batch_issues, fake_github):
+    runner = BatchRunner(max_concurrency=2)
+    asyncio.run(runner.run(batch_issues[:1]))
+    pulls = len(fake_github.repo.pulls)
+
+    report = asyncio.run(BatchRunner(max_concurrency=2).run(batch_issues[:1]))
+
+    assert report["results"][0]["status"] == APPROVED
+    assert report["results"][0]["resumed_from"] == APPROVED
+    assert len(fake_github.repo.pulls) == pulls
+
+
+def test_resume_processes_only_unfinished_issues(batch_issues, fake_github, monkeypatch, tmp_path):
+    asyncio.run(BatchRunner(max_concurrency=2).run(batch_issues[:2]))
+    store = workflow_store.get_workflow_store("test/docs")
+    store.claim(3, "crashed-worker", title=batch_issues[2]["title"])
+    store.checkpoint(3, "crashed-worker", stage=GENERATION_FAILED)
+    store.release(3, "crashed-worker")
+    output = tmp_path / "report.json"
+    monkeypatch.setattr(sys, "argv", ["batch_runner", "--resume", "--output", str(output)])
+
+    batch_runner.main()
+
+    report = json.loads(output.read_text())
+    assert [(result["issue_number"], result["status"]) for result in report["results"]] == [(3, APPROVED)]
+    assert report["results"][0]["resumed_from"] == GENERATION_FAILED
+    assert store.unfinished() == []
+
+
+class SlowRunner(BatchRunner):
+    """Hangs on every issue, so the per-issue timeout cancels it."""
+
+    async def process_issue(self, *args, **kwargs):
+        await asyncio.sleep(60)
+
+
+def test_a_timed_out_issue_records_the_error_and_releases_its_claim(batch_issues):
+    runner = SlowRunner(max_concurrency=2, issue_timeout_seconds=0.2)
+
+    report = asyncio.run(runner.run(batch_issues[:2]))
+
+    assert report["by_status"] == {"timeout": 2}
+    store = workflow_store.get_workflow_store("test/docs")
+    for issue in batch_issues[:2]:
+        state = store.get(issue["number"])
+        assert state["last_error"] == "Cancelled (timeout or shutdown)."
+        assert state["claimed_by"] is None
@@ -0,0 +1,69 @@
+from github_tools.content_cache import ContentCache, is_commit_sha
+
+
+def test_lookup_returns_the_blob_a_ref_points_at():
+    cache = ContentCache()
+    cache.store("README.md", "main", "blob1", "v1", etag='"e1"')
+    cache.store("README.md", "main", "blob2", "v2", etag='"e2"')
+
+    entry = cache.lookup("README.md", "main")
+
+    assert (entry.blob_sha, entry.content, entry.etag) == ("blob2", "v2", '"e2"')
+    assert cache.lookup("README.md", "dev") is None
+
+
+def test_identical_blobs_are_stored_once_across_refs():
+    cache = ContentCache()
+    cache.store("README.md", "main", "blob1", "same")
+    cache.store("README.md", "a" * 40, "blob1", "same")
+
+    assert cache.stats()["entries"] == 1
+    assert cache.lookup("README.md", "a" * 40).content == "same"
+
+
+def test_max_bytes_counts_encoded_size():
+    cache = ContentCache(max_bytes=10)
+    cache.store("emoji.md", "main", "blob1", "\N{GRINNING FACE}" * 3)  # 3 characters, 12 bytes
+
+    assert cache.lookup("emoji.md", "main") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_eviction_is_lru_and_drops_every_ref_of_the_evicted_blob():
+    cache = ContentCache(max_entries=2)
+    cache.store("a.md", "main", "blob-a", "a")
+    cache.store("a.md", "v1.0", "blob-a", "a")
+    cache.store("b.md", "main", "blob-b", "b")
+    cache.lookup("a.md", "main")
+
+    cache.store("c.md", "main", "blob-c", "c")
+
+    assert cache.lookup("b.md", "main") is None
+    assert cache.lookup("a.md", "v1.0").content == "a"
+    assert cache.stats()["bytes"] == 2
+
+    cache.store("d.md", "main", "blob-d", "d")
+    cache.store("e.md", "main", "blob-e", "e")
+    assert cache.lookup("a.md", "main") is None
+    assert cache.lookup("a.md", "v1.0") is None
+    assert cache._blob_refs.keys() == {("d.md", "blob-d"), ("e.md", "blob-e")}
+
+
+def test_invalidate_forgets_one_ref_or_all_refs_of_a_path():
+    cache = ContentCache()
+    cache.store("a.md", "main", "blob-a", "a")
+    cache.store("a.md", "dev", "blob-a", "a")
+
+    cache.invalidate("a.md", "main")
+    assert cache.lookup("a.md", "main") is None
+    assert cache.lookup("a.md", "dev") is not None
+
+    cache.invalidate("a.md")
+    assert cache.lookup("a.md", "dev") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_is_commit_sha():
+    assert is_commit_sha("0123456789abcdef0123456789abcdef01234567")
+    assert not is_commit_sha("main")
+    assert not is_commit_sha("")
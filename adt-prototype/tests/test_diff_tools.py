@@ -0,0 +1,80 @@
+import pytest
+from github_tools.github_tool import get_pull_request_diff_hunks, get_pull_request_diff_summary
+
+# More files than one page of GitHub's pull request file listing (30).
+DOC_FILES = 35
+
+
+def _page(index: int, revised: bool = False) -> str:
+    lines = [f"# Page {index}", ""] + [f"Line {line} of page {index}." for line in range(1, 21)]
+    if revised:
+        lines[2] += " (revised)"
+        lines[-1] += " (revised)"
+    return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def pull_number(fake_github):
+    repo = fake_github.repo
+    base = {f"docs/page-{index:02d}.md": _page(index) for index in range(DOC_FILES)}
+    repo.commit_files("main", {**base, "src/app.py": "print('hello')\n"}, "Initial commit")
+    repo.branches["revise-docs"] = repo.branches["main"]
+    revised = {path: _page(index, revised=True) for index, path in enumerate(sorted(base))}
+    repo.commit_files("revise-docs", {**revised, "src/app.py": "print('hello, world')\n"}, "Revise docs")
+    return repo.add_pull("Revise docs", "Two edits per page.", "revise-docs", "main")["number"]
+
+
+def test_summary_lists_doc_files_across_listing_pages(pull_number):
+    summary = get_pull_request_diff_summary(pull_number)
+
+    assert summary["status"] == "success", summary
+    assert summary["totals"]["files"] == DOC_FILES
+    assert summary["totals"]["hunks"] == DOC_FILES * 2
+    assert summary["excluded_non_doc_files"] == 1
+    assert all(entry["path"].startswith("docs/") for entry in summary["files"])
+
+
+def test_summary_includes_other_files_without_docs_only(pull_number):
+    summary = get_pull_request_diff_summary(pull_number, docs_only=False)
+
+    assert summary["totals"]["files"] == DOC_FILES + 1
+    assert summary["excluded_non_doc_files"] == 0
+    assert "src/app.py" in [entry["path"] for entry in summary["files"]]
+
+
+def test_hunks_page_through_every_hunk_once(pull_number):
+    seen = []
+    cursor = 0
+    pages = 0
+    while cursor is not None:
+        page = get_pull_request_diff_hunks(pull_number, cursor=cursor, max_tokens=200)
+        assert page["status"] == "success", page
+        assert page["hunks"]
+        seen += [(hunk["path"], hunk["hunk_index"]) for hunk in page["hunks"]]
+        cursor = page["next_cursor"]
+        pages += 1
+
+    assert pages > 1
+    assert len(seen) == len(set(seen)) == page["total_hunks"] == DOC_FILES * 2
+    assert all(path.startswith("docs/") for path, _ in seen)
+
+
+def test_a_hunk_over_the_budget_is_truncated_and_paging_still_advances(pull_number):
+    page = get_pull_request_diff_hunks(pull_number, max_tokens=5)
+
+    assert len(page["hunks"]) == 1
+    assert page["hunks"][0]["text"].endswith("... [hunk truncated]\n")
+    assert len(page["hunks"][0]["text"]) <= 5 * 4 + len("\n... [hunk truncated]\n")
+    assert page["next_cursor"] == 1
+
+
+def test_hunks_for_one_file_and_for_non_doc_files(pull_number):
+    page = get_pull_request_diff_hunks(pull_number, file_path="docs/page-03.md")
+    assert [(hunk["path"], hunk["hunk_index"]) for hunk in page["hunks"]] == [("docs/page-03.md", 0), ("docs/page-03.md", 1)]
+    assert page["next_cursor"] is None
+
+    everything = get_pull_request_diff_hunks(pull_number, docs_only=False, max_tokens=100000)
+    assert everything["total_hunks"] == DOC_FILES * 2 + 1
+    # An explicitly requested file is returned even when it is not documentation.
+    code = get_pull_request_diff_hunks(pull_number, file_path="src/app.py")
+    assert [hunk["path"] for hunk in code["hunks"]] == ["src/app.py"]
@@ -0,0 +1,60 @@
+from github_tools.docs_index import DocsIndex, chunk_document, search_docs, tokenize
+
+INSTALL = """Preamble before any heading.
+
+# Installation
+
+Install the package with pip.
+
+## Proxy settings
+
+Set HTTPS_PROXY when installing behind a corporate proxy.
+
+# Upgrading
+
+Run the upgrade command.
+"""
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("How to configure the Files and class") == ["configure", "file", "class"]
+
+
+def test_chunks_follow_headings_with_breadcrumbs_and_line_ranges():
+    chunks = chunk_document("docs/install.md", INSTALL)
+
+    assert [(chunk["heading"], chunk["anchor"], chunk["start_line"], chunk["end_line"]) for chunk in chunks] == [
+        ("", "", 1, 3), ("Installation", "installation", 3, 7), ("Proxy settings", "proxy-settings", 7, 11),
+        ("Upgrading", "upgrading", 11, 14),
+    ]
+    proxy = chunks[2]
+    assert proxy["breadcrumb"] == "Installation > Proxy settings"
+    # Heading, parent heading and path terms outweigh body terms.
+    assert proxy["terms"]["installation"] > proxy["terms"]["corporate"]
+    assert "install" in proxy["terms"]
+
+
+def test_search_ranks_the_matching_section_first_and_filters_by_prefix(fake_github):
+    fake_github.repo.commit_files("main", {
+        "docs/install.md": INSTALL,
+        "docs/api.md": "# API\n\nThe client exposes a request method.\n\n## Authentication\n\nPass a token.\n",
+        "blog/proxy.md": "# Proxy news\n\nWe now support proxy settings.\n",
+    }, "Add docs")
+
+    results = search_docs("proxy settings")["results"]
+    assert (results[0]["path"], results[0]["anchor"]) == ("docs/install.md", "proxy-settings")
+
+    filtered = search_docs("proxy", path_prefix="blog")["results"]
+    assert {result["path"] for result in filtered} == {"blog/proxy.md"}
+
+
+def test_refresh_follows_the_branch_and_rereads_only_changed_files(fake_github):
+    first = fake_github.repo.commit_files("main", {"docs/install.md": INSTALL, "docs/api.md": "# API\n\nRequests.\n"}, "Add docs")
+    index = DocsIndex("test/docs", "main")
+    assert index.refresh(force=True) == {"commit": first, "changed": 2, "removed": 0}
+
+    second = fake_github.repo.commit_files("main", {"docs/api.md": "# API\n\nWebhooks.\n", "docs/install.md": None}, "Edit docs")
+
+    assert index.refresh(force=True) == {"commit": second, "changed": 1, "removed": 1}
+    assert [result["path"] for result in index.search("webhooks")] == ["docs/api.md"]
+    assert index.search("proxy") == []
@@ -0,0 +1,73 @@
+import subprocess
+import pytest
+from github_tools.git_mirror import GitMirror
+
+
+def _git(cwd, *args):
+    return subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                          cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def _commit(repo, files, message):
+    for path, content in files.items():
+        (repo / path).parent.mkdir(parents=True, exist_ok=True)
+        (repo / path).write_text(content)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "--quiet", "-m", message)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """A local repository standing in for GitHub, with one commit on main."""
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git(repo, "init", "--quiet", "--initial-branch=main")
+    _commit(repo, {"README.md": "# Project\n", "docs/getting started.md": "Install it.\n", "docs/[id].md": "Routes.\n"}, "Initial docs")
+    return repo
+
+
+@pytest.fixture
+def mirror(tmp_path, upstream):
+    return GitMirror(str(upstream), str(tmp_path / "mirror.git"))
+
+
+def test_resolve_returns_the_commit_sha_of_a_branch(mirror, upstream):
+    assert mirror.resolve("main") == _git(upstream, "rev-parse", "main")
+
+
+def test_list_tree_lists_blobs_under_the_prefix(mirror):
+    assert sorted(entry["path"] for entry in mirror.list_tree("main", "docs")) == ["docs/[id].md", "docs/getting started.md"]
+
+
+def test_read_files_handles_spaces_globs_directories_and_missing_paths(mirror):
+    files = mirror.read_files("main", ["docs/getting started.md", "docs/[id].md", "docs", "missing file.md", "README.md"])
+
+    assert files == {
+        "docs/getting started.md": "Install it.\n",
+        "docs/[id].md": "Routes.\n",
+        "docs": None,
+        "missing file.md": None,
+        "README.md": "# Project\n",
+    }
+
+
+def test_reads_see_new_commits_after_mark_stale(mirror, upstream):
+    assert mirror.read_file("main", "README.md") == "# Project\n"
+    head = _commit(upstream, {"README.md": "# Project\n\nNow with docs.\n"}, "Expand README")
+
+    mirror.mark_stale()
+
+    assert mirror.resolve("main") == head
+    assert "Now with docs." in mirror.read_file("main", "README.md")
+
+
+def test_diff_is_limited_to_the_prefix(mirror, upstream):
+    base = mirror.resolve("main")
+    _commit(upstream, {"README.md": "# Renamed\n", "docs/getting started.md": "Install it with pip.\n"}, "Edit docs")
+    mirror.mark_stale()
+
+    diff = mirror.diff(base, "main", "docs")
+
+    assert "Install it with pip." in diff
+    assert "README.md" not in diff
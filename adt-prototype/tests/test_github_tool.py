@@ -0,0 +1,83 @@
+import re
+from github_tools import github_tool
+from github_tools.github_tool import commit_multiple_files, get_open_issues, resolve_commit_sha
+
+
+def test_incremental_issues_return_only_changes_since_the_previous_call(fake_github):
+    first = fake_github.repo.add_issue("Broken link", "The install page links to a missing guide.")
+    fake_github.repo.add_issue("Typo", "Fix 'teh' in the intro.")
+
+    assert [issue["title"] for issue in get_open_issues(incremental=True)["open_issues"]] == ["Broken link", "Typo"]
+    assert get_open_issues(incremental=True)["open_issues"] == []
+
+    first["updated_at"] = "2024-01-01T00:10:00Z"
+    assert [issue["number"] for issue in get_open_issues(incremental=True)["open_issues"]] == [first["number"]]
+
+
+def test_incremental_watermarks_are_kept_per_filter(fake_github):
+    fake_github.repo.add_issue("Crash on start", "Stack trace attached.", labels=["bug"])
+    fake_github.repo.add_issue("Docs gap", "Document the CLI flags.", labels=["documentation"])
+
+    assert len(get_open_issues(labels="documentation", incremental=True)["open_issues"]) == 1
+    # The filtered call must not move the unfiltered watermark past the bug report it never returned.
+    assert [issue["title"] for issue in get_open_issues(incremental=True)["open_issues"]] == ["Crash on start", "Docs gap"]
+
+
+def test_resolve_commit_sha_returns_the_branch_head_not_the_ref(fake_github):
+    head = fake_github.repo.commit_files("main", {"README.md": "# Docs\n"}, "Initial commit")
+
+    sha = resolve_commit_sha("main")
+
+    assert re.fullmatch(r"[0-9a-f]{40}", sha)
+    assert sha == head
+
+
+def test_commit_multiple_files_mixes_inline_content_uploaded_blobs_and_deletions(fake_github, monkeypatch):
+    monkeypatch.setattr(github_tool, "INLINE_BLOB_MAX_BYTES", 100)
+    base = fake_github.repo.commit_files("main", {"docs/old.md": "# Old\n", "docs/keep.md": "# Keep\n"}, "Initial commit")
+    fake_github.reset_counts()
+    large = "# Reference\n\n" + "A long line of reference text.\n" * 20
+
+    result = commit_multiple_files(3, "Reorganize docs", [
+        {"path": "docs/new.md", "content": "# New\n"},
+        {"path": "docs/reference.md", "content": large},
+        {"path": "docs/old.md", "delete": True},
+    ], "Reorganize docs")
+
+    assert result["status"] == "success", result
+    calls = fake_github.reset_counts()
+    assert calls["POST create_blob"] == 1
+    assert calls["POST create_git_commit"] == 1
+    head = fake_github.repo.branches["3-reorganize-docs"]
+    assert fake_github.repo.commits[head]["parents"] == [base]
+    files = fake_github.repo.files_at(head)
+    assert sorted(files) == ["docs/keep.md", "docs/new.md", "docs/reference.md"]
+    assert fake_github.repo.blobs[files["docs/reference.md"]].decode() == large
+
+
+def test_a_cut_off_page_sharing_one_timestamp_does_not_move_the_watermark(fake_github):
+    issues = [fake_github.repo.add_issue(f"Issue {index}", "Body.") for index in range(3)]
+    for issue in issues:
+        issue["updated_at"] = "2024-01-01T00:00:00Z"
+
+    first = get_open_issues(incremental=True, max_tokens=1)
+    assert first["truncated"] and first["count"] == 1
+
+    # The watermark did not jump to the shared timestamp, so none of the three is skipped.
+    assert get_open_issues(incremental=True)["count"] == 3
+
+
+def test_incremental_calls_keep_each_others_watermarks(fake_github, monkeypatch):
+    fake_github.repo.add_issue("Docs gap", "Document the CLI flags.", labels=["documentation"])
+    real_iter_issues = github_tool.iter_issues
+
+    def iter_issues_racing_another_filter(**kwargs):
+        # Another filter's incremental call saves its watermark while this one is listing issues.
+        monkeypatch.setattr(github_tool, "iter_issues", real_iter_issues)
+        get_open_issues(labels="documentation", incremental=True)
+        return real_iter_issues(**kwargs)
+
+    monkeypatch.setattr(github_tool, "iter_issues", iter_issues_racing_another_filter)
+    get_open_issues(incremental=True)
+
+    assert get_open_issues(labels="documentation", incremental=True)["open_issues"] == []
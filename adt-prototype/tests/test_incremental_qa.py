@@ -0,0 +1,40 @@
+from doc_manager.qa_agent.incremental import get_changed_doc_files, mark_files_audited
+
+
+def test_only_changed_files_are_listed_after_an_audit(fake_github):
+    fake_github.repo.commit_files("main", {"docs/intro.md": "Intro\n", "docs/usage.md": "Usage\n"}, "Add docs")
+    assert sorted(get_changed_doc_files("main", "docs")["changed_files"]) == ["docs/intro.md", "docs/usage.md"]
+    mark_files_audited(["docs/intro.md", "docs/usage.md"])
+
+    fake_github.repo.commit_files("main", {"docs/usage.md": "Usage, expanded\n"}, "Edit usage")
+
+    assert get_changed_doc_files("main", "docs")["changed_files"] == ["docs/usage.md"]
+
+
+def test_a_prefix_does_not_treat_sibling_directories_as_removed(fake_github):
+    fake_github.repo.commit_files("main", {"docs/intro.md": "Intro\n", "docs-old/intro.md": "Old intro\n"}, "Add docs")
+    get_changed_doc_files("main")
+    mark_files_audited(["docs/intro.md", "docs-old/intro.md"])
+
+    result = get_changed_doc_files("main", "docs")
+
+    assert result["removed_files"] == []
+    assert result["changed_files"] == []
+
+
+def test_listing_one_prefix_keeps_files_pending_under_another(fake_github):
+    fake_github.repo.commit_files("main", {"docs/intro.md": "Intro\n", "guides/setup.md": "Setup\n"}, "Add docs")
+    get_changed_doc_files("main", "docs")
+    get_changed_doc_files("main", "guides")
+
+    result = mark_files_audited(["docs/intro.md", "guides/setup.md"])
+
+    assert result["marked"] == ["docs/intro.md", "guides/setup.md"]
+    assert result["not_pending"] == []
+
+
+def test_errors_are_reported_as_tool_errors(fake_github):
+    result = get_changed_doc_files("no-such-branch", "docs")
+
+    assert result["status"] == "error"
+    assert result["error_message"]
@@ -0,0 +1,90 @@
+import pytest
+from github_tools import github_tool
+from github_tools.issue_index import IssueIndex, MinHasher, similarity
+
+BROKEN_LINK = ("Broken link in the installation guide",
+               "The link to the configuration reference on the installation page returns a 404 error.")
+
+
+def _issue(number, title, body, state="open", updated_at="2024-01-01T00:00:00Z"):
+    return {"number": number, "title": title, "body": body, "state": state, "url": f"https://github.example/issues/{number}",
+            "updated_at": updated_at}
+
+
+def _source(issues):
+    return lambda since: [issue for issue in issues if not since or issue["updated_at"] > since]
+
+
+def test_minhash_similarity_tracks_text_overlap():
+    hasher = MinHasher(num_perm=128)
+    base = hasher.signature("\n".join(BROKEN_LINK))
+    reworded = hasher.signature("Broken link in the installation guide\nThe link to the configuration reference on the install page returns a 404 error.")
+    unrelated = hasher.signature("Add a tutorial for the plugin API\nExplain how to register hooks and write a first plugin.")
+
+    assert similarity(base, base) == 1.0
+    assert similarity(base, reworded) > 0.5
+    assert similarity(base, unrelated) < 0.2
+
+
+def test_find_duplicate_returns_the_closest_open_issue_above_the_threshold():
+    index = IssueIndex("test/docs")
+    index.sync(_source([_issue(1, *BROKEN_LINK), _issue(2, "Add a plugin tutorial", "Explain how to write plugins.")]))
+
+    duplicate = index.find_duplicate(*BROKEN_LINK)
+
+    assert duplicate["number"] == 1 and duplicate["similarity"] == 1.0
+    assert index.find_duplicate("Search is slow", "Searching the docs site takes ten seconds.") is None
+
+
+def test_closed_issues_leave_the_index_and_state_survives_a_restart():
+    issues = [_issue(1, *BROKEN_LINK)]
+    IssueIndex("test/docs").sync(_source(issues))
+    issues.append(_issue(1, *BROKEN_LINK, state="closed", updated_at="2024-01-02T00:00:00Z"))
+
+    reloaded = IssueIndex("test/docs")
+    assert reloaded.ready
+    assert reloaded.find_duplicate(*BROKEN_LINK)["number"] == 1
+    assert reloaded.sync(_source(issues), force=True) == 1
+    assert reloaded.find_duplicate(*BROKEN_LINK) is None
+
+
+def test_changed_settings_rebuild_the_index():
+    IssueIndex("test/docs").sync(_source([_issue(1, *BROKEN_LINK)]))
+
+    rebuilt = IssueIndex("test/docs", shingle_size=2)
+
+    assert not rebuilt.ready
+    assert rebuilt.stats()["issues"] == 0
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        IssueIndex("test/docs", num_perm=64, bands=10)
+
+
+def test_create_github_issue_builds_the_index_in_the_background_then_deduplicates(fake_github, monkeypatch):
+    index = IssueIndex("test/docs")
+    monkeypatch.setattr(github_tool, "get_issue_index", lambda repository: index)
+    fake_github.repo.add_issue(*BROKEN_LINK)
+
+    first = github_tool.create_github_issue(*BROKEN_LINK)
+    assert first["duplicate"] is False
+    index._build_thread.join(5)
+    assert index.ready
+
+    second = github_tool.create_github_issue(*BROKEN_LINK)
+    assert second["duplicate"] is True and second["issue_number"] == 1
+
+
+def test_a_failing_index_update_does_not_fail_the_created_issue(fake_github, monkeypatch):
+    index = IssueIndex("test/docs", sync_interval_seconds=3600)
+    index.sync(_source([]))
+
+    def broken(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(index, "add_issue", broken)
+    monkeypatch.setattr(github_tool, "get_issue_index", lambda repository: index)
+
+    result = github_tool.create_github_issue(*BROKEN_LINK)
+
+    assert result["status"] == "success" and result["issue_number"] == 1
@@ -0,0 +1,69 @@
+import pytest
+from doc_manager.qa_agent.lint import flagged_sections, lint_document, lint_files
+
+KNOWN_PATHS = frozenset({"docs/guide.md", "docs/install.md", "docs", "README.md"})
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("# Guide\n\n## Install\n\n### Options\n", []),
+    ("# Guide\n\n### Options\n", [("heading-increment", 3)]),
+    ("# Guide\n\n## Install\n\n#### Flags\n\n## Usage\n\n### Run\n", [("heading-increment", 5)]),
+    ("# Guide\n\n# Again\n", [("single-h1", 3)]),
+    ("# Guide\n\n##\n", [("empty-heading", 3)]),
+    ("# Guide\n\nSee [install](install.md).\n", []),
+    ("# Guide\n\nSee [setup](setup.md) and [docs](../docs).\n", [("dead-link", 3)]),
+    ("# Guide\n\nSee [root](/README.md) or [site](https://example.com/missing.md).\n", []),
+    ("# Guide\n\n## Install\n\nJump to [install](#install) or [usage](#usage).\n", [("dead-anchor", 5)]),
+    ("# Guide\n\n```bash\npip install adt\n", [("code-fence", 3)]),
+    ("# Guide\n\n```bash\n# Not a heading, see [x](missing.md)\n```\n", []),
+    ("# Guide\n\nTeh tool is availible.\n", [("spelling", 3), ("spelling", 3)]),
+    ("# Guide\n\nRun `teh` against https://example.com/teh only.\n", []),
+])
+def test_lint_document_findings(content, expected):
+    result = lint_document("docs/guide.md", content, KNOWN_PATHS)
+
+    assert [(finding["rule"], finding["line"]) for finding in result["findings"]] == expected
+
+
+def test_spelling_messages_suggest_the_correction():
+    findings = lint_document("docs/guide.md", "Recieve it.\n")["findings"]
+
+    assert findings[0]["message"] == "'Recieve' should be 'receive'."
+
+
+def test_links_are_not_checked_without_known_paths():
+    assert lint_document("docs/guide.md", "See [setup](setup.md).\n")["findings"] == []
+
+
+def test_anchors_into_other_files_are_checked_across_documents():
+    files = {
+        "docs/guide.md": "# Guide\n\nSee [flags](install.md#flags) and [steps](install.md#steps).\n",
+        "docs/install.md": "# Install\n\n## Steps\n",
+    }
+
+    report = lint_files(files, known_paths=files, max_workers=1)
+
+    assert [(finding["rule"], finding["line"]) for finding in report["docs/guide.md"]["findings"]] == [("dead-anchor", 3)]
+    assert report["docs/install.md"] == {"findings": [], "sections": []}
+
+
+def test_flagged_sections_return_only_the_sections_with_findings():
+    content = "# Guide\n\nIntro.\n\n## Install\n\nTeh steps.\n\n## Usage\n\nRun it.\n"
+    findings = lint_document("docs/guide.md", content)["findings"]
+
+    sections = flagged_sections(content, findings)
+
+    assert len(sections) == 1
+    assert sections[0]["heading"] == "Install"
+    assert (sections[0]["start_line"], sections[0]["end_line"]) == (5, 8)
+    assert sections[0]["text"] == "## Install\n\nTeh steps.\n\n"
+    assert sections[0]["findings"] == findings
+
+
+def test_findings_before_the_first_heading_get_the_preamble():
+    content = "Teh preamble.\n\n# Guide\n\nBody.\n"
+    findings = lint_document("docs/guide.md", content)["findings"]
+
+    sections = flagged_sections(content, findings)
+
+    assert [(section["heading"], section["start_line"], section["end_line"]) for section in sections] == [("", 1, 2)]
@@ -0,0 +1,91 @@
+import pytest
+from github_tools.github_tool import commit_file_edits
+from github_tools.patching import PatchConflictError, apply_edits, apply_unified_diff, replace_section
+
+GUIDE = """# Guide
+
+Intro text.
+
+## Install
+
+Run pip install adt.
+
+## Usage
+
+Call adt --help.
+"""
+
+
+def test_unified_diff_applies_with_and_without_file_headers():
+    patch = "@@ -5,3 +5,3 @@\n \n-Run pip install adt.\n+Run pip install adt-tools.\n \n"
+
+    content, stats = apply_unified_diff(GUIDE, "--- a/guide.md\n+++ b/guide.md\n" + patch)
+
+    assert "Run pip install adt-tools." in content
+    assert stats == {"hunks": 1, "lines_added": 1, "lines_removed": 1}
+    assert apply_unified_diff(GUIDE, patch)[0] == content
+
+
+def test_a_hunk_applies_at_a_shifted_position():
+    shifted = "Preface.\n\n" + GUIDE
+    patch = "@@ -7,1 +7,1 @@\n-Run pip install adt.\n+Run pipx install adt.\n"
+
+    assert "Run pipx install adt." in apply_unified_diff(shifted, patch)[0]
+
+
+def test_a_hunk_with_stale_context_is_a_conflict():
+    with pytest.raises(PatchConflictError, match="does not match"):
+        apply_unified_diff(GUIDE, "@@ -7,1 +7,1 @@\n-Run npm install adt.\n+Run pip install adt.\n")
+    with pytest.raises(PatchConflictError, match="no hunks"):
+        apply_unified_diff(GUIDE, "just prose")
+
+
+def test_replace_section_keeps_the_heading_unless_content_has_one():
+    body_only, stats = replace_section(GUIDE, "Install", "Use the installer.")
+    assert "## Install\n\nUse the installer.\n\n## Usage" in body_only
+    assert stats["section"] == "install"
+
+    retitled, _ = replace_section(GUIDE, "#install", "## Installation\n\nUse the installer.\n")
+    assert "## Installation\n\nUse the installer.\n\n## Usage" in retitled
+    assert "## Install\n" not in retitled
+
+
+def test_missing_and_ambiguous_sections_are_conflicts():
+    with pytest.raises(PatchConflictError, match="not found"):
+        replace_section(GUIDE, "Uninstall", "x")
+    with pytest.raises(PatchConflictError, match="ambiguous"):
+        replace_section(GUIDE + "\n## Usage\n\nAgain.\n", "Usage", "x")
+
+
+def test_apply_edits_runs_in_order_and_validates_edits():
+    content, applied = apply_edits(GUIDE, [
+        {"section": "Usage", "content": "Call adt run."},
+        {"patch": "@@ -1,1 +1,1 @@\n-# Guide\n+# User guide\n"},
+    ])
+    assert content.startswith("# User guide") and "Call adt run." in content
+    assert len(applied) == 2
+    with pytest.raises(PatchConflictError, match="no 'content'"):
+        apply_edits(GUIDE, [{"section": "Usage"}])
+
+
+def test_commit_file_edits_creates_the_branch_at_the_base_commit(fake_github):
+    base = fake_github.repo.commit_files("main", {"docs/guide.md": GUIDE}, "Add guide")
+
+    result = commit_file_edits(7, "Fix install", [{"path": "docs/guide.md", "section": "Install", "content": "Use the installer."}],
+                               "Update install section")
+
+    assert result["status"] == "success", result
+    assert result["base_sha"] == base
+    branch = fake_github.repo.branches["7-fix-install"]
+    assert fake_github.repo.commits[branch]["parents"] == [base]
+
+
+def test_commit_file_edits_reports_conflicts_without_committing(fake_github):
+    fake_github.repo.commit_files("main", {"docs/guide.md": GUIDE}, "Add guide")
+
+    result = commit_file_edits(7, "Fix install", [{"path": "docs/guide.md", "section": "Uninstall", "content": "x"},
+                                                  {"path": "docs/missing.md", "section": "Install", "content": "x"}], "Edit")
+
+    assert result["status"] == "error"
+    assert [conflict["path"] for conflict in result["conflicts"]] == ["docs/guide.md", "docs/missing.md"]
+    assert "7-fix-install" not in fake_github.repo.branches
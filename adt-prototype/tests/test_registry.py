@@ -0,0 +1,28 @@
+import inspect
+from doc_manager import registry as agent_registry
+from doc_manager.registry import DEFAULT_AGENT_TOOLS, agent_tool_names, get_tool_registry
+
+
+def test_every_registered_tool_is_a_coroutine_function():
+    registry = get_tool_registry()
+
+    assert [name for name, tool in registry.items() if not inspect.iscoroutinefunction(tool)] == []
+
+
+def test_blocking_tools_keep_their_signature_and_docstring():
+    from github_tools.github_tool import commit_file_edits
+
+    wrapped = get_tool_registry()["commit_file_edits"]
+
+    assert wrapped is not commit_file_edits
+    assert inspect.signature(wrapped) == inspect.signature(commit_file_edits)
+    assert inspect.getdoc(wrapped) == inspect.getdoc(commit_file_edits)
+
+
+def test_agents_use_the_default_tools_unless_config_overrides_them(monkeypatch):
+    assert agent_tool_names("qa_agent") == DEFAULT_AGENT_TOOLS["qa_agent"]
+
+    monkeypatch.setitem(agent_registry.config, "agents", {"qa_agent": {"tools": ["lint_docs"]}})
+
+    assert agent_tool_names("qa_agent") == ["lint_docs"]
+    assert agent_tool_names("evaluation_agent") == DEFAULT_AGENT_TOOLS["evaluation_agent"]
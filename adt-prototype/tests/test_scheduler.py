@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+import requests
+from github_tools.scheduler import RequestScheduler, _SlotLimiter
+
+
+class RateLimited(Exception):
+    status = 429
+    headers = {"Retry-After": "0"}
+
+
+def _failing(scheduler, errors, result="ok"):
+    """A tool that reports each error in turn as an error response, then succeeds."""
+    calls = []
+
+    def tool(*args):
+        calls.append(args)
+        if errors:
+            scheduler.record_error(errors.pop(0))
+            return {"status": "error", "error_message": "failed"}
+        return {"status": "success", "value": result}
+    return tool, calls
+
+
+def test_transient_read_errors_are_retried():
+    scheduler = RequestScheduler(base_delay=0)
+    tool, calls = _failing(scheduler, [requests.ConnectionError("reset"), requests.ConnectionError("reset")])
+
+    assert scheduler.run(tool, (), {}, idempotent=True)["status"] == "success"
+    assert len(calls) == 3
+    assert scheduler.get_metrics()["retries"] == 2
+
+
+def test_writes_are_retried_only_when_rate_limited():
+    scheduler = RequestScheduler(base_delay=0)
+    tool, calls = _failing(scheduler, [requests.ConnectionError("reset")])
+    assert scheduler.run(tool, (), {}, idempotent=False)["status"] == "error"
+    assert len(calls) == 1
+
+    tool, calls = _failing(scheduler, [RateLimited("slow down")])
+    assert scheduler.run(tool, (), {}, idempotent=False)["status"] == "success"
+    assert len(calls) == 2
+
+
+def test_retries_stop_after_max_retries():
+    scheduler = RequestScheduler(max_retries=2, base_delay=0)
+    tool, calls = _failing(scheduler, [requests.Timeout("slow")] * 5)
+
+    assert scheduler.run(tool, (), {}, idempotent=True)["status"] == "error"
+    assert len(calls) == 3
+
+
+def test_identical_concurrent_reads_are_coalesced():
+    scheduler = RequestScheduler()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def get_issue(number):
+        calls.append(number)
+        started.set()
+        release.wait(5)
+        return {"status": "success", "number": number}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(scheduler.run(get_issue, (7,), {}, idempotent=True)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(scheduler.run(get_issue, (7,), {}, idempotent=True)))
+    follower.start()
+    while scheduler.get_metrics()["coalesced"] == 0:
+        time.sleep(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert calls == [7]
+    assert results == [{"status": "success", "number": 7}] * 2
+
+
+def test_each_response_spends_a_token_and_a_new_window_refills_the_bucket():
+    scheduler = RequestScheduler(hourly_limit=5000)
+    reset = int(time.time()) + 3600
+    scheduler.observe_response({"X-RateLimit-Remaining": "10", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": str(reset)})
+    scheduler.observe_response({})
+    assert scheduler.get_metrics()["bucket_tokens"] == 9
+
+    # A late response from the same window must not raise the bucket...
+    scheduler.observe_rate_limit(40, 5000, reset)
+    assert scheduler.get_metrics()["bucket_tokens"] == 9
+    # ...but GitHub's count after the window resets does.
+    scheduler.observe_rate_limit(4999, 5000, reset + 3600)
+    assert scheduler.get_metrics()["bucket_tokens"] == 4999
+
+
+def test_bucket_refills_once_the_reset_time_has_passed():
+    scheduler = RequestScheduler(hourly_limit=5000)
+    scheduler.observe_rate_limit(0, 5000, int(time.time()) - 1)
+
+    assert scheduler.get_metrics()["bucket_tokens"] == 5000
+
+
+def test_coroutines_wait_for_a_slot_without_blocking_the_loop():
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+    started, release = threading.Event(), threading.Event()
+
+    def list_repository_tree():
+        started.set()
+        release.wait(5)
+        return {"status": "success"}
+
+    async def get_issue():
+        return {"status": "success", "number": 7}
+
+    async def main():
+        holder = asyncio.create_task(asyncio.to_thread(scheduler.run, list_repository_tree, (), {}, True))
+        await asyncio.to_thread(started.wait, 5)
+        waiter = asyncio.create_task(scheduler.run_async(get_issue, (), {}, True))
+        ticks = 0
+        while ticks < 5:
+            # The loop keeps running other coroutines while `waiter` is queued for the slot.
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not waiter.done()
+        release.set()
+        return await holder, await waiter
+
+    assert asyncio.run(main()) == ({"status": "success"}, {"status": "success", "number": 7})
+
+
+def test_a_cancelled_waiter_passes_its_slot_on():
+    slots = _SlotLimiter(1)
+
+    async def main():
+        await slots.acquire_async()
+        first = asyncio.create_task(slots.acquire_async())
+        second = asyncio.create_task(slots.acquire_async())
+        await asyncio.sleep(0)
+        first.cancel()
+        slots.release()
+        await asyncio.wait_for(second, timeout=1)
+        assert first.cancelled()
+        slots.release()
+        # The one slot is free again.
+        await asyncio.wait_for(slots.acquire_async(), timeout=1)
+
+    asyncio.run(main())
+
+
+def test_threads_and_coroutines_are_served_in_arrival_order():
+    slots = _SlotLimiter(1)
+    order = []
+
+    async def main():
+        await slots.acquire_async()
+        thread = threading.Thread(target=lambda: (slots.acquire(), order.append("thread"), slots.release()))
+        thread.start()
+        while not slots._waiters:
+            await asyncio.sleep(0.01)
+        coroutine = asyncio.create_task(slots.acquire_async())
+        await asyncio.sleep(0)
+        slots.release()
+        await asyncio.to_thread(thread.join, 5)
+        await asyncio.wait_for(coroutine, timeout=1)
+        order.append("coroutine")
+
+    asyncio.run(main())
+    assert order == ["thread", "coroutine"]
+
+
+def test_a_nested_tool_call_runs_inside_the_outer_calls_slot():
+    scheduler = RequestScheduler(max_concurrent_requests=1)
+
+    def get_file_content(path):
+        return {"status": "success", "content": f"# {path}"}
+
+    def get_file_section(path):
+        # With one slot, waiting for a second one here would never return.
+        return scheduler.run(get_file_content, (path,), {}, idempotent=True)
+
+    assert scheduler.run(get_file_section, ("guide.md",), {}, idempotent=True)["content"] == "# guide.md"
+    assert scheduler.get_metrics()["calls"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+from telemetry import MetricsRegistry, instrument_tool, metrics, record_http_call
+
+
+def test_render_uses_the_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.inc("adt_tool_calls_total", help_text="Tool invocations.", tool="get_issue", status="success")
+    registry.inc("adt_tool_calls_total", 2, tool="get_issue", status="success")
+    registry.inc("adt_tool_calls_total", tool='say "hi"\\', status="error")
+    registry.observe("adt_tool_duration_seconds", 0.25, help_text="Tool wall time.", tool="get_issue")
+    registry.observe("adt_tool_duration_seconds", 0.5, tool="get_issue")
+    registry.register_collector(lambda: [("adt_cache_entries", {}, 7)])
+
+    assert registry.render() == (
+        "# HELP adt_tool_calls_total Tool invocations.\n"
+        "# TYPE adt_tool_calls_total counter\n"
+        'adt_tool_calls_total{status="error",tool="say \\"hi\\"\\\\"} 1\n'
+        'adt_tool_calls_total{status="success",tool="get_issue"} 3\n'
+        "# HELP adt_tool_duration_seconds Tool wall time.\n"
+        "# TYPE adt_tool_duration_seconds summary\n"
+        'adt_tool_duration_seconds_count{tool="get_issue"} 2\n'
+        'adt_tool_duration_seconds_sum{tool="get_issue"} 0.75\n'
+        "# TYPE adt_cache_entries gauge\n"
+        "adt_cache_entries 7\n"
+    )
+
+
+def test_a_failing_collector_does_not_break_rendering():
+    registry = MetricsRegistry()
+    registry.inc("adt_calls_total", help_text="Calls.")
+    registry.register_collector(lambda: 1 / 0)
+
+    assert registry.render() == "# HELP adt_calls_total Calls.\n# TYPE adt_calls_total counter\nadt_calls_total 1\n"
+
+
+def _tool_api_calls(tool: str) -> float:
+    return metrics.snapshot().get(("adt_tool_api_calls_total", (("tool", tool),)), 0)
+
+
+def test_api_calls_count_against_the_tool_and_every_enclosing_tool():
+    @instrument_tool
+    def telemetry_inner_tool():
+        record_http_call(100)
+        return {"status": "success"}
+
+    @instrument_tool
+    def telemetry_outer_tool():
+        record_http_call(10)
+        telemetry_inner_tool()
+        record_http_call(10)
+        return {"status": "success"}
+
+    telemetry_outer_tool()
+    # Outside any tool, a call is only counted globally.
+    record_http_call(1)
+
+    assert _tool_api_calls("telemetry_inner_tool") == 1
+    assert _tool_api_calls("telemetry_outer_tool") == 3
+
+
+def test_api_calls_made_on_a_worker_thread_count_against_the_async_tool():
+    @instrument_tool
+    async def telemetry_async_tool():
+        await asyncio.gather(asyncio.to_thread(record_http_call, 5), asyncio.to_thread(record_http_call, 5))
+        return {"status": "success"}
+
+    asyncio.run(telemetry_async_tool())
+
+    assert _tool_api_calls("telemetry_async_tool") == 2
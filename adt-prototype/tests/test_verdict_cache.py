@@ -0,0 +1,92 @@
+import asyncio
+from types import SimpleNamespace
+from google.genai import types
+import verdict_cache
+from verdict_cache import VerdictSubject, enable_verdict_cache, get_verdict_cache
+
+
+def _agent_with_cache(subject):
+    agent = SimpleNamespace(name="EvaluationAgent", model="test-model", instruction="Evaluate.",
+                            before_agent_callback=None, after_model_callback=None, after_agent_callback=None)
+    enable_verdict_cache(agent, lambda text: subject)
+    return agent
+
+
+def _run(agent, callback_context):
+    before_agent, after_model, after_agent = agent.before_agent_callback[0], agent.after_model_callback[0], agent.after_agent_callback[0]
+    cached = asyncio.run(before_agent(callback_context))
+    if cached is None:
+        after_model(callback_context, SimpleNamespace(content=types.Content(role="model", parts=[types.Part(text="approved")]), partial=False))
+        after_agent(callback_context)
+    return cached
+
+
+def _context(invocation_id):
+    return SimpleNamespace(invocation_id=invocation_id, state={},
+                           user_content=types.Content(role="user", parts=[types.Part(text="Evaluate PR #1 for issue #2")]))
+
+
+def test_a_stored_verdict_is_served_when_its_side_effects_replay(monkeypatch):
+    monkeypatch.setattr(verdict_cache, "_cache", None)
+    replays = []
+    agent = _agent_with_cache(VerdictSubject("issue", "diff", on_hit=lambda verdict: replays.append(verdict) or True))
+
+    assert _run(agent, _context("first")) is None
+    cached = _run(agent, _context("second"))
+
+    assert cached.parts[0].text == "approved"
+    assert replays == ["approved"]
+
+
+def test_a_failed_replay_falls_through_to_a_fresh_review(monkeypatch):
+    monkeypatch.setattr(verdict_cache, "_cache", None)
+    agent = _agent_with_cache(VerdictSubject("issue", "diff", on_hit=lambda verdict: False))
+
+    assert _run(agent, _context("first")) is None
+    assert _run(agent, _context("second")) is None
+    assert get_verdict_cache().stats()["hits"] == 1
+
+
+def _event(invocation_id, author, *parts):
+    return SimpleNamespace(invocation_id=invocation_id, author=author, content=types.Content(role="model", parts=list(parts)))
+
+
+def _transfer(agent_name):
+    return types.Part(function_call=types.FunctionCall(name="transfer_to_agent", args={"agent_name": agent_name}))
+
+
+def _qa_context(*events):
+    return SimpleNamespace(invocation_id="run", agent_name="QAAgent", session=SimpleNamespace(events=list(events)),
+                           user_content=types.Content(role="user", parts=[types.Part(text="QA docs/a.md and docs/b.md")]))
+
+
+def test_a_transferred_agent_is_keyed_by_the_transfer_message():
+    context = _qa_context(
+        _event("earlier", "DocManagerAgent", types.Part(text="QA docs/old.md"), _transfer("QAAgent")),
+        _event("run", "DocManagerAgent", types.Part(text="QA docs/a.md"), _transfer("QAAgent")),
+        _event("run", "QAAgent", types.Part(text="No issues found in docs/a.md after review.")),
+        _event("run", "DocManagerAgent", types.Part(text="QA docs/b.md"), _transfer("QAAgent")),
+        _event("run", "DocManagerAgent", types.Part(text="Fix it"), _transfer("GenerationAgent")),
+    )
+
+    assert verdict_cache._request_text(context) == "QA docs/b.md"
+
+
+def test_without_a_transfer_message_the_user_message_is_the_request():
+    assert verdict_cache._request_text(_qa_context()) == "QA docs/a.md and docs/b.md"
+    assert verdict_cache._request_text(_qa_context(_event("run", "DocManagerAgent", _transfer("QAAgent")))) == \
+        "QA docs/a.md and docs/b.md"
+
+
+def test_a_cached_qa_verdict_naming_a_closed_issue_is_not_replayed(fake_github):
+    from doc_manager.qa_agent.verdicts import resolve_qa_subject
+
+    fake_github.repo.commit_files("main", {"docs/a.md": "# A\n"}, "Add docs")
+    issue = fake_github.repo.add_issue("Doc QA: Review findings for docs/a.md", "Findings.")
+    subject = resolve_qa_subject("QA file docs/a.md at ref 'main'.")
+    verdict = f"Successfully created issue #{issue['number']} at https://github.example/issues/{issue['number']}."
+
+    assert subject.on_hit(verdict) is True
+    assert subject.on_hit("No issues found in docs/a.md after review.") is True
+    issue["state"] = "closed"
+    assert subject.on_hit(verdict) is False
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from doc_manager.webhooks import QueueWorker, handle_delivery, work_items_for_event
+from work_queue import DONE, FAILED, LEASE_LOST, QUEUED, RUNNING, WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.sqlite"), lease_seconds=60, max_attempts=2, retry_backoff_seconds=0)
+
+
+def _issue_event(action, number=5, updated_at="2024-01-01T00:00:00Z"):
+    return {"action": action, "repository": {"full_name": "test/docs"},
+            "issue": {"number": number, "title": "Docs gap", "body": "", "state": "open", "labels": [], "updated_at": updated_at}}
+
+
+def _expire_leases(queue):
+    queue._db().execute("UPDATE work_items SET lease_expires_at = 0 WHERE status = ?", (RUNNING,))
+
+
+def test_enqueue_deduplicates_and_coalesces(queue):
+    assert queue.enqueue("evaluate_pr", "pr:1:a", {"sha": "a"}, coalesce_key="pr:1")["result"] == "queued"
+    assert queue.enqueue("evaluate_pr", "pr:1:a", {"sha": "a"}, coalesce_key="pr:1")["result"] == "duplicate"
+    assert queue.enqueue("evaluate_pr", "pr:1:b", {"sha": "b"}, coalesce_key="pr:1")["result"] == "coalesced"
+
+    item = queue.claim("worker")
+    assert (item["dedup_key"], item["payload"]) == ("pr:1:b", {"sha": "b"})
+    assert queue.claim("worker") is None
+
+
+def test_failed_items_are_retried_up_to_max_attempts(queue):
+    queue.enqueue("qa", "qa:main:1", {})
+
+    assert queue.fail(queue.claim("worker")["id"], "worker", "boom") == QUEUED
+    item = queue.claim("worker")
+    assert item["attempt"] == 2
+    assert queue.fail(item["id"], "worker", "boom again") == FAILED
+    assert queue.failed_items()[0]["last_error"] == "boom again"
+
+
+def test_an_expired_lease_is_reclaimed_until_max_attempts(queue):
+    queue.enqueue("qa", "qa:main:1", {})
+    queue.claim("worker-1")
+    assert queue.claim("worker-2") is None
+
+    _expire_leases(queue)
+    assert queue.claim("worker-2")["attempt"] == 2
+
+    _expire_leases(queue)
+    assert queue.claim("worker-3") is None
+    assert queue.stats()[FAILED] == 1
+    assert "Lease expired" in queue.failed_items()[0]["last_error"]
+
+
+def test_a_worker_that_lost_its_lease_cannot_finish_the_item(queue):
+    queue.enqueue("qa", "qa:main:1", {})
+    stale = queue.claim("worker-1")
+    _expire_leases(queue)
+    item = queue.claim("worker-2")
+
+    assert queue.complete(stale["id"], "worker-1", {"status": "success"}) is False
+    assert queue.fail(stale["id"], "worker-1", "boom") == LEASE_LOST
+    assert queue.stats()[RUNNING] == 1
+
+    assert queue.complete(item["id"], "worker-2", {"status": "success"}) is True
+    # Once it is done, neither worker can touch it again.
+    assert queue.fail(item["id"], "worker-2", "boom") == LEASE_LOST
+    assert queue.stats()[DONE] == 1
+
+
+def test_a_delivery_is_recorded_with_its_items_and_ignored_when_redelivered(queue):
+    first = handle_delivery("issues", _issue_event("opened"), "delivery-1", queue=queue)
+    again = handle_delivery("issues", _issue_event("opened"), "delivery-1", queue=queue)
+
+    assert first["result"] == "enqueued" and first["items"][0]["result"] == "queued"
+    assert again["result"] == "duplicate_delivery"
+
+
+def test_a_failed_enqueue_does_not_record_the_delivery(queue, monkeypatch):
+    def broken(*args):
+        raise RuntimeError("disk I/O error")
+    monkeypatch.setattr(WorkQueue, "_enqueue", staticmethod(broken))
+    with pytest.raises(RuntimeError):
+        handle_delivery("issues", _issue_event("opened"), "delivery-1", queue=queue)
+    monkeypatch.undo()
+
+    assert handle_delivery("issues", _issue_event("opened"), "delivery-1", queue=queue)["result"] == "enqueued"
+
+
+def test_a_reopened_issue_is_queued_again_after_its_work_is_done(queue):
+    handle_delivery("issues", _issue_event("opened"), "delivery-1", queue=queue)
+    item = queue.claim("worker")
+    queue.complete(item["id"], "worker", {"status": "success"})
+    assert handle_delivery("issues", _issue_event("labeled"), "delivery-2", queue=queue)["items"][0]["result"] == "duplicate"
+
+    reopened = handle_delivery("issues", _issue_event("reopened", updated_at="2024-02-01T00:00:00Z"), "delivery-3", queue=queue)
+
+    assert reopened["items"][0]["result"] == "queued"
+    assert queue.stats()[QUEUED] == 1 and queue.stats()[DONE] == 1
+
+
+def test_events_for_other_repositories_are_ignored():
+    payload = _issue_event("opened")
+    payload["repository"]["full_name"] = "someone/else"
+
+    items, reason = work_items_for_event("issues", payload)
+
+    assert items == [] and "another repository" in reason
+
+
+@pytest.mark.parametrize("status, outcome", [("generation_failed", FAILED), ("claim_lost", FAILED), ("claimed_elsewhere", DONE)])
+def test_an_issue_item_is_retried_unless_another_worker_has_the_issue(queue, fake_github, monkeypatch, status, outcome):
+    issue = fake_github.repo.add_issue("Docs gap", "Explain the setup.")
+    queue.enqueue("issue", f"issue:{issue['number']}", {"number": issue["number"]})
+    worker = QueueWorker(concurrency=1, queue=queue)
+    calls = []
+
+    async def run_issue(issue, evaluate=True):
+        calls.append(issue["number"])
+        return {"issue_number": issue["number"], "status": status}
+    monkeypatch.setattr(worker.batch_runner, "run_issue", run_issue)
+
+    stats = asyncio.run(worker.run(until_empty=True))
+
+    assert stats[outcome] == 1
+    assert len(calls) == (queue.max_attempts if outcome == FAILED else 1)
@@ -0,0 +1,78 @@
+import pytest
+from workflow_store import APPROVED, GENERATION_FAILED, PENDING, PR_OPENED, WorkflowStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return WorkflowStore(str(tmp_path / "workflows.sqlite"), "test/docs", lease_seconds=60, max_attempts=2)
+
+
+def test_claim_creates_the_row_and_counts_attempts(store):
+    state = store.claim(7, "worker-a", "run-1", "Broken link")
+
+    assert state["stage"] == PENDING
+    assert state["title"] == "Broken link"
+    assert state["claimed_by"] == "worker-a"
+    assert state["attempts"] == 1
+
+
+def test_a_live_claim_blocks_other_workers_until_released(store):
+    store.claim(7, "worker-a")
+
+    assert store.claim(7, "worker-b") is None
+    store.release(7, "worker-a")
+    assert store.claim(7, "worker-b")["attempts"] == 2
+
+
+def test_an_expired_lease_can_be_taken_over(store):
+    store.lease_seconds = -1
+    store.claim(7, "worker-a")
+
+    assert store.claim(7, "worker-b")["claimed_by"] == "worker-b"
+    assert store.renew(7, "worker-a") is False
+    assert store.renew(7, "worker-b") is True
+
+
+def test_checkpoint_requires_the_claim(store):
+    store.claim(7, "worker-a")
+
+    assert store.checkpoint(7, "worker-a", stage=PR_OPENED, pr_number=12) is True
+    # Writing the same values again is a no-op, but the claim is still held.
+    assert store.checkpoint(7, "worker-a", stage=PR_OPENED, pr_number=12) is True
+    assert store.checkpoint(7, "worker-b", stage=APPROVED) is False
+    assert store.get(7)["stage"] == PR_OPENED
+
+    store.release(7, "worker-a")
+    assert store.checkpoint(7, "worker-a", stage=APPROVED) is False
+    assert store.get(7)["stage"] == PR_OPENED
+
+
+def test_checkpoint_rejects_unknown_fields(store):
+    store.claim(7, "worker-a")
+
+    with pytest.raises(ValueError):
+        store.checkpoint(7, "worker-a", colour="blue")
+
+
+def test_failed_generations_stay_unfinished_until_max_attempts(store):
+    store.claim(7, "worker-a", title="Broken link")
+    store.checkpoint(7, "worker-a", stage=GENERATION_FAILED)
+    store.release(7, "worker-a")
+    store.claim(8, "worker-a", title="Typo")
+    store.checkpoint(8, "worker-a", stage=APPROVED, approved=True)
+    store.release(8, "worker-a")
+
+    assert store.unfinished() == [{"number": 7, "title": "Broken link"}]
+
+    store.claim(7, "worker-b")
+    store.checkpoint(7, "worker-b", stage=GENERATION_FAILED, last_error="No PR opened.")
+    store.release(7, "worker-b")
+    assert store.unfinished() == []
+
+
+def test_reset_forgets_checkpoints(store):
+    store.claim(7, "worker-a")
+    store.checkpoint(7, "worker-a", stage=APPROVED)
+
+    assert store.reset([7]) == 1
+    assert store.get(7) is None
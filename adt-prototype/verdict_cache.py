@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from google.genai import types
+from config_utils import config
+from state_utils import get_state_path
+from telemetry import emit, metrics
+
+# --- Verdict Cache ---
+# Review agents (EvaluationAgent, QAAgent) store their final verdict keyed by the
+# agent, model, instruction and hashes of what they reviewed. When the same review
+# comes up again unchanged, the stored verdict is returned without calling the model.
+
+VERDICT_CACHE_SETTINGS = config.get("verdict_cache", {})
+ENABLED = VERDICT_CACHE_SETTINGS.get("enabled", True)
+TTL_SECONDS = VERDICT_CACHE_SETTINGS.get("ttl_seconds", 7 * 24 * 3600)
+MAX_ENTRIES = VERDICT_CACHE_SETTINGS.get("max_entries", 5000)
+DATABASE_FILE = "verdicts.sqlite"
+
+BYPASS_ENV_VAR = "ADT_VERDICT_CACHE_BYPASS"
+BYPASS_STATE_KEY = "verdict_cache_bypass"
+
+
+def content_hash(value) -> str:
+    """SHA-256 of a string, or of the canonical JSON of any other value."""
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class VerdictSubject:
+    """What a review is about.
+
+    `issue_hash` and `content_hash` identify the inputs (issue text, diff or file blobs).
+    `identifiers` maps placeholder tokens to the literal references in the verdict
+    (e.g. "PR #<pr_number>" -> "PR #42") so a stored verdict reads correctly when served
+    for another PR with identical content. `should_store` filters out error reports, and
+    `on_hit` replays side effects of a stored verdict (e.g. submitting the approval). It
+    returns False if it could not, and the agent then reviews afresh instead.
+    """
+
+    __slots__ = ("issue_hash", "content_hash", "identifiers", "should_store", "on_hit")
+
+    def __init__(self, issue_hash: str, content_hash: str, identifiers: dict | None = None,
+                 should_store=None, on_hit=None):
+        self.issue_hash = issue_hash
+        self.content_hash = content_hash
+        self.identifiers = identifiers or {}
+        self.should_store = should_store or (lambda text: bool(text.strip()))
+        self.on_hit = on_hit
+
+    def to_template(self, text: str) -> str:
+        for token, literal in self.identifiers.items():
+            text = text.replace(literal, token)
+        return text
+
+    def from_template(self, text: str) -> str:
+        for token, literal in self.identifiers.items():
+            text = text.replace(token, literal)
+        return text
+
+
+class VerdictCache:
+    """SQLite-backed verdict store with TTL expiry and least-recently-used eviction."""
+
+    def __init__(self, path: str, ttl_seconds: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = None
+        self._stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "expired": 0, "evictions": 0}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS verdicts ("
+                " key TEXT PRIMARY KEY, agent TEXT NOT NULL, model TEXT NOT NULL, verdict TEXT NOT NULL,"
+                " created_at REAL NOT NULL, last_used_at REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS verdicts_last_used ON verdicts (last_used_at)")
+        return self._connection
+
+    @staticmethod
+    def make_key(agent: str, model: str, prompt_version: str, issue_hash: str, subject_hash: str) -> str:
+        return content_hash([agent, model, prompt_version, issue_hash, subject_hash])
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT verdict, created_at FROM verdicts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            verdict, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                db.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+            db.execute("UPDATE verdicts SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._stats["hits"] += 1
+            return verdict
+
+    def put(self, key: str, agent: str, model: str, verdict: str) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO verdicts (key, agent, model, verdict, created_at, last_used_at, hits) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, agent, model, verdict, now, now),
+            )
+            self._stats["stores"] += 1
+            if self.ttl_seconds:
+                self._stats["expired"] += db.execute("DELETE FROM verdicts WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+            excess = db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute("DELETE FROM verdicts WHERE key IN (SELECT key FROM verdicts ORDER BY last_used_at LIMIT ?)", (excess,))
+                self._stats["evictions"] += excess
+
+    def record_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM verdicts")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._db().execute("SELECT COUNT(*) FROM verdicts").fetchone()[0] if self._connection else None
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> VerdictCache:
+    """Returns the shared verdict cache, opening its database under the state directory on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache(get_state_path(DATABASE_FILE))
+        return _cache
+
+
+def get_verdict_cache_stats() -> dict:
+    """Reports hits, misses, bypasses, stores, evictions and the hit rate of the verdict cache."""
+    return {"status": "success", "enabled": ENABLED, "stats": get_verdict_cache().stats()}
+
+
+metrics.register_collector(
+    lambda: ((f"adt_verdict_cache_{name}", {}, value) for name, value in get_verdict_cache().stats().items()
+             if isinstance(value, (int, float)))
+)
+
+
+# --- ADK callbacks ---
+
+_pending: dict = {}
+_pending_lock = threading.Lock()
+
+
+def _is_bypassed(callback_context) -> bool:
+    if os.getenv(BYPASS_ENV_VAR, "").lower() in ("1", "true", "yes"):
+        return True
+    try:
+        return bool(callback_context.state.get(BYPASS_STATE_KEY))
+    except Exception:
+        return False
+
+
+def _request_text(callback_context) -> str:
+    """The request the agent is about to answer.
+
+    An agent reached through `transfer_to_agent` answers the message that transferred to it,
+    not the user's, which may cover several delegated tasks. Without a transfer, or when the
+    transfer carried no text, it is the user's message.
+    """
+    session = getattr(callback_context, "session", None)
+    for event in reversed(getattr(session, "events", None) or []):
+        if event.invocation_id != callback_context.invocation_id or not event.content or not event.content.parts:
+            continue
+        parts = event.content.parts
+        if any(part.function_call and part.function_call.name == "transfer_to_agent"
+               and (part.function_call.args or {}).get("agent_name") == callback_context.agent_name for part in parts):
+            text = "".join(part.text or "" for part in parts if not part.thought)
+            if text.strip():
+                return text
+            break
+    content = getattr(callback_context, "user_content", None)
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text or "" for part in content.parts)
+
+
+def _as_list(callback) -> list:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def enable_verdict_cache(agent, resolve_subject) -> None:
+    """Memoizes an agent's final verdict.
+
+    `resolve_subject(request_text)` returns a VerdictSubject for requests the cache
+    applies to, or None. The cache's callbacks run ahead of the agent's existing
+    before/after-agent callbacks (a hit skips the agent entirely) and after its
+    existing after-model callbacks. `resolve_subject` and `on_hit` may call GitHub,
+    so they run on a worker thread rather than on the event loop.
+    """
+    prompt_versions: dict = {}
+
+    def identity() -> tuple[str, str]:
+        model = agent.model if isinstance(agent.model, str) else getattr(agent.model, "model", type(agent.model).__name__)
+        instruction = agent.instruction if isinstance(agent.instruction, str) else getattr(agent.instruction, "__qualname__", "")
+        if instruction not in prompt_versions:
+            prompt_versions[instruction] = content_hash(instruction)[:16]
+        return model, prompt_versions[instruction]
+
+    async def before_agent(callback_context):
+        if not ENABLED:
+            return None
+        try:
+            subject = await asyncio.to_thread(resolve_subject, _request_text(callback_context))
+        except Exception as e:
+            print(f"WARNING: Could not resolve verdict cache key for {agent.name}: {e}")
+            return None
+        if subject is None:
+            return None
+        model, prompt_version = identity()
+        key = VerdictCache.make_key(agent.name, model, prompt_version, subject.issue_hash, subject.content_hash)
+        cache = get_verdict_cache()
+        if _is_bypassed(callback_context):
+            cache.record_bypass()
+            verdict = None
+            result = "bypass"
+        else:
+            verdict = cache.get(key)
+            result = "hit" if verdict is not None else "miss"
+        if verdict is not None:
+            verdict = subject.from_template(verdict)
+            if subject.on_hit and not await asyncio.to_thread(subject.on_hit, verdict):
+                print(f"WARNING: {agent.name}: could not replay the cached verdict; reviewing again.")
+                verdict = None
+                result = "replay_failed"
+        metrics.inc("adt_verdict_cache_lookups_total", help_text="Verdict cache lookups.", agent=agent.name, result=result)
+        emit("verdict_cache", agent=agent.name, result=result, key=key[:16])
+        if verdict is not None:
+            print(f"{agent.name}: reusing cached verdict for unchanged inputs.")
+            return types.Content(role="model", parts=[types.Part(text=verdict)])
+        with _pending_lock:
+            _pending[(callback_context.invocation_id, agent.name)] = {"key": key, "model": model, "subject": subject, "text": None}
+        return None
+
+    def after_model(callback_context, llm_response):
+        with _pending_lock:
+            pending = _pending.get((callback_context.invocation_id, agent.name))
+        content = getattr(llm_response, "content", None)
+        if pending is None or not content or not content.parts or getattr(llm_response, "partial", False):
+            return None
+        if any(part.function_call for part in content.parts):
+            return None
+        text = "".join(part.text or "" for part in content.parts)
+        if text:
+            pending["text"] = text
+        return None
+
+    def after_agent(callback_context):
+        with _pending_lock:
+            pending = _pending.pop((callback_context.invocation_id, agent.name), None)
+        if pending is None or not pending["text"] or not pending["subject"].should_store(pending["text"]):
+            return None
+        try:
+            get_verdict_cache().put(pending["key"], agent.name, pending["model"], pending["subject"].to_template(pending["text"]))
+        except Exception as e:
+            print(f"WARNING: Could not store verdict for {agent.name}: {e}")
+        return None
+
+    agent.before_agent_callback = [before_agent] + _as_list(agent.before_agent_callback)
+    agent.after_model_callback = _as_list(agent.after_model_callback) + [after_model]
+    agent.after_agent_callback = [after_agent] + _as_list(agent.after_agent_callback)
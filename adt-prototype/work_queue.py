@@ -0,0 +1,253 @@
+import json
+import sqlite3
+import threading
+import time
+from config_utils import config
+from state_utils import get_state_path
+from telemetry import metrics
+
+# --- Durable Work Queue ---
+# Webhook deliveries become work items in a SQLite database under the state directory,
+# so queued work survives restarts and a crashed worker's item is picked up again once
+# its lease expires.
+
+WORK_QUEUE_SETTINGS = config.get("work_queue", {})
+LEASE_SECONDS = WORK_QUEUE_SETTINGS.get("lease_seconds", 1800)
+MAX_ATTEMPTS = WORK_QUEUE_SETTINGS.get("max_attempts", 3)
+RETRY_BACKOFF_SECONDS = WORK_QUEUE_SETTINGS.get("retry_backoff_seconds", 30)
+RETENTION_SECONDS = WORK_QUEUE_SETTINGS.get("retention_days", 7) * 24 * 3600
+DATABASE_FILE = "work_queue.sqlite"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# Not a stored status: what `fail` reports when the worker no longer holds the item's lease.
+LEASE_LOST = "lease_lost"
+
+
+class WorkQueue:
+    """SQLite-backed queue of work items with deduplication, leases and retries.
+
+    Every item has a `dedup_key` naming the exact work (e.g. "pr:42:<head sha>"); an item
+    whose key is already queued, running or done is not added again. An optional
+    `coalesce_key` names the subject (e.g. "pr:42"): a newer item replaces a queued one
+    with the same coalesce key instead of queueing behind it. Delivery IDs are recorded in
+    the same transaction as their items, so a redelivered webhook is ignored and a failed
+    one can be delivered again.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS,
+                 retry_backoff_seconds: float = RETRY_BACKOFF_SECONDS, retention_seconds: float = RETENTION_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS work_items ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, dedup_key TEXT NOT NULL,"
+                " coalesce_key TEXT, payload TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " available_at REAL NOT NULL, lease_expires_at REAL, worker TEXT, delivery_id TEXT,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL, last_error TEXT, result TEXT)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS work_items_dedup ON work_items (dedup_key, status)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS work_items_coalesce ON work_items (coalesce_key, status)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS work_items_ready ON work_items (status, available_at)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries (delivery_id TEXT PRIMARY KEY, event TEXT, received_at REAL NOT NULL)"
+            )
+        return self._connection
+
+    def enqueue(self, kind: str, dedup_key: str, payload: dict, coalesce_key: str | None = None,
+                delivery_id: str | None = None) -> dict:
+        """Adds a work item unless the same work is already queued, running or done.
+
+        Returns {"result": "queued" | "coalesced" | "duplicate", "id": ...}.
+        """
+        return self.enqueue_delivery(None, None, [{"kind": kind, "dedup_key": dedup_key, "payload": payload,
+                                                   "coalesce_key": coalesce_key, "delivery_id": delivery_id}])[0]
+
+    def enqueue_delivery(self, delivery_id: str | None, event: str | None, items: list[dict]) -> list[dict] | None:
+        """Records a webhook delivery ID and enqueues its work items in one transaction.
+
+        Items are dicts with kind, dedup_key, payload and optionally coalesce_key. Returns the
+        `enqueue` outcome of each item, or None if the delivery was seen before. If anything
+        fails, neither the delivery nor its items are recorded, so GitHub's redelivery is accepted.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                if delivery_id and db.execute(
+                    "INSERT OR IGNORE INTO deliveries (delivery_id, event, received_at) VALUES (?, ?, ?)",
+                    (delivery_id, event, now),
+                ).rowcount == 0:
+                    db.execute("COMMIT")
+                    return None
+                outcomes = [self._enqueue(db, now, item["kind"], item["dedup_key"], item["payload"], item.get("coalesce_key"),
+                                          item.get("delivery_id", delivery_id)) for item in items]
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        for item, outcome in zip(items, outcomes):
+            metrics.inc("adt_work_items_enqueued_total", help_text="Work items offered to the queue.", kind=item["kind"], result=outcome["result"])
+        return outcomes
+
+    @staticmethod
+    def _enqueue(db: sqlite3.Connection, now: float, kind: str, dedup_key: str, payload: dict,
+                 coalesce_key: str | None, delivery_id: str | None) -> dict:
+        existing = db.execute(
+            "SELECT id, status FROM work_items WHERE dedup_key = ? AND status IN (?, ?, ?) ORDER BY id DESC LIMIT 1",
+            (dedup_key, QUEUED, RUNNING, DONE),
+        ).fetchone()
+        if existing:
+            return {"result": "duplicate", "id": existing[0], "status": existing[1]}
+        queued = db.execute(
+            "SELECT id FROM work_items WHERE coalesce_key = ? AND status = ? ORDER BY id LIMIT 1",
+            (coalesce_key, QUEUED),
+        ).fetchone() if coalesce_key else None
+        if queued:
+            db.execute(
+                "UPDATE work_items SET dedup_key = ?, payload = ?, delivery_id = ?, updated_at = ? WHERE id = ?",
+                (dedup_key, json.dumps(payload), delivery_id, now, queued[0]),
+            )
+            return {"result": "coalesced", "id": queued[0]}
+        cursor = db.execute(
+            "INSERT INTO work_items (kind, dedup_key, coalesce_key, payload, status, available_at, delivery_id,"
+            " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, dedup_key, coalesce_key, json.dumps(payload), QUEUED, now, delivery_id, now, now),
+        )
+        return {"result": "queued", "id": cursor.lastrowid}
+
+    def claim(self, worker: str) -> dict | None:
+        """Leases the oldest ready item to `worker`, including items whose previous lease expired.
+
+        An expired item that has already used `max_attempts` (its workers kept dying or hanging)
+        is marked failed instead of being leased again.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = db.execute(
+                        "SELECT id, kind, dedup_key, payload, attempts, status FROM work_items"
+                        " WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at < ?)"
+                        " ORDER BY available_at, id LIMIT 1",
+                        (QUEUED, now, RUNNING, now),
+                    ).fetchone()
+                    if row is None or row[5] != RUNNING or row[4] < self.max_attempts:
+                        break
+                    db.execute(
+                        "UPDATE work_items SET status = ?, lease_expires_at = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                        (FAILED, f"Lease expired on attempt {row[4]} of {self.max_attempts}.", now, row[0]),
+                    )
+                    print(f"Work item {row[2]} failed: its lease expired on the last of {self.max_attempts} attempts.")
+                if row:
+                    db.execute(
+                        "UPDATE work_items SET status = ?, attempts = attempts + 1, lease_expires_at = ?, worker = ?, updated_at = ?"
+                        " WHERE id = ?",
+                        (RUNNING, now + self.lease_seconds, worker, now, row[0]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "dedup_key": row[2], "payload": json.loads(row[3]), "attempt": row[4] + 1}
+
+    def complete(self, item_id: int, worker: str, result: dict | None = None) -> bool:
+        """Marks the item done. Returns False, leaving the item alone, if `worker` no longer holds its lease."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            updated = db.execute(
+                "UPDATE work_items SET status = ?, lease_expires_at = NULL, result = ?, last_error = NULL, updated_at = ?"
+                " WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, json.dumps(result, default=str) if result is not None else None, now, item_id, worker, RUNNING),
+            ).rowcount
+            if self.retention_seconds:
+                db.execute("DELETE FROM work_items WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, now - self.retention_seconds))
+                db.execute("DELETE FROM deliveries WHERE received_at < ?", (now - self.retention_seconds,))
+        if not updated:
+            print(f"WARNING: {worker} lost the lease on work item {item_id}; its result was not recorded.")
+        return bool(updated)
+
+    def fail(self, item_id: int, worker: str, error: str) -> str:
+        """Requeues the item with exponential backoff, or marks it failed after `max_attempts`. Returns the new status.
+
+        Returns LEASE_LOST, leaving the item alone, if `worker` no longer holds its lease.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute(
+                    "SELECT attempts FROM work_items WHERE id = ? AND worker = ? AND status = ?", (item_id, worker, RUNNING),
+                ).fetchone()
+                if row is None:
+                    status = LEASE_LOST
+                else:
+                    if row[0] >= self.max_attempts:
+                        status, available_at = FAILED, now
+                    else:
+                        status, available_at = QUEUED, now + self.retry_backoff_seconds * 2 ** (row[0] - 1)
+                    db.execute(
+                        "UPDATE work_items SET status = ?, available_at = ?, lease_expires_at = NULL, last_error = ?, updated_at = ?"
+                        " WHERE id = ?",
+                        (status, available_at, error, now, item_id),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if status == LEASE_LOST:
+            print(f"WARNING: {worker} lost the lease on work item {item_id}; its failure was not recorded.")
+        return status
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db().execute("SELECT status, COUNT(*) FROM work_items GROUP BY status").fetchall()
+            oldest = self._db().execute("SELECT MIN(created_at) FROM work_items WHERE status = ?", (QUEUED,)).fetchone()[0]
+        stats = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+        stats.update(dict(rows))
+        stats["oldest_queued_age_seconds"] = round(time.time() - oldest, 1) if oldest else 0.0
+        return stats
+
+    def failed_items(self, limit: int = 20) -> list[dict]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, kind, dedup_key, attempts, last_error FROM work_items WHERE status = ? ORDER BY updated_at DESC LIMIT ?",
+                (FAILED, limit),
+            ).fetchall()
+        return [{"id": row[0], "kind": row[1], "dedup_key": row[2], "attempts": row[3], "last_error": row[4]} for row in rows]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_work_queue() -> WorkQueue:
+    """Returns the shared work queue, opening its database under the state directory on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WorkQueue(get_state_path(DATABASE_FILE))
+        return _queue
+
+
+metrics.register_collector(
+    lambda: ((f"adt_work_queue_{name}", {}, value) for name, value in get_work_queue().stats().items())
+    if _queue is not None else ()
+)
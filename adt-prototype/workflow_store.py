@@ -0,0 +1,181 @@
+import sqlite3
+import threading
+import time
+from config_utils import config
+from state_utils import get_state_path
+
+# --- Workflow Checkpoints ---
+# Each issue's progress through Generation -> Evaluation is checkpointed in SQLite under the
+# state directory, so an interrupted batch resumes from the last completed step instead of
+# paying for finished generations and evaluations again. Workers claim issues row by row,
+# so several runners (threads or processes) can share one store without doubling up.
+
+WORKFLOW_SETTINGS = config.get("workflow", {})
+ENABLED = WORKFLOW_SETTINGS.get("enabled", True)
+LEASE_SECONDS = WORKFLOW_SETTINGS.get("lease_seconds", 1200)
+MAX_ATTEMPTS = WORKFLOW_SETTINGS.get("max_attempts", 3)
+DATABASE_FILE = "workflows.sqlite"
+
+# Stages, in order. A run picks up after the last one recorded.
+PENDING = "pending"
+GENERATED = "generated"      # branch committed, no PR yet
+PR_OPENED = "pr_opened"
+APPROVED = "approved"
+CHANGES_REQUESTED = "changes_requested"
+GENERATION_FAILED = "generation_failed"  # retried until the issue has used max_attempts claims
+
+FINAL_STAGES = (APPROVED, CHANGES_REQUESTED)
+
+_FIELDS = ("stage", "title", "branch_name", "pr_number", "approved", "generation_response", "evaluation_response",
+           "last_error", "attempts", "claimed_by", "lease_expires_at", "run_id", "updated_at")
+
+
+class ClaimLostError(RuntimeError):
+    """Raised when a worker writes a checkpoint for an issue it no longer holds."""
+
+
+class WorkflowStore:
+    """SQLite-backed per-issue checkpoints with row-level claiming.
+
+    `checkpoint` only writes the fields it is given, and writing the same values again is a
+    no-op, so a step that is retried after a crash records the same state once.
+    """
+
+    def __init__(self, path: str, repository: str, lease_seconds: float = LEASE_SECONDS, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.repository = repository
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA busy_timeout=5000")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS workflows ("
+                " repository TEXT NOT NULL, issue_number INTEGER NOT NULL, stage TEXT NOT NULL, title TEXT,"
+                " branch_name TEXT, pr_number INTEGER, approved INTEGER, generation_response TEXT, evaluation_response TEXT,"
+                " last_error TEXT, attempts INTEGER NOT NULL DEFAULT 0, claimed_by TEXT, lease_expires_at REAL, run_id TEXT,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (repository, issue_number))"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS workflows_stage ON workflows (repository, stage)")
+        return self._connection
+
+    def _row(self, db: sqlite3.Connection, issue_number: int) -> dict | None:
+        row = db.execute(f"SELECT issue_number, {', '.join(_FIELDS)} FROM workflows WHERE repository = ? AND issue_number = ?",
+                         (self.repository, issue_number)).fetchone()
+        if row is None:
+            return None
+        state = dict(zip(("issue_number",) + _FIELDS, row))
+        state["approved"] = bool(state["approved"]) if state["approved"] is not None else None
+        return state
+
+    def get(self, issue_number: int) -> dict | None:
+        with self._lock:
+            return self._row(self._db(), issue_number)
+
+    def claim(self, issue_number: int, worker: str, run_id: str | None = None, title: str = "") -> dict | None:
+        """Claims an issue for `worker` and returns its checkpoint, or None if another live worker holds it.
+
+        The row is created on first claim. A claim whose lease expired (its worker died) can be taken over.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR IGNORE INTO workflows (repository, issue_number, stage, title, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (self.repository, issue_number, PENDING, title, now, now),
+            )
+            claimed = db.execute(
+                "UPDATE workflows SET claimed_by = ?, lease_expires_at = ?, run_id = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE repository = ? AND issue_number = ? AND (claimed_by IS NULL OR claimed_by = ? OR lease_expires_at < ?)",
+                (worker, now + self.lease_seconds, run_id, now, self.repository, issue_number, worker, now),
+            ).rowcount
+            return self._row(db, issue_number) if claimed else None
+
+    def renew(self, issue_number: int, worker: str) -> bool:
+        """Extends a claim's lease. Returns False if the claim was lost."""
+        now = time.time()
+        with self._lock:
+            return self._db().execute(
+                "UPDATE workflows SET lease_expires_at = ? WHERE repository = ? AND issue_number = ? AND claimed_by = ?",
+                (now + self.lease_seconds, self.repository, issue_number, worker),
+            ).rowcount == 1
+
+    def release(self, issue_number: int, worker: str) -> None:
+        with self._lock:
+            self._db().execute(
+                "UPDATE workflows SET claimed_by = NULL, lease_expires_at = NULL WHERE repository = ? AND issue_number = ? AND claimed_by = ?",
+                (self.repository, issue_number, worker),
+            )
+
+    def checkpoint(self, issue_number: int, worker: str, **fields) -> bool:
+        """Records the given fields (stage, branch_name, pr_number, approved, responses, last_error) for an issue.
+
+        Only the worker holding the issue's claim may write. Returns False, writing nothing, if `worker` lost the claim.
+        """
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown workflow field(s): {sorted(unknown)}")
+        with self._lock:
+            db = self._db()
+            if fields:
+                assignments = ", ".join(f"{name} = ?" for name in fields)
+                changed = " OR ".join(f"{name} IS NOT ?" for name in fields)
+                if db.execute(
+                    f"UPDATE workflows SET {assignments}, updated_at = ?"
+                    f" WHERE repository = ? AND issue_number = ? AND claimed_by = ? AND ({changed})",
+                    (*fields.values(), time.time(), self.repository, issue_number, worker, *fields.values()),
+                ).rowcount:
+                    return True
+            # Nothing was written: either the values are unchanged or the claim is gone.
+            return db.execute("SELECT 1 FROM workflows WHERE repository = ? AND issue_number = ? AND claimed_by = ?",
+                              (self.repository, issue_number, worker)).fetchone() is not None
+
+    def reset(self, issue_numbers: list[int] | None = None) -> int:
+        """Forgets the checkpoints of the given issues (or all), so they start from scratch next time."""
+        with self._lock:
+            db = self._db()
+            if issue_numbers is None:
+                return db.execute("DELETE FROM workflows WHERE repository = ?", (self.repository,)).rowcount
+            return sum(db.execute("DELETE FROM workflows WHERE repository = ? AND issue_number = ?",
+                                  (self.repository, number)).rowcount for number in issue_numbers)
+
+    def unfinished(self) -> list[dict]:
+        """Issues whose workflow has not reached a final stage, oldest first.
+
+        Failed generations are included until they have used `max_attempts` claims.
+        """
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT issue_number, title FROM workflows WHERE repository = ? AND stage NOT IN ({', '.join('?' * len(FINAL_STAGES))})"
+                " AND NOT (stage = ? AND attempts >= ?) ORDER BY created_at",
+                (self.repository, *FINAL_STAGES, GENERATION_FAILED, self.max_attempts),
+            ).fetchall()
+        return [{"number": number, "title": title or ""} for number, title in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db().execute("SELECT stage, COUNT(*) FROM workflows WHERE repository = ? GROUP BY stage",
+                                      (self.repository,)).fetchall()
+            claimed = self._db().execute(
+                "SELECT COUNT(*) FROM workflows WHERE repository = ? AND claimed_by IS NOT NULL AND lease_expires_at >= ?",
+                (self.repository, time.time()),
+            ).fetchone()[0]
+        return {"by_stage": dict(rows), "claimed": claimed}
+
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+def get_workflow_store(repository: str) -> WorkflowStore:
+    """Returns the shared workflow store for a repository, opening its database under the state directory on first use."""
+    with _stores_lock:
+        if repository not in _stores:
+            _stores[repository] = WorkflowStore(get_state_path(DATABASE_FILE), repository)
+        return _stores[repository]
+